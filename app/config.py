@@ -15,5 +15,67 @@ class Settings:
     CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
     # Default to allow all for direct access if env var not set
     ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
+    # Shared PostgREST connection pool (all traffic goes to the single Supabase host)
+    DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "50"))
+    DB_POOL_MAX_KEEPALIVE = int(os.getenv("DB_POOL_MAX_KEEPALIVE", "20"))
+    DB_POOL_KEEPALIVE_EXPIRY = float(os.getenv("DB_POOL_KEEPALIVE_EXPIRY", "30"))
+    DB_TIMEOUT_SECONDS = float(os.getenv("DB_TIMEOUT_SECONDS", "10"))
+    DB_HTTP2 = os.getenv("DB_HTTP2", "true").lower() == "true"
+    # Latency budgets of the /v1/home/summary sections before their fallback is served: panchang is the
+    # main content, festivals a short list, and the quick counts are cheap extras not worth waiting for
+    HOME_PANCHANG_TIMEOUT_SECONDS = float(os.getenv("HOME_PANCHANG_TIMEOUT_SECONDS", "1.5"))
+    HOME_FESTIVALS_TIMEOUT_SECONDS = float(os.getenv("HOME_FESTIVALS_TIMEOUT_SECONDS", "1.0"))
+    HOME_COUNTS_TIMEOUT_SECONDS = float(os.getenv("HOME_COUNTS_TIMEOUT_SECONDS", "0.5"))
+    # Radius of the "nearby temples" count on /v1/home/summary when lat/lng are given
+    HOME_NEARBY_RADIUS_KM = float(os.getenv("HOME_NEARBY_RADIUS_KM", "25"))
+    # Response cache: in-process LRU size used when Upstash Redis is not configured
+    CACHE_LRU_MAX_ENTRIES = int(os.getenv("CACHE_LRU_MAX_ENTRIES", "2048"))
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    # Live Panchang memo: coordinates snap to this grid (0.1 deg ~ 11 km) before lookup
+    PANCHANG_GRID_DEG = float(os.getenv("PANCHANG_GRID_DEG", "0.1"))
+    PANCHANG_CACHE_MAX_ENTRIES = int(os.getenv("PANCHANG_CACHE_MAX_ENTRIES", "4096"))
+    # How precisely tithi/nakshatra/yoga/karan end times are root-solved
+    PANCHANG_TRANSITION_TOLERANCE_SECONDS = float(os.getenv("PANCHANG_TRANSITION_TOLERANCE_SECONDS", "10"))
+    # Gemini quotas per model alias, shared by every GeminiClient in the process (GEMINI_RPM/TPM are for flash)
+    GEMINI_RPM = int(os.getenv("GEMINI_RPM", "15"))
+    GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+    GEMINI_PRO_RPM = int(os.getenv("GEMINI_PRO_RPM", "2"))
+    GEMINI_PRO_TPM = int(os.getenv("GEMINI_PRO_TPM", "32000"))
+    GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+    # Opt-in cache of generate_json responses keyed by (model, prompt, config): "sqlite", "redis" or empty for off
+    GEMINI_CACHE_BACKEND = os.getenv("GEMINI_CACHE_BACKEND", "").lower()
+    GEMINI_CACHE_PATH = os.getenv("GEMINI_CACHE_PATH", ".gemini_cache.sqlite3")
+    GEMINI_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+    GEMINI_CACHE_MAX_ENTRIES = int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "20000"))
+    # Skip cache lookups (fresh responses are still stored), e.g. after changing a prompt's expectations
+    GEMINI_CACHE_BYPASS = os.getenv("GEMINI_CACHE_BYPASS", "false").lower() == "true"
+    ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", "4"))
+    ENRICHMENT_MAX_RETRIES = int(os.getenv("ENRICHMENT_MAX_RETRIES", "5"))
+    # In-memory temple spatial index: grid cell size, and how often each process reloads it from the table
+    TEMPLE_INDEX_CELL_DEG = float(os.getenv("TEMPLE_INDEX_CELL_DEG", "0.1"))
+    TEMPLE_INDEX_REFRESH_SECONDS = int(os.getenv("TEMPLE_INDEX_REFRESH_SECONDS", "3600"))
+    # Map clustering: cluster pyramid depth, grid cells per tile side as a power of two (3 -> 8 x 8 cells), and the zoom where single markers start
+    TEMPLE_CLUSTER_MAX_ZOOM = int(os.getenv("TEMPLE_CLUSTER_MAX_ZOOM", "13"))
+    TEMPLE_CLUSTER_GRID_BITS = int(os.getenv("TEMPLE_CLUSTER_GRID_BITS", "3"))
+    TEMPLE_CLUSTER_POINTS_ZOOM = int(os.getenv("TEMPLE_CLUSTER_POINTS_ZOOM", "14"))
+    # In-process search index: snapshot file for fast restarts, and how often it is rebuilt from the database
+    SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", ".search_index.pickle")
+    SEARCH_INDEX_REFRESH_SECONDS = int(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "3600"))
+    # Suggestions: minimum seconds between rebuilds of the prefix table after the search index changes
+    AUTOCOMPLETE_REBUILD_SECONDS = int(os.getenv("AUTOCOMPLETE_REBUILD_SECONDS", "60"))
+    # Gita corpus snapshot written by scripts/build_geeta_corpus.py, and how often it is checked for a new version
+    GEETA_CORPUS_PATH = os.getenv("GEETA_CORPUS_PATH", ".geeta_corpus.json")
+    GEETA_CORPUS_CHECK_SECONDS = int(os.getenv("GEETA_CORPUS_CHECK_SECONDS", "60"))
+    # List endpoints: how long an estimated row count (per table and filters) is reused
+    LIST_COUNT_TTL_SECONDS = int(os.getenv("LIST_COUNT_TTL_SECONDS", "300"))
+    # Responses smaller than this are sent uncompressed (gzip/brotli overhead outweighs the saving)
+    COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    # Let a shared CDN store cacheable API-key routes (Cache-Control: public, Vary: X-API-Key); off means private
+    HTTP_CACHE_PUBLIC = os.getenv("HTTP_CACHE_PUBLIC", "false").lower() == "true"
+    # /v1/sync: rows per entity per response by default, and the most a client may ask for
+    SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "200"))
+    SYNC_MAX_BATCH_SIZE = int(os.getenv("SYNC_MAX_BATCH_SIZE", "1000"))
+    # /v1/sync only serves change log entries at least this old, so concurrent writes that commit out of id order are not skipped
+    SYNC_SETTLE_SECONDS = int(os.getenv("SYNC_SETTLE_SECONDS", "5"))
 
 settings = Settings()
@@ -1,7 +1,6 @@
-import asyncio
 from datetime import datetime, timedelta
 from app.services.gemini_client import GeminiClient
-from app.utils.supabase_client import supabase
+from app.utils.db import db
 from app.utils.logger import setup_logger
 
 logger = setup_logger("jobs")
@@ -17,7 +16,7 @@ async def job_generate_blogs():
         # Generate 2 blogs
         for _ in range(2):
             # Fetch keyword
-            res = supabase.table("blog_keywords").select("*").eq("is_used", False).order("priority", desc=True).limit(1).execute()
+            res = await db.table("blog_keywords").select("*").eq("is_used", False).order("priority", desc=True).limit(1).execute()
             if not res.data:
                 logger.info("No keywords available for blog generation")
                 break
@@ -47,10 +46,8 @@ async def job_generate_blogs():
                 "created_at": datetime.now().isoformat()
             }
             
-            supabase.table("blogs").insert(db_data).execute()
-            supabase.table("blog_keywords").update({"is_used": True, "used_at": datetime.now().isoformat()}).eq("id", keyword_data['id']).execute()
-            
-            await asyncio.sleep(5) # Delay
+            await db.table("blogs").insert(db_data).execute()
+            await db.table("blog_keywords").update({"is_used": True, "used_at": datetime.now().isoformat()}).eq("id", keyword_data['id']).execute()
             
         logger.info("Blog Generation Job Completed")
     except Exception as e:
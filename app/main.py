@@ -1,26 +1,36 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.config import settings
 from app.routers import (
     panchang, blogs, temples, muhurat, aarti, jobs,
     home, bhajan, puja, search, notifications, config, auth,
-    gyan, geeta
+    gyan, geeta, sync
 )
 from app.services.scheduler_service import start_scheduler, stop_scheduler, scheduler
-from app.utils.response import error_response
+from app.utils.response import FastJSONResponse, error_response, success_response
+from app.utils.compression import CompressionMiddleware
+from app.utils.conditional import ConditionalGetMiddleware
+from app.utils.auth import verify_api_key
+from app.utils.metrics import collect_metrics
+from app.utils.db import close_db_client
+from app.services.gemini_client import close_http_client as close_gemini_client
+from app.services.search_index import search_index
+from app.services.autocomplete import autocomplete
+from app.services.geeta_corpus import geeta_corpus
 from app.jobs_definitions import (
     job_generate_blogs, 
     job_enrich_temples,
     job_generate_aarti_lyrics,
     job_fetch_aarti_audio
 )
+import asyncio
 import logging
 
 # Configure root logger
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI(title="TempleApp AI Backend", version="1.0.0")
+app = FastAPI(title="TempleApp AI Backend", version="1.0.0", default_response_class=FastJSONResponse)
 
 # CORS
 app.add_middleware(
@@ -29,21 +39,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Response headers browser clients read beyond the CORS-safelisted ones
+    expose_headers=["X-Next-Cursor", "X-Degraded-Sections", "X-Cache", "Server-Timing", "ETag"],
 )
+# 304 Not Modified for If-None-Match / If-Modified-Since (inside compression, so 304s skip it)
+app.add_middleware(ConditionalGetMiddleware)
+# gzip/brotli by Accept-Encoding, above COMPRESSION_MIN_BYTES
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
 
 # Global Exception Handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     return error_response(str(exc), 500)
 
+async def _warm_search():
+    await search_index.warm()
+    await autocomplete.get()
+
 @app.on_event("startup")
 async def startup_event():
     start_scheduler()
-    pass
+    asyncio.create_task(_warm_search())
+    asyncio.create_task(geeta_corpus.warm())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     stop_scheduler()
+    await close_db_client()
+    await close_gemini_client()
+    search_index.save_snapshot()
 
 # Include Routers
 # V1 Routers
@@ -61,6 +85,7 @@ app.include_router(config.router)
 app.include_router(auth.router)
 app.include_router(gyan.router)
 app.include_router(geeta.router)
+app.include_router(sync.router)
 
 # Legacy/Admin Routers (keeping them if needed, or migration needed if paths conflict)
 # Note: routers like 'jobs' and 'blogs' are admin/backend specific, keeping them.
@@ -79,3 +104,6 @@ def health_check():
         }
     }
 
+@app.get("/metrics")
+async def metrics(api_key: str = Depends(verify_api_key)):
+    return success_response(collect_metrics())
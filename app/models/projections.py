@@ -0,0 +1,76 @@
+from typing import Iterable, Optional, Tuple
+
+class InvalidFields(ValueError):
+    pass
+
+class Projection:
+    """
+    The columns read for one entity. `list_columns` is the lean list view (what a card or
+    a map marker shows), `detail_columns` the single-item view. `allowed` is what a client
+    may ask for with `fields=`; `required` columns are always read because the route
+    itself needs them (ids to key rows by, the sort key for cursors).
+    """
+
+    def __init__(
+        self,
+        list_columns: Tuple[str, ...],
+        allowed: Iterable[str],
+        detail_columns: Optional[Tuple[str, ...]] = None,
+        required: Tuple[str, ...] = ("id",),
+    ):
+        self.list_columns = list_columns
+        self.detail_columns = detail_columns
+        self.allowed = frozenset(allowed)
+        self.required = required
+
+    def select(self, fields: Optional[str] = None) -> str:
+        """The select list for a list view: `fields` (comma-separated) if given, else the list columns."""
+        if fields:
+            wanted = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = [f for f in wanted if f not in self.allowed]
+            if unknown:
+                raise InvalidFields(f"Unknown field(s): {', '.join(unknown)}")
+        else:
+            wanted = list(self.list_columns)
+        columns = list(self.required) + [c for c in wanted if c not in self.required]
+        return ", ".join(dict.fromkeys(columns))
+
+    def detail(self) -> str:
+        return ", ".join(self.detail_columns) if self.detail_columns else "*"
+
+TEMPLE = Projection(
+    list_columns=("id", "name", "deity", "city", "state", "latitude", "longitude", "image_urls"),
+    allowed=(
+        "id", "slug", "name", "deity", "type", "address", "city", "state", "latitude", "longitude",
+        "contact", "description", "image_urls", "timings", "darshan_times", "puja_times",
+        "darshan_timings", "puja_timings", "history", "significance", "major_festivals",
+        "how_to_reach", "nearby_attractions", "interesting_facts", "dress_code",
+        "photography_allowed", "entry_fee", "best_time_to_visit", "status", "created_at",
+    ),
+    required=("id", "created_at"),
+)
+
+AARTI = Projection(
+    list_columns=("id", "title", "deity", "audio_url", "duration_seconds"),
+    allowed=(
+        "id", "title", "deity", "aarti_type", "language", "audio_url", "duration_seconds",
+        "lyrics_hindi", "lyrics_english_transliteration", "lyrics_english_meaning",
+        "significance", "best_time", "estimated_duration_minutes", "status", "created_at",
+    ),
+    required=("id", "created_at"),
+)
+
+# The admin table also shows where each aarti is in the generation pipeline
+AARTI_ADMIN = Projection(
+    list_columns=("id", "title", "deity", "aarti_type", "status", "audio_url", "duration_seconds", "created_at"),
+    allowed=AARTI.allowed | {"audio_source_url", "storage_provider"},
+)
+
+BLOG = Projection(
+    list_columns=("id", "title", "slug", "meta_description", "category", "tags", "status", "published_at"),
+    allowed=(
+        "id", "title", "slug", "meta_description", "content_html", "faqs", "tags", "category",
+        "status", "ai_generated", "published_at", "created_at",
+    ),
+    required=("id", "created_at"),
+)
@@ -16,8 +16,9 @@ class ErrorResponse(BaseModel):
 class PaginationResponse(BaseModel):
     page: int
     page_size: int
-    total: int
+    total: Optional[int] = None # Estimated; omitted with include_total=false
     items: List[Any]
+    next_cursor: Optional[str] = None # Pass back as `cursor` for the next page; null on the last page
 
 # --- Enums ---
 class Deity(str, Enum):
@@ -65,6 +66,7 @@ class TempleEnrichRequest(BaseModel):
 
 class TempleBulkEnrichRequest(BaseModel):
     limit: int = 10
+    batch_size: int = 5 # Temples per Gemini request
 
 class TempleBulkStatusRequest(BaseModel):
     ids: List[str]
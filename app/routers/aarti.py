@@ -1,66 +1,77 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
+from app.models.projections import AARTI, AARTI_ADMIN, InvalidFields
 from app.models.schemas import SuccessResponse, Aarti, PaginationResponse
 from app.services.gemini_client import GeminiClient
-from app.utils.supabase_client import supabase
+from app.services.search_index import search_index, refresh_document
+from app.utils.db import db
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
+from app.utils.cache import cached, invalidate
+from app.utils.pagination import InvalidCursor, estimated_count, fetch_page
 
 router = APIRouter(prefix="/v1/aartis", tags=["Aarti V1"])
 gemini = GeminiClient()
 
+LYRICS_COLUMNS = ("lyrics_hindi", "lyrics_english_transliteration", "lyrics_english_meaning")
+
+def _list_item(row: dict) -> dict:
+    """A list row in the v1 schema; `lyrics` is only present when lyrics columns were selected."""
+    item = {("duration_sec" if k == "duration_seconds" else k): v for k, v in row.items() if k not in LYRICS_COLUMNS}
+    if any(c in row for c in LYRICS_COLUMNS):
+        item["lyrics"] = {
+            "hi": row.get("lyrics_hindi"),
+            "en": row.get("lyrics_english_transliteration") or row.get("lyrics_english_meaning")
+        }
+    return item
+
 @router.get("", response_model=SuccessResponse)
 async def list_aartis(
     q: Optional[str] = None,
     deity: Optional[str] = None,
     lang: Optional[str] = None,
+    cursor: Optional[str] = None, # next_cursor of the previous page; takes precedence over page
     page: int = 1,
     page_size: int = 20,
+    include_total: bool = True, # Estimated, cached per filter combination
+    fields: Optional[str] = None, # Comma-separated columns to return instead of the list view (e.g. add lyrics_hindi)
     api_key: str = Depends(verify_api_key)
 ):
     try:
-        query = supabase.table("aartis").select("*", count="exact")
-        
-        if q:
-            query = query.ilike("title", f"%{q}%")
-        if deity:
-            query = query.eq("deity", deity)
-        # lang filter might be complex if it's checking lyrics existence, skip for simple MVP or check if col is not null
-            
-        start = (page - 1) * page_size
-        end = start + page_size - 1
-        
-        res = query.range(start, end).execute()
-        
-        # Transform to v1 schema
-        items = []
-        for item in res.data:
-            lyrics = {
-                "hi": item.get("lyrics_hindi"),
-                "en": item.get("lyrics_english_transliteration") or item.get("lyrics_english_meaning")
-            }
-            items.append({
-                "id": item["id"],
-                "title": item["title"],
-                "deity": item["deity"],
-                "audio_url": item.get("audio_url"),
-                "duration_sec": item.get("duration_seconds"),
-                "lyrics": lyrics
-            })
+        def filtered(query):
+            if q:
+                query = query.ilike("title", f"%{q}%")
+            if deity:
+                query = query.eq("deity", deity)
+            # lang filter might be complex if it's checking lyrics existence, skip for simple MVP or check if col is not null
+            return query
+
+        rows, next_cursor = await fetch_page(
+            filtered(db.table("aartis").select(AARTI.select(fields))), cursor, page_size, offset=(page - 1) * page_size
+        )
+        total = None
+        if include_total:
+            total = await estimated_count(
+                f"aartis:{q}:{deity}", filtered(db.table("aartis").select("id", count="estimated", head=True))
+            )
 
         return success_response({
-            "items": items,
+            "items": [_list_item(row) for row in rows],
             "page": page,
             "page_size": page_size,
-            "total": res.count
+            "next_cursor": next_cursor,
+            "total": total
         })
+    except (InvalidCursor, InvalidFields) as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(str(e), 500)
 
 @router.get("/{id}", response_model=SuccessResponse)
+@cached("aartis", key="{id}", ttl=3600, stale_ttl=86400, http_cache=True)
 async def get_aarti(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        res = supabase.table("aartis").select("*").eq("id", id).execute()
+        res = await db.table("aartis").select(AARTI.detail()).eq("id", id).execute()
         if not res.data:
             return error_response("Not found", 404)
         
@@ -87,7 +98,7 @@ async def get_aarti(id: str, api_key: str = Depends(verify_api_key)):
 async def get_aarti_lyrics(id: str, lang: str = "hi", api_key: str = Depends(verify_api_key)):
     try:
         col = "lyrics_hindi" if lang == "hi" else "lyrics_english_transliteration"
-        res = supabase.table("aartis").select(col).eq("id", id).execute()
+        res = await db.table("aartis").select(col).eq("id", id).execute()
         
         if not res.data:
             return error_response("Not found", 404)
@@ -100,17 +111,20 @@ async def get_aarti_lyrics(id: str, lang: str = "hi", api_key: str = Depends(ver
 async def list_aartis_admin(
     q: Optional[str] = None,
     deity: Optional[str] = None,
+    fields: Optional[str] = None, # Comma-separated columns to return instead of the admin list view
     api_key: str = Depends(verify_api_key)
 ):
     try:
-        query = supabase.table("aartis").select("*", count="exact")
+        query = db.table("aartis").select(AARTI_ADMIN.select(fields), count="exact")
         if q:
             query = query.ilike("title", f"%{q}%")
         if deity:
             query = query.eq("deity", deity)
             
-        res = query.execute()
+        res = await query.execute()
         return success_response({"items": res.data, "total": res.count})
+    except InvalidFields as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(str(e), 500)
 
@@ -120,7 +134,9 @@ async def add_aarti(data: dict, api_key: str = Depends(verify_api_key)):
         # Default status
         if "status" not in data:
             data["status"] = "pending_audio"
-        res = supabase.table("aartis").insert(data).execute()
+        res = await db.table("aartis").insert(data).execute()
+        if res.data:
+            await refresh_document("aarti", res.data[0]["id"])
         return success_response(res.data[0] if res.data else data)
     except Exception as e:
         return error_response(str(e), 500)
@@ -128,7 +144,9 @@ async def add_aarti(data: dict, api_key: str = Depends(verify_api_key)):
 @router.put("/{id}", response_model=SuccessResponse)
 async def update_aarti(id: str, data: dict, api_key: str = Depends(verify_api_key)):
     try:
-        res = supabase.table("aartis").update(data).eq("id", id).execute()
+        res = await db.table("aartis").update(data).eq("id", id).execute()
+        await invalidate("aartis", "{id}", id=id)
+        await refresh_document("aarti", id)
         return success_response(res.data[0] if res.data else data)
     except Exception as e:
         return error_response(str(e), 500)
@@ -136,7 +154,9 @@ async def update_aarti(id: str, data: dict, api_key: str = Depends(verify_api_ke
 @router.delete("/{id}", response_model=SuccessResponse)
 async def delete_aarti(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        supabase.table("aartis").delete().eq("id", id).execute()
+        await db.table("aartis").delete().eq("id", id).execute()
+        await invalidate("aartis", "{id}", id=id)
+        search_index.remove("aarti", id)
         return success_response(None, "Deleted")
     except Exception as e:
         return error_response(str(e), 500)
@@ -144,7 +164,7 @@ async def delete_aarti(id: str, api_key: str = Depends(verify_api_key)):
 @router.post("/{id}/generate-lyrics", response_model=SuccessResponse)
 async def generate_aarti_lyrics_endpoint(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        res = supabase.table("aartis").select("*").eq("id", id).execute()
+        res = await db.table("aartis").select("*").eq("id", id).execute()
         if not res.data:
             return error_response("Aarti not found", 404)
         aarti = res.data[0]
@@ -165,7 +185,8 @@ async def generate_aarti_lyrics_endpoint(id: str, api_key: str = Depends(verify_
             "significance": ai_data.get("significance"),
         }
         
-        supabase.table("aartis").update(update_data).eq("id", id).execute()
+        await db.table("aartis").update(update_data).eq("id", id).execute()
+        await invalidate("aartis", "{id}", id=id)
         return success_response(update_data, "Lyrics generated")
     except Exception as e:
         return error_response(str(e), 500)
@@ -179,7 +200,8 @@ async def fetch_aarti_audio_endpoint(id: str, api_key: str = Depends(verify_api_
             "status": "complete",
             "audio_url": "https://www.soundhelix.com/examples/mp3/SoundHelix-Song-1.mp3" # Placeholder
         }
-        supabase.table("aartis").update(update_data).eq("id", id).execute()
+        await db.table("aartis").update(update_data).eq("id", id).execute()
+        await invalidate("aartis", "{id}", id=id)
         return success_response(update_data, "Audio fetched (simulated)")
     except Exception as e:
         return error_response(str(e), 500)
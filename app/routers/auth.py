@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
 from typing import Optional, Dict, Any
 from app.models.schemas import SuccessResponse, UserProfile
-from app.utils.supabase_client import supabase
+from app.utils.db import db
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
 
@@ -39,7 +39,7 @@ async def get_profile(api_key: str = Depends(verify_api_key)):
         # In real app, extract user_id from token
         user_id = "user_123" # Mock
         
-        res = supabase.table("user_profiles").select("*").eq("id", user_id).execute()
+        res = await db.table("user_profiles").select("*").eq("id", user_id).execute()
         if not res.data:
             # Create default profile?
             return success_response({"id": user_id, "name": "Guest", "city": "Delhi"})
@@ -58,7 +58,7 @@ async def update_profile(
         
         # UPSERT
         data = {**profile, "id": user_id}
-        res = supabase.table("user_profiles").upsert(data).execute()
+        res = await db.table("user_profiles").upsert(data).execute()
         
         return success_response(res.data[0], "Profile updated")
     except Exception as e:
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from app.models.schemas import SuccessResponse, Bhajan, PaginationResponse
-from app.utils.supabase_client import supabase
+from app.utils.db import db
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
+from app.utils.pagination import InvalidCursor, estimated_count, fetch_page
 
 router = APIRouter(prefix="/v1/bhajans", tags=["Bhajan V1"])
 
@@ -13,30 +14,37 @@ async def list_bhajans(
     deity: Optional[str] = None,
     category: Optional[str] = None,
     singer: Optional[str] = None,
+    cursor: Optional[str] = None, # next_cursor of the previous page; takes precedence over page
     page: int = 1,
     page_size: int = 20,
+    include_total: bool = True, # Estimated, cached per filter combination
     api_key: str = Depends(verify_api_key)
 ):
     try:
-        query = supabase.table("bhajans").select("*", count="exact")
-        
-        if q:
-            query = query.ilike("title", f"%{q}%")
-        if deity:
-            query = query.eq("deity", deity)
-        if category:
-            query = query.eq("category", category)
-        if singer:
-            query = query.ilike("singer", f"%{singer}%")
-            
-        start = (page - 1) * page_size
-        end = start + page_size - 1
-        
-        res = query.range(start, end).execute()
-        
+        def filtered(query):
+            if q:
+                query = query.ilike("title", f"%{q}%")
+            if deity:
+                query = query.eq("deity", deity)
+            if category:
+                query = query.eq("category", category)
+            if singer:
+                query = query.ilike("singer", f"%{singer}%")
+            return query
+
+        rows, next_cursor = await fetch_page(
+            filtered(db.table("bhajans").select("*")), cursor, page_size, offset=(page - 1) * page_size
+        )
+        total = None
+        if include_total:
+            total = await estimated_count(
+                f"bhajans:{q}:{deity}:{category}:{singer}",
+                filtered(db.table("bhajans").select("id", count="estimated", head=True))
+            )
+
         # Transform keys if needed
         items = []
-        for item in res.data:
+        for item in rows:
             lyrics = {
                 "hi": item.get("lyrics_hindi"),
                 "en": item.get("lyrics_english")
@@ -57,15 +65,18 @@ async def list_bhajans(
             "items": items,
             "page": page,
             "page_size": page_size,
-            "total": res.count
+            "next_cursor": next_cursor,
+            "total": total
         })
+    except InvalidCursor as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(str(e), 500)
 
 @router.get("/{id}", response_model=SuccessResponse)
 async def get_bhajan(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        res = supabase.table("bhajans").select("*").eq("id", id).execute()
+        res = await db.table("bhajans").select("*").eq("id", id).execute()
         if not res.data:
             return error_response("Not found", 404)
         
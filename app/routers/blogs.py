@@ -2,11 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from datetime import datetime
 import asyncio
+from app.models.projections import BLOG, InvalidFields
 from app.models.schemas import BlogGenerateRequest, BlogBatchRequest, SuccessResponse
 from app.services.gemini_client import GeminiClient
-from app.utils.supabase_client import supabase
+from app.services.search_index import search_index, refresh_document
+from app.utils.db import db
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
+from app.utils.cache import cached, invalidate
+from app.utils.pagination import InvalidCursor, fetch_page
 
 router = APIRouter(prefix="/blog", tags=["Blogs"])
 gemini = GeminiClient()
@@ -17,12 +21,12 @@ async def generate_blog(request: BlogGenerateRequest, api_key: str = Depends(ver
         # 1. Fetch keyword
         keyword_data = None
         if request.keyword_id:
-             res = supabase.table("blog_keywords").select("*").eq("id", request.keyword_id).execute()
+             res = await db.table("blog_keywords").select("*").eq("id", request.keyword_id).execute()
              if res.data:
                  keyword_data = res.data[0]
         else:
             # Fetch highest priority unused
-            res = supabase.table("blog_keywords").select("*").eq("is_used", False).order("priority", desc=True).limit(1).execute()
+            res = await db.table("blog_keywords").select("*").eq("is_used", False).order("priority", desc=True).limit(1).execute()
             if res.data:
                 keyword_data = res.data[0]
         
@@ -73,10 +77,10 @@ async def generate_blog(request: BlogGenerateRequest, api_key: str = Depends(ver
             "created_at": datetime.now().isoformat()
         }
         
-        res = supabase.table("blogs").insert(db_data).execute()
+        res = await db.table("blogs").insert(db_data).execute()
         
         # 4. Mark keyword used
-        supabase.table("blog_keywords").update({"is_used": True, "used_at": datetime.now().isoformat()}).eq("id", keyword_data['id']).execute()
+        await db.table("blog_keywords").update({"is_used": True, "used_at": datetime.now().isoformat()}).eq("id", keyword_data['id']).execute()
         
         return success_response(res.data[0] if res.data else db_data, "Blog generated")
         
@@ -117,25 +121,32 @@ async def generate_blog_batch(request: BlogBatchRequest, api_key: str = Depends(
     return success_response({"generated": generated, "failed": failed}, "Batch completed")
 
 @router.get("/list", response_model=SuccessResponse)
-async def list_blogs(status: Optional[str] = None, category: Optional[str] = None, page: int = 1, limit: int = 25, api_key: str = Depends(verify_api_key)):
+async def list_blogs(status: Optional[str] = None, category: Optional[str] = None, page: int = 1, limit: int = 25, cursor: Optional[str] = None, fields: Optional[str] = None, api_key: str = Depends(verify_api_key)):
+    # Newest first. The body stays a plain list; the next page's cursor is in the X-Next-Cursor header
+    # (exposed to cross-origin clients by the CORS middleware).
+    # Without `fields` (comma-separated columns) rows are the list view: no content_html or faqs
     try:
-        query = supabase.table("blogs").select("*")
+        query = db.table("blogs").select(BLOG.select(fields))
         if status:
             query = query.eq("status", status)
         if category:
             query = query.eq("category", category)
-            
-        start = (page - 1) * limit
-        end = start + limit - 1
-        res = query.range(start, end).execute()
-        return success_response(res.data)
+
+        rows, next_cursor = await fetch_page(query, cursor, limit, offset=(page - 1) * limit)
+        response = success_response(rows)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
+    except (InvalidCursor, InvalidFields) as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(str(e), 500)
 
 @router.get("/{id}", response_model=SuccessResponse)
+@cached("blogs", key="{id}", ttl=3600, stale_ttl=86400)
 async def get_blog(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        res = supabase.table("blogs").select("*").eq("id", id).execute()
+        res = await db.table("blogs").select(BLOG.detail()).eq("id", id).execute()
         if not res.data:
             return error_response("Blog not found", 404)
         return success_response(res.data[0])
@@ -145,7 +156,9 @@ async def get_blog(id: str, api_key: str = Depends(verify_api_key)):
 @router.patch("/{id}/publish", response_model=SuccessResponse)
 async def publish_blog(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        supabase.table("blogs").update({"status": "published", "published_at": datetime.now().isoformat()}).eq("id", id).execute()
+        await db.table("blogs").update({"status": "published", "published_at": datetime.now().isoformat()}).eq("id", id).execute()
+        await invalidate("blogs", "{id}", id=id)
+        await refresh_document("blog", id)
         return success_response(None, "Published")
     except Exception as e:
         return error_response(str(e), 500)
@@ -153,7 +166,9 @@ async def publish_blog(id: str, api_key: str = Depends(verify_api_key)):
 @router.patch("/{id}/unpublish", response_model=SuccessResponse)
 async def unpublish_blog(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        supabase.table("blogs").update({"status": "draft", "published_at": None}).eq("id", id).execute()
+        await db.table("blogs").update({"status": "draft", "published_at": None}).eq("id", id).execute()
+        await invalidate("blogs", "{id}", id=id)
+        search_index.remove("blog", id)
         return success_response(None, "Unpublished")
     except Exception as e:
         return error_response(str(e), 500)
@@ -161,14 +176,16 @@ async def unpublish_blog(id: str, api_key: str = Depends(verify_api_key)):
 @router.delete("/{id}", response_model=SuccessResponse)
 async def delete_blog(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        supabase.table("blogs").delete().eq("id", id).execute()
+        await db.table("blogs").delete().eq("id", id).execute()
+        await invalidate("blogs", "{id}", id=id)
+        search_index.remove("blog", id)
         return success_response(None, "Deleted")
     except Exception as e:
         return error_response(str(e), 500)
 
 @router.get("", response_model=SuccessResponse)
-async def list_blogs_root(status: Optional[str] = None, category: Optional[str] = None, page: int = 1, limit: int = 25, api_key: str = Depends(verify_api_key)):
-    return await list_blogs(status, category, page, limit, api_key)
+async def list_blogs_root(status: Optional[str] = None, category: Optional[str] = None, page: int = 1, limit: int = 25, cursor: Optional[str] = None, fields: Optional[str] = None, api_key: str = Depends(verify_api_key)):
+    return await list_blogs(status, category, page, limit, cursor, fields, api_key)
 
 @router.post("", response_model=SuccessResponse)
 async def add_blog_manual(data: dict, api_key: str = Depends(verify_api_key)):
@@ -177,7 +194,9 @@ async def add_blog_manual(data: dict, api_key: str = Depends(verify_api_key)):
             data["created_at"] = datetime.now().isoformat()
         if "status" not in data:
             data["status"] = "draft"
-        res = supabase.table("blogs").insert(data).execute()
+        res = await db.table("blogs").insert(data).execute()
+        if res.data:
+            await refresh_document("blog", res.data[0]["id"])
         return success_response(res.data[0] if res.data else data)
     except Exception as e:
         return error_response(str(e), 500)
@@ -185,7 +204,9 @@ async def add_blog_manual(data: dict, api_key: str = Depends(verify_api_key)):
 @router.put("/{id}", response_model=SuccessResponse)
 async def update_blog(id: str, data: dict, api_key: str = Depends(verify_api_key)):
     try:
-        res = supabase.table("blogs").update(data).eq("id", id).execute()
+        res = await db.table("blogs").update(data).eq("id", id).execute()
+        await invalidate("blogs", "{id}", id=id)
+        await refresh_document("blog", id)
         return success_response(res.data[0] if res.data else data)
     except Exception as e:
         return error_response(str(e), 500)
@@ -1,15 +1,24 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Header, Query
 from typing import List, Optional
 from app.models.schemas import (
     SuccessResponse, GeetaChapterSchema, GeetaShlokaSchema,
     ReadingProgress, SaveProgressRequest
 )
+from app.services.geeta_corpus import geeta_corpus
 from app.utils.supabase_client import supabase
+from app.utils.db import db
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
+from app.utils.conditional import cache_headers, is_not_modified, not_modified_response
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/v1/geeta", tags=["Geeta V1"])
 
+# The chapter list only changes with a new corpus snapshot: let clients and the CDN keep it
+CHAPTERS_MAX_AGE = 3600
+CHAPTERS_STALE_SECONDS = 86400
+
 
 # ---------- Chapters ----------
 
@@ -17,8 +26,13 @@ router = APIRouter(prefix="/v1/geeta", tags=["Geeta V1"])
 async def get_all_chapters(api_key: str = Depends(verify_api_key)):
     """Return all 18 Bhagavad Gita chapters with metadata."""
     try:
-        res = supabase.table("geeta_chapters").select("*").order("chapter_number").execute()
-        return success_response(res.data or [])
+        corpus = await geeta_corpus.get()
+        headers = cache_headers(f'"chapters-{corpus.version}"', corpus.modified_at, CHAPTERS_MAX_AGE, CHAPTERS_STALE_SECONDS)
+        if is_not_modified(headers["ETag"], corpus.modified_at):
+            return not_modified_response(headers)
+        response = success_response(corpus.chapters)
+        response.headers.update(headers)
+        return response
     except Exception as e:
         return error_response(str(e), 500)
 
@@ -27,10 +41,11 @@ async def get_all_chapters(api_key: str = Depends(verify_api_key)):
 async def get_chapter(chapter_number: int, api_key: str = Depends(verify_api_key)):
     """Return a single chapter's metadata."""
     try:
-        res = supabase.table("geeta_chapters").select("*").eq("chapter_number", chapter_number).limit(1).execute()
-        if not res.data:
+        corpus = await geeta_corpus.get()
+        chapter = corpus.chapter(chapter_number)
+        if chapter is None:
             return error_response(f"Chapter {chapter_number} not found", 404)
-        return success_response(res.data[0])
+        return success_response(chapter)
     except Exception as e:
         return error_response(str(e), 500)
 
@@ -40,35 +55,27 @@ async def get_chapter(chapter_number: int, api_key: str = Depends(verify_api_key
 @router.get("/chapters/{chapter_number}/shlokas", response_model=SuccessResponse)
 async def get_chapter_shlokas(
     chapter_number: int,
+    cursor: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     api_key: str = Depends(verify_api_key)
 ):
-    """Return all shlokas for a given chapter (paginated)."""
+    """Return all shlokas for a given chapter (paginated by `cursor`, or by `page` for older clients)."""
     try:
-        offset = (page - 1) * page_size
-
-        # Total count
-        count_res = supabase.table("geeta_shlokas")\
-            .select("id", count="exact", head=True)\
-            .eq("chapter_number", chapter_number)\
-            .execute()
-
-        # Paginated data
-        res = supabase.table("geeta_shlokas")\
-            .select("*")\
-            .eq("chapter_number", chapter_number)\
-            .order("verse_number")\
-            .range(offset, offset + page_size - 1)\
-            .execute()
+        after_verse = decode_cursor(cursor, ("verse_number",))["verse_number"] if cursor else None
+        corpus = await geeta_corpus.get()
+        shlokas, total, has_more = corpus.chapter_shlokas(chapter_number, (page - 1) * page_size, page_size, after_verse)
 
         return success_response({
             "chapter_number": chapter_number,
             "page": page,
             "page_size": page_size,
-            "total": count_res.count or 0,
-            "shlokas": res.data or [],
+            "next_cursor": encode_cursor({"verse_number": shlokas[-1]["verse_number"]}) if has_more else None,
+            "total": total,
+            "shlokas": shlokas,
         })
+    except InvalidCursor as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(str(e), 500)
 
@@ -77,10 +84,11 @@ async def get_chapter_shlokas(
 async def get_shloka(shloka_id: str, api_key: str = Depends(verify_api_key)):
     """Return a specific shloka by ID (e.g. '2.47')."""
     try:
-        res = supabase.table("geeta_shlokas").select("*").eq("id", shloka_id).limit(1).execute()
-        if not res.data:
+        corpus = await geeta_corpus.get()
+        shloka = corpus.shloka(shloka_id)
+        if shloka is None:
             return error_response(f"Shloka '{shloka_id}' not found", 404)
-        return success_response(res.data[0])
+        return success_response(shloka)
     except Exception as e:
         return error_response(str(e), 500)
 
@@ -88,17 +96,26 @@ async def get_shloka(shloka_id: str, api_key: str = Depends(verify_api_key)):
 @router.get("/search", response_model=SuccessResponse)
 async def search_shlokas(
     q: str = Query(..., min_length=2),
+    chapter: Optional[int] = Query(None, ge=1, le=18),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
     api_key: str = Depends(verify_api_key)
 ):
-    """Search shlokas by keyword across translations, Sanskrit text, and tags."""
+    """
+    Ranked search over every shloka field (Sanskrit, transliteration, translations, meanings,
+    word-by-word and tags), in Devanagari or Roman spelling. Each hit carries highlighted
+    snippets of its matching fields; `chapters` counts the matches per chapter.
+    """
     try:
-        # Full-text style search using ilike on multiple columns
-        res = supabase.table("geeta_shlokas")\
-            .select("id, chapter_number, verse_number, sanskrit_text, hindi_translation, english_translation, tags")\
-            .or_(f"hindi_translation.ilike.%{q}%,english_translation.ilike.%{q}%,sanskrit_text.ilike.%{q}%")\
-            .limit(20)\
-            .execute()
-        return success_response(res.data or [])
+        corpus = await geeta_corpus.get()
+        result = corpus.search.search(q, chapter=chapter, offset=(page - 1) * page_size, limit=page_size)
+        return success_response({
+            "items": result["items"],
+            "page": page,
+            "page_size": page_size,
+            "total": result["total"],
+            "chapters": result["chapters"],
+        })
     except Exception as e:
         return error_response(str(e), 500)
 
@@ -116,12 +133,12 @@ async def get_reading_progress(
             return error_response("Authorization header required", 401)
 
         token = authorization.split(" ")[1]
-        user_res = supabase.auth.get_user(token)
+        user_res = await asyncio.to_thread(supabase.auth.get_user, token)
         if not user_res or not user_res.user:
             return error_response("Invalid or expired token", 401)
 
         user_id = user_res.user.id
-        res = supabase.table("user_reading_progress").select("*").eq("user_id", user_id).limit(1).execute()
+        res = await db.table("user_reading_progress").select("*").eq("user_id", user_id).limit(1).execute()
 
         if not res.data:
             return success_response({"user_id": user_id, "last_chapter": 1, "last_verse": 1})
@@ -142,7 +159,7 @@ async def save_reading_progress(
             return error_response("Authorization header required", 401)
 
         token = authorization.split(" ")[1]
-        user_res = supabase.auth.get_user(token)
+        user_res = await asyncio.to_thread(supabase.auth.get_user, token)
         if not user_res or not user_res.user:
             return error_response("Invalid or expired token", 401)
 
@@ -152,7 +169,7 @@ async def save_reading_progress(
             "last_chapter": body.chapter,
             "last_verse": body.verse,
         }
-        supabase.table("user_reading_progress").upsert(payload, on_conflict="user_id").execute()
+        await db.table("user_reading_progress").upsert(payload, on_conflict="user_id").execute()
 
         return success_response({"user_id": user_id, "last_chapter": body.chapter, "last_verse": body.verse})
     except Exception as e:
@@ -1,12 +1,16 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Header
 from typing import List, Optional
 from datetime import datetime, timedelta
 from app.models.schemas import SuccessResponse, DailyGyanEntry, BookmarkRequest, BookmarkResponse
 from app.utils.supabase_client import supabase
+from app.utils.db import db
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
+from app.utils.singleflight import get_singleflight
 
 router = APIRouter(prefix="/v1/gyan", tags=["Gyan V1"])
+today_flight = get_singleflight("gyan_today")
 
 
 def _parse_gyan(row: dict) -> dict:
@@ -38,13 +42,19 @@ async def get_todays_gyan(
 ):
     """Fetch Aaj Ka Gyan — the daily spiritual wisdom card."""
     try:
-        target_date = date or datetime.now().strftime("%Y-%m-%d")
+        target_date = (date or datetime.now().strftime("%Y-%m-%d")).strip()
 
-        res = supabase.table("daily_gyan").select("*").eq("date", target_date).limit(1).execute()
+        res = await today_flight.do(
+            ("date", target_date),
+            lambda: db.table("daily_gyan").select("*").eq("date", target_date).limit(1).execute()
+        )
 
         if not res.data:
             # Fallback: return the most recent gyan available
-            fallback = supabase.table("daily_gyan").select("*").order("date", desc=True).limit(1).execute()
+            fallback = await today_flight.do(
+                ("latest",),
+                lambda: db.table("daily_gyan").select("*").order("date", desc=True).limit(1).execute()
+            )
             if not fallback.data:
                 return error_response("No daily gyan available yet. Please run the generation script.", 404)
             return success_response(_parse_gyan(fallback.data[0]))
@@ -63,7 +73,7 @@ async def get_gyan_history(
     """Fetch Gyan history for the past N days (default 7)."""
     try:
         since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-        res = supabase.table("daily_gyan").select("*").gte("date", since).order("date", desc=True).execute()
+        res = await db.table("daily_gyan").select("*").gte("date", since).order("date", desc=True).execute()
         return success_response([_parse_gyan(r) for r in (res.data or [])])
     except Exception as e:
         return error_response(str(e), 500)
@@ -81,7 +91,7 @@ async def bookmark_shloka(
             return error_response("Authorization header required", 401)
 
         token = authorization.split(" ")[1]
-        user_res = supabase.auth.get_user(token)
+        user_res = await asyncio.to_thread(supabase.auth.get_user, token)
         if not user_res or not user_res.user:
             return error_response("Invalid or expired token", 401)
 
@@ -89,7 +99,7 @@ async def bookmark_shloka(
 
         # Upsert bookmark (ignores duplicate)
         payload = {"user_id": user_id, "shloka_id": body.shloka_id}
-        result = supabase.table("user_shloka_bookmarks").upsert(payload, on_conflict="user_id,shloka_id").execute()
+        result = await db.table("user_shloka_bookmarks").upsert(payload, on_conflict="user_id,shloka_id").execute()
 
         return success_response({
             "shloka_id": body.shloka_id,
@@ -112,12 +122,12 @@ async def remove_bookmark(
             return error_response("Authorization header required", 401)
 
         token = authorization.split(" ")[1]
-        user_res = supabase.auth.get_user(token)
+        user_res = await asyncio.to_thread(supabase.auth.get_user, token)
         if not user_res or not user_res.user:
             return error_response("Invalid or expired token", 401)
 
         user_id = user_res.user.id
-        supabase.table("user_shloka_bookmarks").delete().eq("user_id", user_id).eq("shloka_id", shloka_id).execute()
+        await db.table("user_shloka_bookmarks").delete().eq("user_id", user_id).eq("shloka_id", shloka_id).execute()
 
         return success_response({"shloka_id": shloka_id, "bookmarked": False})
     except Exception as e:
@@ -135,14 +145,14 @@ async def get_bookmarks(
             return error_response("Authorization header required", 401)
 
         token = authorization.split(" ")[1]
-        user_res = supabase.auth.get_user(token)
+        user_res = await asyncio.to_thread(supabase.auth.get_user, token)
         if not user_res or not user_res.user:
             return error_response("Invalid or expired token", 401)
 
         user_id = user_res.user.id
 
         # Join bookmarks with shloka data
-        bookmarks_res = supabase.table("user_shloka_bookmarks")\
+        bookmarks_res = await db.table("user_shloka_bookmarks")\
             .select("shloka_id, created_at, geeta_shlokas(*)")\
             .eq("user_id", user_id)\
             .order("created_at", desc=True)\
@@ -1,12 +1,49 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List, Optional
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
 from datetime import datetime
+import asyncio
+import time
 from app.models.schemas import SuccessResponse, HomeSummary, PanchangData, Festival
-from app.utils.supabase_client import supabase
+from app.config import settings
+from app.utils.db import db
+from app.services.temple_index import temple_index
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
+from app.utils.logger import setup_logger
 
 router = APIRouter(prefix="/v1/home", tags=["Home V1"])
+logger = setup_logger("home")
+
+# Per-section latency budget in seconds. A section that misses it is served from its fallback.
+SECTION_TIMEOUTS = {
+    "panchang": settings.HOME_PANCHANG_TIMEOUT_SECONDS,
+    "festivals": settings.HOME_FESTIVALS_TIMEOUT_SECONDS,
+    "temples": settings.HOME_COUNTS_TIMEOUT_SECONDS,
+    "muhurats": settings.HOME_COUNTS_TIMEOUT_SECONDS,
+}
+
+async def _run_section(name: str, coro: Awaitable[Any], fallback: Any) -> Tuple[Any, float, str]:
+    """Await one home section within its budget. Returns (value, elapsed_ms, status)."""
+    start = time.perf_counter()
+    try:
+        value = await asyncio.wait_for(coro, timeout=SECTION_TIMEOUTS[name])
+        status = "ok"
+    except asyncio.TimeoutError:
+        logger.warning(f"Home section '{name}' exceeded {SECTION_TIMEOUTS[name]}s, using fallback")
+        value, status = fallback, "timeout"
+    except Exception as e:
+        logger.error(f"Home section '{name}' failed: {e}")
+        value, status = fallback, "error"
+    return value, (time.perf_counter() - start) * 1000, status
+
+def _server_timing(timings: Dict[str, Tuple[float, str]]) -> str:
+    parts = []
+    for name, (elapsed_ms, status) in timings.items():
+        entry = f"{name};dur={elapsed_ms:.1f}"
+        if status != "ok":
+            entry += f';desc="{status}"'
+        parts.append(entry)
+    return ", ".join(parts)
 
 @router.get("/summary", response_model=SuccessResponse)
 async def get_home_summary(
@@ -19,10 +56,8 @@ async def get_home_summary(
     try:
         today = date or datetime.now().strftime("%Y-%m-%d")
         city = "Delhi" # Default or reverse geocode if lat/lng provided (omitted for MVP)
-        
-        # 1. Fetch Panchang
-        panchang_res = supabase.table("panchang_daily").select("*").eq("date", today).eq("city", city).execute()
-        panchang = panchang_res.data[0] if panchang_res.data else {
+
+        default_panchang = {
             "date": today,
             "city": city,
             "tithi": "Unknown",
@@ -34,30 +69,61 @@ async def get_home_summary(
             "rahukaal": "Unknown",
             "paksha": "Unknown"
         }
-        
+
+        # 1. Fetch Panchang
+        async def fetch_panchang():
+            res = await db.table("panchang_daily").select("*").eq("date", today).eq("city", city).execute()
+            return res.data[0] if res.data else default_panchang
+
         # 2. Fetch Featured Festivals (upcoming 7 days)
         # TODO: Define "Featured" logic. For now, next few festivals.
-        festivals_res = supabase.table("festivals").select("*")\
-            .gte("start_date", today)\
-            .limit(3)\
-            .order("start_date")\
-            .execute()
-            
+        async def fetch_festivals():
+            res = await db.table("festivals").select("*")\
+                .gte("start_date", today)\
+                .limit(3)\
+                .order("start_date")\
+                .execute()
+            return res.data
+
         # 3. Quick Counts
-        # Nearby temples (mock logic without PostGIS or complex query for MVP)
-        # Just creating a placeholder or simple count
-        temple_count_res = supabase.table("temples").select("*", count="exact", head=True).execute()
-        muhurat_count_res = supabase.table("muhurats").select("*", count="exact", head=True)\
-            .eq("city", city).gte("date", today).execute()
-            
-        return success_response({
+        # Nearby temples from the in-memory spatial index; the total count without a location
+        async def count_temples():
+            if lat is not None and lng is not None:
+                index = await temple_index.get()
+                _, _, total = index.within_radius(lat, lng, settings.HOME_NEARBY_RADIUS_KM, limit=0)
+                return total
+            res = await db.table("temples").select("*", count="exact", head=True).execute()
+            return res.count
+
+        async def count_muhurats():
+            res = await db.table("muhurats").select("*", count="exact", head=True)\
+                .eq("city", city).gte("date", today).execute()
+            return res.count
+
+        # All sections are independent, so fetch them concurrently, each within its own budget
+        names = ["panchang", "festivals", "temples", "muhurats"]
+        results = await asyncio.gather(
+            _run_section("panchang", fetch_panchang(), default_panchang),
+            _run_section("festivals", fetch_festivals(), []),
+            _run_section("temples", count_temples(), None),
+            _run_section("muhurats", count_muhurats(), None),
+        )
+        values = {name: value for name, (value, _, _) in zip(names, results)}
+        timings = {name: (elapsed_ms, status) for name, (_, elapsed_ms, status) in zip(names, results)}
+
+        response = success_response({
             "greeting": "Good Morning" if datetime.now().hour < 12 else "Good Evening", # Simple logic
-            "panchang": panchang,
-            "featured_festivals": festivals_res.data,
+            "panchang": values["panchang"],
+            "featured_festivals": values["festivals"],
             "quick_counts": {
-                "nearby_temples": temple_count_res.count, # This is total, not nearby. Good enough for MVP.
-                "today_muhurat": muhurat_count_res.count
+                "nearby_temples": values["temples"], # Within HOME_NEARBY_RADIUS_KM of lat/lng, else the total
+                "today_muhurat": values["muhurats"]
             }
         })
+        response.headers["Server-Timing"] = _server_timing(timings)
+        degraded = [name for name, (_, status) in timings.items() if status != "ok"]
+        if degraded:
+            response.headers["X-Degraded-Sections"] = ",".join(degraded)
+        return response
     except Exception as e:
         return error_response(str(e), 500)
@@ -26,17 +26,17 @@ async def trigger_job(job_name: str, api_key: str = Depends(verify_api_key)):
         return success_response(None, f"Job {job_name} triggered")
     return error_response("Job not found", 404)
 
-from app.utils.supabase_client import supabase
+from app.utils.db import db
 from typing import Optional
 
 @router.get("/logs", response_model=SuccessResponse)
 async def job_logs(job_name: Optional[str] = None, limit: int = 50, api_key: str = Depends(verify_api_key)):
     try:
-        query = supabase.table("job_logs").select("*").order("started_at", desc=True).limit(limit)
+        query = db.table("job_logs").select("*").order("started_at", desc=True).limit(limit)
         if job_name:
             query = query.eq("job_name", job_name)
         
-        res = query.execute()
+        res = await query.execute()
         return success_response(res.data)
     except Exception as e:
         return error_response(str(e), 500)
@@ -45,7 +45,7 @@ async def job_logs(job_name: Optional[str] = None, limit: int = 50, api_key: str
 async def jobs_summary(api_key: str = Depends(verify_api_key)):
     try:
         # Simple summary of last 24h
-        res = supabase.table("job_logs").select("status", count="exact").execute()
+        res = await db.table("job_logs").select("status", count="exact").execute()
         return success_response({"total_logs": res.count})
     except Exception as e:
         return error_response(str(e), 500)
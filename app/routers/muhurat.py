@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from datetime import datetime
 from app.models.schemas import SuccessResponse, Muhurat
-from app.utils.supabase_client import supabase
+from app.utils.db import db
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
 
@@ -22,7 +22,7 @@ async def list_muhurats(
         if not start:
             start = datetime.now().strftime("%Y-%m-%d")
         
-        query = supabase.table("muhurats").select("*").eq("city", city).gte("date", start)
+        query = db.table("muhurats").select("*").eq("city", city).gte("date", start)
         
         if end:
             query = query.lte("date", end)
@@ -30,7 +30,7 @@ async def list_muhurats(
         if type:
             query = query.eq("type", type)
             
-        res = query.order("date").execute()
+        res = await query.order("date").execute()
         return success_response(res.data)
     except Exception as e:
         return error_response(str(e), 500)
@@ -1,36 +1,69 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from datetime import datetime
+import asyncio
+import pytz
 from app.models.schemas import SuccessResponse, PanchangData, Festival
-from app.utils.supabase_client import supabase
+from app.services.panchang_engine import CITIES_DB, calculate_panchang_cached, calculate_transitions_cached
+from app.utils.db import db
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
+from app.utils.cache import cached
+from app.utils.singleflight import get_singleflight
 
 router = APIRouter(prefix="/v1/panchang", tags=["Panchang V1"])
+daily_flight = get_singleflight("panchang_daily")
 
 @router.get("/daily", response_model=SuccessResponse)
+@cached("panchang:daily", key="{date}:{city}:{lat}:{lng}:{tz}:{transitions}", ttl=3600, stale_ttl=86400)
 async def get_daily_panchang(
     date: str, # YYYY-MM-DD
     city: str = "Delhi",
-    lat: Optional[float] = None,
-    lng: Optional[float] = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
     tz: Optional[str] = "Asia/Kolkata",
+    transitions: bool = False,
     api_key: str = Depends(verify_api_key)
 ):
     try:
-        # TODO: Use lat/lng/tz for on-the-fly calculation if needed.
-        # For now, fetching pre-calculated from DB for the city.
-        
-        res = supabase.table("panchang_daily").select("*").eq("date", date).eq("city", city).execute()
-        if not res.data:
-            # Fallback or error? For MVP return 404
-            return error_response("Panchang not found for this date/city", 404)
-            
-        return success_response(res.data[0])
+        # Pre-calculated rows from the DB win; anything else is computed live below.
+        date, city = date.strip(), city.strip()
+        # Everyone asks for today's panchang at midnight: share one in-flight query per (date, city)
+        res = await daily_flight.do(
+            (date, city),
+            lambda: db.table("panchang_daily").select("*").eq("date", date).eq("city", city).execute()
+        )
+        stored = res.data[0] if res.data else None
+        if stored and not transitions:
+            return success_response(stored)
+
+        # Not pre-generated (or transitions wanted): compute live from explicit coordinates or a known city
+        if lat is None or lng is None:
+            if city not in CITIES_DB:
+                if stored:
+                    return error_response("Pass lat/lng to compute transitions for this city.", 400)
+                return error_response("Panchang not found for this date/city. Pass lat/lng to compute it.", 404)
+            lat, lng = float(CITIES_DB[city]["lat"]), float(CITIES_DB[city]["lon"])
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+            pytz.timezone(tz or "Asia/Kolkata")
+        except (ValueError, pytz.UnknownTimeZoneError) as e:
+            return error_response(f"Invalid date or timezone: {e}", 400)
+
+        if stored:
+            data = dict(stored)
+        else:
+            data = await asyncio.to_thread(calculate_panchang_cached, date, lat, lng, tz or "Asia/Kolkata")
+            data.update({"city": city, "latitude": lat, "longitude": lng, "tz": tz, "source": "computed"})
+        if transitions:
+            # Exact start/end of each tithi, karan, nakshatra and yoga touching this day
+            data["transitions"] = await asyncio.to_thread(calculate_transitions_cached, date, lat, lng, tz or "Asia/Kolkata")
+        return success_response(data)
     except Exception as e:
         return error_response(str(e), 500)
 
 @router.get("/month", response_model=SuccessResponse)
+@cached("panchang:month", key="{year}-{month}:{city}", ttl=3600, stale_ttl=86400, http_cache=True)
 async def get_month_panchang(
     year: int,
     month: int,
@@ -47,7 +80,7 @@ async def get_month_panchang(
         else:
             end_date = f"{year}-{month+1:02d}-01"
             
-        res = supabase.table("panchang_daily").select("*")\
+        res = await db.table("panchang_daily").select("*")\
             .eq("city", city)\
             .gte("date", start_date)\
             .lt("date", end_date)\
@@ -95,6 +128,7 @@ async def generate_panchang_range_endpoint(data: dict, api_key: str = Depends(ve
 festivals_router = APIRouter(prefix="/v1/festivals", tags=["Festivals V1"])
 
 @festivals_router.get("", response_model=SuccessResponse)
+@cached("festivals", key="{start}:{end}:{deity}", ttl=1800, stale_ttl=86400, http_cache=True)
 async def list_festivals(
     start: str,
     end: str,
@@ -103,7 +137,7 @@ async def list_festivals(
     api_key: str = Depends(verify_api_key)
 ):
     try:
-        query = supabase.table("festivals").select("*")\
+        query = db.table("festivals").select("*")\
             .gte("start_date", start)\
             .lte("start_date", end)\
             .order("start_date")
@@ -111,7 +145,7 @@ async def list_festivals(
         if deity:
             query = query.eq("deity", deity)
             
-        res = query.execute()
+        res = await query.execute()
         return success_response(res.data)
     except Exception as e:
         return error_response(str(e), 500)
@@ -119,7 +153,7 @@ async def list_festivals(
 @festivals_router.get("/{id}", response_model=SuccessResponse)
 async def get_festival(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        res = supabase.table("festivals").select("*").eq("id", id).execute()
+        res = await db.table("festivals").select("*").eq("id", id).execute()
         if not res.data:
             return error_response("Not found", 404)
         return success_response(res.data[0])
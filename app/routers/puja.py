@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from app.models.schemas import SuccessResponse, PujaGuide, PujaSamagri
-from app.utils.supabase_client import supabase
+from app.utils.db import db
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
+from app.utils.pagination import InvalidCursor, estimated_count, fetch_page
 
 router = APIRouter(prefix="/v1/puja", tags=["Puja V1"])
 
@@ -11,29 +12,39 @@ router = APIRouter(prefix="/v1/puja", tags=["Puja V1"])
 async def list_puja_guides(
     category: Optional[str] = None, # daily, festival, vrat
     q: Optional[str] = None,
+    cursor: Optional[str] = None, # next_cursor of the previous page; takes precedence over page
     page: int = 1,
     page_size: int = 20,
+    include_total: bool = True, # Estimated, cached per filter combination
     api_key: str = Depends(verify_api_key)
 ):
     try:
-        query = supabase.table("puja_guides").select("id, title, category, deity, image_urls", count="exact")
-        
-        if q:
-            query = query.ilike("title", f"%{q}%")
-        if category:
-            query = query.eq("category", category)
-            
-        start = (page - 1) * page_size
-        end = start + page_size - 1
-        
-        res = query.range(start, end).execute()
-        
+        def filtered(query):
+            if q:
+                query = query.ilike("title", f"%{q}%")
+            if category:
+                query = query.eq("category", category)
+            return query
+
+        items, next_cursor = await fetch_page(
+            filtered(db.table("puja_guides").select("id, title, category, deity, image_urls, created_at")),
+            cursor, page_size, offset=(page - 1) * page_size
+        )
+        total = None
+        if include_total:
+            total = await estimated_count(
+                f"puja_guides:{q}:{category}", filtered(db.table("puja_guides").select("id", count="estimated", head=True))
+            )
+
         return success_response({
-            "items": res.data,
+            "items": items,
             "page": page,
             "page_size": page_size,
-            "total": res.count
+            "next_cursor": next_cursor,
+            "total": total
         })
+    except InvalidCursor as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(str(e), 500)
 
@@ -41,17 +52,17 @@ async def list_puja_guides(
 async def get_puja_guide(id: str, api_key: str = Depends(verify_api_key)):
     try:
         # Fetch guide details
-        guide_res = supabase.table("puja_guides").select("*").eq("id", id).execute()
+        guide_res = await db.table("puja_guides").select("*").eq("id", id).execute()
         if not guide_res.data:
             return error_response("Not found", 404)
         guide = guide_res.data[0]
         
         # Fetch steps
-        steps_res = supabase.table("puja_steps").select("*").eq("guide_id", id).order("step_index").execute()
+        steps_res = await db.table("puja_steps").select("*").eq("guide_id", id).order("step_index").execute()
         guide["steps"] = steps_res.data
         
         # Fetch samagri
-        samagri_res = supabase.table("puja_samagri").select("name, qty, is_optional").eq("guide_id", id).execute()
+        samagri_res = await db.table("puja_samagri").select("name, qty, is_optional").eq("guide_id", id).execute()
         guide["samagri"] = samagri_res.data
         
         return success_response(guide)
@@ -61,7 +72,7 @@ async def get_puja_guide(id: str, api_key: str = Depends(verify_api_key)):
 @router.get("/guides/{id}/samagri", response_model=SuccessResponse)
 async def get_puja_samagri(id: str, api_key: str = Depends(verify_api_key)):
     try:
-         res = supabase.table("puja_samagri").select("*").eq("guide_id", id).execute()
+         res = await db.table("puja_samagri").select("*").eq("guide_id", id).execute()
          return success_response({"samagri": res.data})
     except Exception as e:
         return error_response(str(e), 500)
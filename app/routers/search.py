@@ -1,13 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from app.models.schemas import SuccessResponse, SearchResult, PaginationResponse
-from app.utils.supabase_client import supabase
+from app.services.autocomplete import autocomplete
+from app.services.search_index import SOURCES, search_index
+from app.services.temple_index import temple_index
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
-import asyncio
+import numpy as np
 
 router = APIRouter(prefix="/v1/search", tags=["Search V1"])
 
+# With lat/lng, a temple's score is multiplied by 1 + 1 / (1 + km / NEARBY_BOOST_KM):
+# up to 2x next door, 1.5x at this distance, fading beyond
+NEARBY_BOOST_KM = 50.0
+
 @router.get("/suggestions", response_model=SuccessResponse)
 async def search_suggestions(
     q: str,
@@ -17,17 +23,10 @@ async def search_suggestions(
     try:
         if not q or len(q) < 2:
             return success_response({"items": []})
-            
-        # Basic implementation: Search names in Temples, Aartis
-        
-        temples = supabase.table("temples").select("name").ilike("name", f"%{q}%").limit(limit).execute()
-        aartis = supabase.table("aartis").select("title").ilike("title", f"%{q}%").limit(limit).execute()
-        
-        items = [t['name'] for t in temples.data] + [a['title'] for a in aartis.data]
-        # De-duplicate and limit
-        items = list(dict.fromkeys(items))[:limit]
-        
-        return success_response({"items": items})
+
+        # Served from the in-memory prefix table; titles are already de-duplicated
+        completions = await autocomplete.complete(q, limit)
+        return success_response({"items": [c["text"] for c in completions], "results": completions})
     except Exception as e:
         return error_response(str(e), 500)
 
@@ -36,52 +35,55 @@ async def search_all(
     q: str,
     page: int = 1,
     page_size: int = 20,
+    types: Optional[str] = None, # Comma-separated: temple, aarti, bhajan, puja, blog
+    deity: Optional[str] = None,
+    lat: Optional[float] = None, # With lng, nearby temples rank higher and carry distance_km
+    lng: Optional[float] = None,
     api_key: str = Depends(verify_api_key)
 ):
     try:
-        # Search across multiple tables
-        # MVP: Simple ILIKE queries on key tables
-        
-        limit_per_type = 10 
-        
-        f_temples = supabase.table("temples").select("id, name, city").ilike("name", f"%{q}%").limit(limit_per_type).execute()
-        f_aartis = supabase.table("aartis").select("id, title").ilike("title", f"%{q}%").limit(limit_per_type).execute()
-        f_bhajans = supabase.table("bhajans").select("id, title").ilike("title", f"%{q}%").limit(limit_per_type).execute()
-        
-        results = []
-        for t in f_temples.data:
-            results.append({
-                "type": "temple",
-                "id": t["id"],
-                "title": t["name"],
-                "subtitle": t["city"]
-            })
-            
-        for a in f_aartis.data:
-            results.append({
-                "type": "aarti",
-                "id": a["id"],
-                "title": a["title"]
-            })
-            
-        for b in f_bhajans.data:
-            results.append({
-                "type": "bhajan",
-                "id": b["id"],
-                "title": b["title"]
-            })
-            
-        # Pagination (in-memory for MVP)
-        total = len(results)
-        start = (page - 1) * page_size
-        end = start + page_size
-        paginated_results = results[start:end]
-        
+        wanted_types = [t.strip() for t in types.split(",") if t.strip()] if types else None
+        unknown = [t for t in wanted_types or [] if t not in SOURCES]
+        if unknown:
+            return error_response(f"Unknown type(s): {', '.join(unknown)}", 400)
+        index = await search_index.get()
+
+        located = lat is not None and lng is not None
+        temples = await temple_index.get() if located else None
+
+        def nearby_boost(payloads, scores):
+            positions = [i for i, p in enumerate(payloads) if p["type"] == "temple"]
+            if positions:
+                km = temples.distances_to(lat, lng, [payloads[i]["id"] for i in positions])
+                scores[positions] *= 1 + np.nan_to_num(1 / (1 + km / NEARBY_BOOST_KM))
+            return scores
+
+        filters = {"type": wanted_types, "deity": [deity] if deity else None}
+        result = index.search(
+            q,
+            offset=(page - 1) * page_size,
+            limit=page_size,
+            filters=filters,
+            facets=("type", "deity"),
+            rerank=nearby_boost if located else None,
+        )
+        if page == 1:
+            autocomplete.record_search(q)
+
+        items = result["items"]
+        if located:
+            page_temples = [item for item in items if item["type"] == "temple"]
+            km = temples.distances_to(lat, lng, [item["id"] for item in page_temples])
+            for item, distance in zip(page_temples, km.tolist()):
+                if not np.isnan(distance):
+                    item["distance_km"] = round(distance, 2)
+
         return success_response({
-            "items": paginated_results,
+            "items": items,
             "page": page,
             "page_size": page_size,
-            "total": total
+            "total": result["total"],
+            "facets": result["facets"]
         })
     except Exception as e:
         return error_response(str(e), 500)
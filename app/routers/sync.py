@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from app.config import settings
+from app.models.schemas import SuccessResponse
+from app.services.change_log import SOURCES, sync
+from app.utils.response import success_response, error_response
+from app.utils.auth import verify_api_key
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+router = APIRouter(prefix="/v1/sync", tags=["Sync V1"])
+
+def _watermarks(since: Optional[str]):
+    if not since:
+        return {}
+    watermarks = decode_cursor(since, ("watermarks",))["watermarks"]
+    valid = isinstance(watermarks, dict) and all(
+        entity in SOURCES and isinstance(state, dict)
+        and (isinstance(state.get("log"), int) or ("after" in state and state.get("log") is None))
+        for entity, state in watermarks.items()
+    )
+    if not valid:
+        raise InvalidCursor("Invalid cursor")
+    return watermarks
+
+@router.get("", response_model=SuccessResponse)
+async def sync_changes(
+    since: Optional[str] = None, # `since` of the previous response; omit for a first (full) sync
+    entities: Optional[str] = None, # Comma-separated, default all: temples, aartis, bhajans, festivals, puja_guides, blogs
+    limit: int = Query(settings.SYNC_BATCH_SIZE, ge=1, le=settings.SYNC_MAX_BATCH_SIZE), # Rows per entity
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Rows inserted, updated or deleted since the client's last sync, per entity.
+    Deleted (or unpublished) rows come back as tombstones. Call again with the returned
+    `since` until `has_more` is false.
+    """
+    try:
+        wanted = [e.strip() for e in entities.split(",") if e.strip()] if entities else list(SOURCES)
+        unknown = [e for e in wanted if e not in SOURCES]
+        if unknown:
+            return error_response(f"Unknown entity: {', '.join(unknown)}", 400)
+
+        changes, watermarks = await sync(_watermarks(since), wanted, limit)
+        return success_response({
+            "entities": changes,
+            "since": encode_cursor({"watermarks": watermarks}),
+            "has_more": any(c["has_more"] for c in changes.values()),
+        })
+    except InvalidCursor as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return error_response(str(e), 500)
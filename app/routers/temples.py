@@ -1,13 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
-import math
-from datetime import datetime
 import asyncio
-from app.models.schemas import TempleAddRequest, TempleEnrichRequest, TempleBulkEnrichRequest, SuccessResponse, Temple, PaginationResponse
+from datetime import datetime
+from app.models.projections import TEMPLE, InvalidFields
+from app.models.schemas import TempleAddRequest, TempleEnrichRequest, TempleBulkEnrichRequest, TempleBulkStatusRequest, SuccessResponse, Temple, PaginationResponse
 from app.services.gemini_client import GeminiClient
-from app.utils.supabase_client import supabase
+from app.services.temple_enrichment import TempleBatchEnricher
+from app.services.temple_index import temple_index, fetch_temples_by_ids
+from app.services.temple_clusters import POINT_COLUMNS, canonical_deity, cluster_tile, tiles_for_bounds
+from app.services.search_index import search_index, refresh_document
+from app.config import settings
+from app.utils.db import db
 from app.utils.response import success_response, error_response
 from app.utils.auth import verify_api_key
+from app.utils.cache import cached, invalidate
+from app.utils.pagination import InvalidCursor, estimated_count, fetch_page
 
 router = APIRouter(prefix="/v1/temples", tags=["Temples V1"])
 gemini = GeminiClient()
@@ -18,52 +25,113 @@ async def list_temples(
     deity: Optional[str] = None,
     city: Optional[str] = None,
     state: Optional[str] = None,
+    cursor: Optional[str] = None, # next_cursor of the previous page; takes precedence over page
     page: int = 1,
     page_size: int = 20,
+    include_total: bool = True, # Estimated, cached per filter combination
+    fields: Optional[str] = None, # Comma-separated columns to return instead of the list view
     api_key: str = Depends(verify_api_key)
 ):
     try:
-        query = supabase.table("temples").select("*", count="exact")
-        
-        if q:
-            query = query.ilike("name", f"%{q}%")
-        if deity:
-            query = query.eq("deity", deity)
-        if city:
-            query = query.eq("city", city)
-        if state:
-            query = query.eq("state", state)
-            
-        start = (page - 1) * page_size
-        end = start + page_size - 1
-        
-        res = query.range(start, end).execute()
-        
+        def filtered(query):
+            if q:
+                query = query.ilike("name", f"%{q}%")
+            if deity:
+                query = query.eq("deity", deity)
+            if city:
+                query = query.eq("city", city)
+            if state:
+                query = query.eq("state", state)
+            return query
+
+        items, next_cursor = await fetch_page(
+            filtered(db.table("temples").select(TEMPLE.select(fields))), cursor, page_size, offset=(page - 1) * page_size
+        )
+        total = None
+        if include_total:
+            total = await estimated_count(
+                f"temples:{q}:{deity}:{city}:{state}",
+                filtered(db.table("temples").select("id", count="estimated", head=True))
+            )
+
         return success_response({
-            "items": res.data,
+            "items": items,
             "page": page,
             "page_size": page_size,
-            "total": res.count
+            "next_cursor": next_cursor,
+            "total": total
         })
+    except (InvalidCursor, InvalidFields) as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(str(e), 500)
 
+# Viewports spanning more tiles than this need a higher zoom
+MAX_VIEWPORT_TILES = 64
+
+@router.get("/tiles/{z}/{x}/{y}", response_model=SuccessResponse)
+@cached("temple_tiles", key="{z}:{x}:{y}:{deity}", ttl=300, stale_ttl=3600)
+async def get_temple_tile(z: int, x: int, y: int, deity: Optional[str] = None, api_key: str = Depends(verify_api_key)):
+    try:
+        if not 0 <= z <= 22 or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            return error_response("Invalid tile", 400)
+        return success_response(await cluster_tile(z, x, y, deity))
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def _clustered_viewport(index, zoom: int, sw_lat: float, sw_lng: float, ne_lat: float, ne_lng: float, deity: Optional[str]):
+    if zoom >= settings.TEMPLE_CLUSTER_POINTS_ZOOM or zoom > settings.TEMPLE_CLUSTER_MAX_ZOOM:
+        # Close enough for individual markers: no tiles needed
+        ids, _ = index.within_bounds(sw_lat, sw_lng, ne_lat, ne_lng, deity)
+        points = await fetch_temples_by_ids(ids.tolist(), POINT_COLUMNS)
+        return success_response({"zoom": zoom, "clusters": [], "items": points, "total": len(points)})
+
+    tiles = tiles_for_bounds(zoom, sw_lat, sw_lng, ne_lat, ne_lng)
+    if len(tiles) > MAX_VIEWPORT_TILES:
+        return error_response(f"Viewport spans {len(tiles)} tiles at zoom {zoom}; use a higher zoom", 400)
+
+    inside = lambda lat, lng: sw_lat <= lat <= ne_lat and sw_lng <= lng <= ne_lng
+    clusters, points, seen = [], [], set()
+    for tile in await asyncio.gather(*(cluster_tile(zoom, x, y, deity) for x, y in tiles)):
+        clusters.extend(c for c in tile["clusters"] if inside(c["lat"], c["lng"]))
+        for p in tile["points"]:
+            if p["id"] not in seen and inside(float(p["latitude"]), float(p["longitude"])):
+                seen.add(p["id"])
+                points.append(p)
+
+    return success_response({
+        "zoom": zoom,
+        "clusters": clusters,
+        "items": points,
+        "total": sum(c["count"] for c in clusters) + len(points),
+    })
+
 @router.get("/within-bounds", response_model=SuccessResponse)
 async def temples_within_bounds(
     sw_lat: float, sw_lng: float, ne_lat: float, ne_lng: float,
     deity: Optional[str] = None,
+    zoom: Optional[int] = Query(None, ge=0, le=22), # Map zoom; clusters instead of every temple below TEMPLE_CLUSTER_POINTS_ZOOM
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=500), # Page through `total`, or pass zoom for clusters, on wide viewports
+    fields: Optional[str] = None, # Comma-separated columns to return instead of the list view
     api_key: str = Depends(verify_api_key)
 ):
     try:
-        query = supabase.table("temples").select("*")
-        query = query.gte("latitude", sw_lat).lte("latitude", ne_lat)\
-                     .gte("longitude", sw_lng).lte("longitude", ne_lng)
-        
+        columns = TEMPLE.select(fields)
+        index = await temple_index.get()
+        # Matched the way map tiles match it (ignoring case), so every zoom shows the same temples
         if deity:
-            query = query.eq("deity", deity)
-            
-        res = query.execute()
-        return success_response({"items": res.data})
+            deity = canonical_deity(index, deity) or deity
+        if zoom is not None:
+            return await _clustered_viewport(index, zoom, sw_lat, sw_lng, ne_lat, ne_lng, deity)
+
+        # Ids come from the in-memory index (nearest the viewport centre first); full rows only for this page
+        page_ids, total = index.within_bounds(sw_lat, sw_lng, ne_lat, ne_lng, deity, (page - 1) * page_size, page_size)
+
+        items = await fetch_temples_by_ids(page_ids.tolist(), columns)
+        return success_response({"items": items, "page": page, "page_size": page_size, "total": total})
+    except InvalidFields as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(str(e), 500)
 
@@ -74,64 +142,39 @@ async def get_nearby_temples(
     radius: float = 10.0, # km
     page: int = 1,
     page_size: int = 10,
+    deity: Optional[str] = None,
+    fields: Optional[str] = None, # Comma-separated columns to return instead of the list view
     api_key: str = Depends(verify_api_key)
 ):
     try:
-        # Bounding box calculation for efficiency
-        # 1 degree of lat ~ 111km
-        lat_delta = radius / 111.0
-        # 1 degree of lng ~ 111km * cos(lat)
-        lng_delta = radius / (111.0 * math.cos(math.radians(lat)))
-        
-        sw_lat, sw_lng = lat - lat_delta, lng - lng_delta
-        ne_lat, ne_lng = lat + lat_delta, lng + lng_delta
-        
-        # Query within bounding box first
-        query = supabase.table("temples").select("*", count="exact")
-        query = query.gte("latitude", sw_lat).lte("latitude", ne_lat)\
-                     .gte("longitude", sw_lng).lte("longitude", ne_lng)
-        
-        res = query.execute()
-        
-        # Calculate real distances and sort
-        temples = []
-        for t in res.data:
-            t_lat = float(t.get('latitude', 0))
-            t_lng = float(t.get('longitude', 0))
-            
-            # Haversine formula
-            R = 6371.0 # Earth radius in km
-            d_lat = math.radians(t_lat - lat)
-            d_lng = math.radians(t_lng - lng)
-            a = math.sin(d_lat / 2)**2 + math.cos(math.radians(lat)) * math.cos(math.radians(t_lat)) * math.sin(d_lng / 2)**2
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-            dist = R * c
-            
-            if dist <= radius:
-                t['distance_km'] = round(dist, 2)
-                temples.append(t)
-        
-        # Sort by distance
-        temples.sort(key=lambda x: x['distance_km'])
-        
-        # Pagination
-        start = (page - 1) * page_size
-        end = start + page_size
-        paginated_items = temples[start:end]
-        
+        columns = TEMPLE.select(fields)
+        # Distances come from the in-memory index; only the requested page is ranked
+        index = await temple_index.get()
+        ids, distances, total = index.within_radius(lat, lng, radius, deity, (page - 1) * page_size, page_size)
+
+        # Full rows only for the ids on this page
+        page_ids = ids.tolist()
+        page_distances = dict(zip(page_ids, distances.tolist()))
+        paginated_items = await fetch_temples_by_ids(page_ids, columns)
+        for t in paginated_items:
+            t['distance_km'] = round(page_distances[str(t['id'])], 2)
+
         return success_response({
             "items": paginated_items,
             "page": page,
             "page_size": page_size,
-            "total": len(temples)
+            "total": total
         })
+    except InvalidFields as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(str(e), 500)
 
 @router.get("/{id}", response_model=SuccessResponse)
+@cached("temples", key="{id}", ttl=3600, stale_ttl=86400)
 async def get_temple(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        res = supabase.table("temples").select("*").eq("id", id).execute()
+        res = await db.table("temples").select(TEMPLE.detail()).eq("id", id).execute()
         if not res.data:
             return error_response("Not found", 404)
         return success_response(res.data[0])
@@ -141,7 +184,7 @@ async def get_temple(id: str, api_key: str = Depends(verify_api_key)):
 @router.get("/{id}/gallery", response_model=SuccessResponse)
 async def get_temple_gallery(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        res = supabase.table("temples").select("image_urls").eq("id", id).execute()
+        res = await db.table("temples").select("image_urls").eq("id", id).execute()
         if not res.data:
              return error_response("Not found", 404)
         return success_response({"images": res.data[0].get("image_urls", [])})
@@ -151,7 +194,7 @@ async def get_temple_gallery(id: str, api_key: str = Depends(verify_api_key)):
 @router.get("/{id}/timings", response_model=SuccessResponse)
 async def get_temple_timings(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        res = supabase.table("temples").select("darshan_times, puja_times").eq("id", id).execute()
+        res = await db.table("temples").select("darshan_times, puja_times").eq("id", id).execute()
         if not res.data:
              return error_response("Not found", 404)
         return success_response(res.data[0])
@@ -165,7 +208,7 @@ async def toggle_favorite(id: str, api_key: str = Depends(verify_api_key)):
         user_id = "user_123" 
         
         # Check if already favorite
-        res = supabase.table("user_profiles").select("favorites").eq("id", user_id).execute()
+        res = await db.table("user_profiles").select("favorites").eq("id", user_id).execute()
         favorites = res.data[0].get("favorites", {}) if res.data and res.data[0].get("favorites") else {}
         temple_favs = favorites.get("temples", [])
         
@@ -177,40 +220,45 @@ async def toggle_favorite(id: str, api_key: str = Depends(verify_api_key)):
             msg = "Added to favorites"
             
         favorites["temples"] = temple_favs
-        supabase.table("user_profiles").update({"favorites": favorites}).eq("id", user_id).execute()
+        await db.table("user_profiles").update({"favorites": favorites}).eq("id", user_id).execute()
         
         return success_response({"is_favorite": id in temple_favs}, msg)
     except Exception as e:
         return error_response(str(e), 500)
 
 # --- Enrichment Endpoints (Internal/Admin) ---
+ENRICH_KEYS = "history, significance, darshan_times (list of {label, start, end}), puja_times (list of {label, start, end}), major_festivals, how_to_reach, nearby_attractions, interesting_facts, dress_code, photography_allowed, entry_fee, best_time_to_visit, image_keywords (list of strings for searching images)"
+
+def _enrichment_update(ai_data: dict) -> dict:
+    # Transform keys to match DB if needed, or store in JSONB column 'details'
+    # For now, let's map known fields
+    return {
+        "description": ai_data.get('history', '') + "\\n\\n" + ai_data.get('significance', ''),
+        "darshan_times": ai_data.get('darshan_times', []),
+        "puja_times": ai_data.get('puja_times', []),
+        "status": "enriched",
+        # "enriched_at": datetime.now().isoformat() # Optional
+    }
+
 @router.post("/enrich/{temple_id}", response_model=SuccessResponse)
 async def enrich_temple(temple_id: str, api_key: str = Depends(verify_api_key)):
     try:
         # Fetch temple
-        res = supabase.table("temples").select("*").eq("id", temple_id).execute()
+        res = await db.table("temples").select("*").eq("id", temple_id).execute()
         if not res.data:
             return error_response("Temple not found", 404)
         temple = res.data[0]
         
         prompt = f"""
         You are an expert Hindu temple historian. Generate info for {temple['name']}, {temple['deity']} temple in {temple['city']}, {temple['state']}.
-        Output JSON: history, significance, darshan_times (list of {{label, start, end}}), puja_times (list of {{label, start, end}}), major_festivals, how_to_reach, nearby_attractions, interesting_facts, dress_code, photography_allowed, entry_fee, best_time_to_visit, image_keywords (list of strings for searching images).
+        Output JSON: {ENRICH_KEYS}.
         """
         
         ai_data = await gemini.generate_json(prompt, model="pro")
+        update_data = _enrichment_update(ai_data)
         
-        # Transform keys to match DB if needed, or store in JSONB column 'details'
-        # For now, let's map known fields
-        update_data = {
-            "description": ai_data.get('history', '') + "\\n\\n" + ai_data.get('significance', ''),
-            "darshan_times": ai_data.get('darshan_times', []),
-            "puja_times": ai_data.get('puja_times', []),
-            "status": "enriched",
-            # "enriched_at": datetime.now().isoformat() # Optional
-        }
-        
-        supabase.table("temples").update(update_data).eq("id", temple_id).execute()
+        await db.table("temples").update(update_data).eq("id", temple_id).execute()
+        await invalidate("temples", "{id}", id=temple_id)
         return success_response(update_data, "Enriched")
     except Exception as e:
         return error_response(str(e), 500)
@@ -219,7 +267,11 @@ async def enrich_temple(temple_id: str, api_key: str = Depends(verify_api_key)):
 async def add_temple(temple: TempleAddRequest, api_key: str = Depends(verify_api_key)):
     try:
         data = temple.dict(exclude_unset=True)
-        res = supabase.table("temples").insert(data).execute()
+        res = await db.table("temples").insert(data).execute()
+        if res.data:
+            temple_index.upsert(res.data[0])
+            await invalidate("temple_tiles")
+            await refresh_document("temple", res.data[0]["id"])
         return success_response(res.data[0] if res.data else data)
     except Exception as e:
         return error_response(str(e), 500)
@@ -228,7 +280,11 @@ async def add_temple(temple: TempleAddRequest, api_key: str = Depends(verify_api
 async def update_temple(id: str, temple: TempleAddRequest, api_key: str = Depends(verify_api_key)):
     try:
         data = temple.dict(exclude_unset=True)
-        res = supabase.table("temples").update(data).eq("id", id).execute()
+        res = await db.table("temples").update(data).eq("id", id).execute()
+        temple_index.upsert({**data, "id": id})
+        await invalidate("temples", "{id}", id=id)
+        await invalidate("temple_tiles")
+        await refresh_document("temple", id)
         return success_response(res.data[0] if res.data else data)
     except Exception as e:
         return error_response(str(e), 500)
@@ -236,7 +292,11 @@ async def update_temple(id: str, temple: TempleAddRequest, api_key: str = Depend
 @router.delete("/{id}", response_model=SuccessResponse)
 async def delete_temple(id: str, api_key: str = Depends(verify_api_key)):
     try:
-        supabase.table("temples").delete().eq("id", id).execute()
+        await db.table("temples").delete().eq("id", id).execute()
+        temple_index.remove(id)
+        await invalidate("temples", "{id}", id=id)
+        await invalidate("temple_tiles")
+        search_index.remove("temple", id)
         return success_response(None, "Deleted")
     except Exception as e:
         return error_response(str(e), 500)
@@ -245,28 +305,29 @@ async def delete_temple(id: str, api_key: str = Depends(verify_api_key)):
 async def bulk_enrich_temples(request: TempleBulkEnrichRequest, api_key: str = Depends(verify_api_key)):
     try:
         # Fetch pending
-        res = supabase.table("temples").select("id").eq("status", "pending").limit(request.limit).execute()
+        res = await db.table("temples").select("id, name, deity, city, state").eq("status", "pending").limit(request.limit).execute()
         if not res.data:
             return success_response({"processed": 0}, "No pending temples found")
-            
-        ids = [t['id'] for t in res.data]
-        processed = 0
-        for tid in ids:
-            try:
-                await enrich_temple(tid, api_key)
-                processed += 1
-                await asyncio.sleep(1) 
-            except Exception as e:
-                print(f"Error enriching {tid}: {e}")
-                
-        return success_response({"processed": processed}, f"Bulk enrichment completed for {processed} temples")
+
+        async def save(temple, ai_data):
+            await db.table("temples").update(_enrichment_update(ai_data)).eq("id", temple['id']).execute()
+            await invalidate("temples", "{id}", id=temple['id'])
+
+        # Several temples per Gemini request, batches in parallel under the client's rate limiter
+        enricher = TempleBatchEnricher(gemini, batch_size=request.batch_size, model="pro", keys_spec=ENRICH_KEYS)
+        stats = await enricher.run(res.data, save)
+        processed = stats["enriched"]
+
+        return success_response({"processed": processed, **stats}, f"Bulk enrichment completed for {processed} temples")
     except Exception as e:
         return error_response(str(e), 500)
 
 @router.patch("/bulk-status", response_model=SuccessResponse)
 async def bulk_status_update(request: TempleBulkStatusRequest, api_key: str = Depends(verify_api_key)):
     try:
-        supabase.table("temples").update({"status": request.status}).in_("id", request.ids).execute()
+        await db.table("temples").update({"status": request.status}).in_("id", request.ids).execute()
+        for tid in request.ids:
+            await invalidate("temples", "{id}", id=tid)
         return success_response({"updated": len(request.ids)}, f"Status updated to {request.status} for {len(request.ids)} temples")
     except Exception as e:
         return error_response(str(e), 500)
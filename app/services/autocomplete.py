@@ -0,0 +1,190 @@
+import asyncio
+import bisect
+import math
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.services.search_engine import analyze, tokenize
+from app.services.search_index import search_index
+from app.utils.logger import setup_logger
+from app.utils.metrics import register_metrics
+from app.utils.transliteration import phonetic_key, prefix_key
+
+logger = setup_logger("autocomplete")
+
+# Base popularity by result type: devotional content people return to outranks one-off pages
+TYPE_WEIGHTS = {"aarti": 3.0, "puja": 2.5, "bhajan": 2.0, "blog": 1.5, "temple": 1.0}
+# A prefix of the whole title beats a prefix of a later word in it
+TITLE_START_BONUS = 1.0
+# Candidates pulled from a prefix range before titles are de-duplicated
+CANDIDATE_FACTOR = 4
+# Distinct search queries remembered for popularity; past this only the most frequent half is kept
+MAX_TRACKED_QUERIES = 10000
+
+def normalize(text: Optional[str]) -> str:
+    """Lookup key of a title or prefix: its phonetic keys, so any script or spelling completes it."""
+    return " ".join(analyze(text))
+
+def word_keys(text: Optional[str]) -> List[Tuple[str, str]]:
+    """(whole-word key, prefix key) of each word; see phonetic_key and prefix_key."""
+    keys = []
+    for token in tokenize(text):
+        key = phonetic_key(token)
+        if key:
+            keys.append((key, prefix_key(token)))
+    return keys
+
+class PrefixIndex:
+    """
+    Immutable completion table: one sorted array of keys, where each title contributes a
+    key for every word it contains ("hanuman chalisa", "chalisa"), each carrying the
+    title's weight.
+
+    Whole-word keys drop letters by what follows them ("ganapati" is "ganpati"), so the
+    word a user is still typing is looked up by its prefix key too ("ganap"). For that,
+    each word whose prefix key differs also gets keys ending in its prefix key after the
+    whole words before it ("hanuman ganapati" for "Hanuman Ganapati Mandir").
+
+    A prefix selects a contiguous key range by binary search, and the heaviest keys in
+    the range are picked with `argpartition`, so a completion costs two bisections and
+    one partial selection however many titles share the prefix.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], weights: List[float]):
+        self.entries = entries
+        rows = []
+        for number, (entry, weight) in enumerate(zip(entries, weights)):
+            words = word_keys(entry["text"])
+            whole = [key for key, _ in words]
+            for i in range(len(words)):
+                keys = {" ".join(whole[i:])}
+                keys.update(
+                    " ".join(whole[i:j] + [prefix])
+                    for j, (key, prefix) in enumerate(words) if j >= i and prefix != key
+                )
+                rows += [(key, weight + (TITLE_START_BONUS if i == 0 else 0.0), number) for key in keys]
+        rows.sort(key=lambda row: row[0])
+        self.keys = [row[0] for row in rows]
+        self.key_weights = np.array([row[1] for row in rows])
+        self.key_entries = np.array([row[2] for row in rows], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def complete(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        words = word_keys(prefix)
+        if not words or limit <= 0:
+            return []
+        # Earlier words are complete; the last may be cut short, or be a whole word ("jai" of "jay")
+        head = [key for key, _ in words[:-1]]
+        ranges = []
+        for last in set(words[-1]):
+            key = " ".join(head + [last])
+            lo = bisect.bisect_left(self.keys, key)
+            ranges.append(np.arange(lo, bisect.bisect_left(self.keys, key + "\uffff", lo)))
+        positions = np.unique(np.concatenate(ranges))
+        weights = self.key_weights[positions]
+        take = limit * CANDIDATE_FACTOR
+        if len(weights) > take:
+            picked = np.argpartition(-weights, take - 1)[:take]
+        else:
+            picked = np.arange(len(weights))
+        picked = picked[np.argsort(-weights[picked], kind="stable")]
+
+        results, seen = [], set()
+        for position in picked.tolist():
+            number = int(self.key_entries[positions[position]])
+            entry = self.entries[number]
+            text_key = entry["text"].lower()
+            if number in seen or text_key in seen:
+                continue
+            seen.update((number, text_key))
+            results.append(entry)
+            if len(results) == limit:
+                break
+        return results
+
+class AutocompleteManager:
+    """
+    Serves completions from the current PrefixIndex, built from the search index's
+    documents (no database reads). When the search index has changed, a new table is built
+    in a worker thread at most every AUTOCOMPLETE_REBUILD_SECONDS and swapped in with a
+    single assignment; requests keep using the old one meanwhile.
+
+    Popularity: each title's weight is its type weight plus log(1 + n), where n counts
+    /v1/search queries equal to the title, folded in at the next rebuild.
+    """
+
+    def __init__(self, rebuild_seconds: int):
+        self.rebuild_seconds = rebuild_seconds
+        self.current: Optional[PrefixIndex] = None
+        self.built_version = None
+        self.built_at = 0.0
+        self.build_ms = 0.0
+        self.searches: Counter = Counter()
+        self._lock = asyncio.Lock()
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    def record_search(self, query: str):
+        key = normalize(query)
+        if key:
+            self.searches[key] += 1
+            if len(self.searches) > MAX_TRACKED_QUERIES:
+                self.searches = Counter(dict(self.searches.most_common(MAX_TRACKED_QUERIES // 2)))
+
+    def _build(self, documents: List[Dict[str, Any]]) -> PrefixIndex:
+        start = time.perf_counter()
+        entries, weights = [], []
+        for doc in documents:
+            if not doc.get("title"):
+                continue
+            entries.append({"text": doc["title"], "type": doc["type"], "id": doc["id"]})
+            weights.append(TYPE_WEIGHTS.get(doc["type"], 1.0) + math.log1p(self.searches.get(normalize(doc["title"]), 0)))
+        table = PrefixIndex(entries, weights)
+        self.build_ms = (time.perf_counter() - start) * 1000
+        return table
+
+    async def _rebuild(self, initial: bool = False):
+        async with self._lock:
+            # Requests that queued behind the first build use its result
+            if initial and self.current is not None:
+                return
+            try:
+                index = await search_index.get()
+                version, documents = index.version, index.documents()
+                self.current = await asyncio.to_thread(self._build, documents)
+                self.built_version, self.built_at = version, time.time()
+                logger.info(f"Autocomplete rebuilt: {len(self.current)} titles, {self.build_ms:.0f}ms")
+            except Exception as e:
+                logger.warning(f"Autocomplete rebuild failed: {e}")
+
+    async def get(self) -> Optional[PrefixIndex]:
+        if self.current is None:
+            await self._rebuild(initial=True)
+        elif (
+            search_index.index is not None
+            and search_index.index.version != self.built_version
+            and time.time() - self.built_at > self.rebuild_seconds
+            and not (self._rebuild_task and not self._rebuild_task.done())
+        ):
+            self._rebuild_task = asyncio.create_task(self._rebuild())
+        return self.current
+
+    async def complete(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        table = await self.get()
+        return table.complete(prefix, limit) if table is not None else []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "titles": len(self.current) if self.current is not None else 0,
+            "keys": len(self.current.keys) if self.current is not None else 0,
+            "age_seconds": round(time.time() - self.built_at, 1) if self.built_at else None,
+            "build_ms": round(self.build_ms, 1),
+            "tracked_queries": len(self.searches),
+        }
+
+autocomplete = AutocompleteManager(settings.AUTOCOMPLETE_REBUILD_SECONDS)
+
+register_metrics("autocomplete", autocomplete.stats)
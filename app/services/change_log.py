@@ -0,0 +1,159 @@
+"""
+Change log behind /v1/sync. Every write to a synced table appends one row per affected
+id to `change_log`; clients keep a watermark per entity (the last log id they applied)
+and fetch only what changed after it.
+
+The log is written by a trigger, in the same transaction as the change itself, so no
+write can commit without its entry: admin routes, jobs and seeding scripts alike.
+
+    create table change_log (
+        id bigint generated always as identity primary key,
+        entity text not null,          -- key of SOURCES, e.g. 'temples'
+        entity_id text not null,
+        op text not null,              -- 'upsert' or 'delete'
+        changed_at timestamptz not null default clock_timestamp()
+    );
+    create index change_log_entity_id on change_log (entity, id);
+
+    create function log_change() returns trigger language plpgsql as $$
+    begin
+        if tg_op = 'DELETE' then
+            insert into change_log (entity, entity_id, op) values (tg_argv[0], old.id::text, 'delete');
+            return old;
+        end if;
+        insert into change_log (entity, entity_id, op) values (tg_argv[0], new.id::text, 'upsert');
+        return new;
+    end $$;
+
+    -- One per SOURCES entry, e.g.
+    create trigger temples_change_log after insert or update or delete on temples
+        for each row execute function log_change('temples');
+    -- ... aartis, bhajans, festivals, puja_guides ('puja_guides'), blogs
+
+The log only says which rows changed; the rows themselves are read from their tables
+when a client syncs, so several writes to one row between syncs cost one row.
+
+Log ids are allocated when a change is written but become visible when its transaction
+commits, so two concurrent writes can commit out of id order. A client that synced in
+between would move its watermark past the one still uncommitted and never see it. Only
+entries older than SYNC_SETTLE_SECONDS are served, which holds each watermark behind any
+write still in flight (transactions here last milliseconds; the lag also absorbs clock
+drift between this server and the database).
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.config import settings
+from app.utils.db import db
+
+TABLE = "change_log"
+DELETE = "delete"
+# Ids per `in` filter when reading changed rows, to keep request URLs short
+FETCH_CHUNK_SIZE = 100
+
+class SyncSource:
+    """
+    One synced entity: its table and columns. Rows for which `include` is false are not
+    visible to clients (draft blogs); a change that hides a row is sent as a tombstone.
+    """
+
+    def __init__(
+        self,
+        entity: str,
+        table: str,
+        columns: str = "*",
+        include: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ):
+        self.entity = entity
+        self.table = table
+        self.columns = columns
+        self.include = include or (lambda row: True)
+
+SOURCES: Dict[str, SyncSource] = {
+    source.entity: source for source in (
+        SyncSource("temples", "temples"),
+        SyncSource("aartis", "aartis"),
+        SyncSource("bhajans", "bhajans"),
+        SyncSource("festivals", "festivals"),
+        SyncSource("puja_guides", "puja_guides"),
+        SyncSource("blogs", "blogs", include=lambda row: row.get("status") == "published"),
+    )
+}
+
+def settled_before() -> str:
+    """Entries written before this instant are served; newer ones wait for the next sync."""
+    return (datetime.now(timezone.utc) - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)).isoformat()
+
+async def head(entity: str) -> int:
+    """Id of the newest settled log entry for `entity` (0 when it has none)."""
+    res = await db.table(TABLE).select("id").eq("entity", entity).lt("changed_at", settled_before())\
+        .order("id", desc=True).limit(1).execute()
+    return res.data[0]["id"] if res.data else 0
+
+async def _snapshot(source: SyncSource, state: Dict[str, Any], limit: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    First sync of an entity: every visible row, `limit` at a time in id order. The log
+    head is taken before the first page, so writes made while paging are replayed after.
+    """
+    if state["log"] is None:
+        state = {"log": await head(source.entity), "after": None}
+    query = db.table(source.table).select(source.columns).order("id").limit(limit + 1)
+    if state["after"] is not None:
+        query = query.gt("id", state["after"])
+    rows = (await query.execute()).data
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    changes = {
+        "snapshot": True,
+        "upserts": [row for row in rows if source.include(row)],
+        "deletes": [],
+        "has_more": has_more,
+    }
+    # Once the table is exhausted, continue from the log head
+    next_state = {"log": state["log"], "after": rows[-1]["id"]} if has_more else {"log": state["log"]}
+    return changes, next_state
+
+async def _changes(source: SyncSource, state: Dict[str, Any], limit: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Rows changed since log id `state["log"]`: the current row for each upsert, a tombstone for each delete."""
+    entries = (
+        await db.table(TABLE).select("id, entity_id, op, changed_at")
+        .eq("entity", source.entity).gt("id", state["log"]).lt("changed_at", settled_before())
+        .order("id").limit(limit + 1).execute()
+    ).data
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    # The last entry per row decides what the client gets
+    latest = {entry["entity_id"]: entry for entry in entries}
+    upsert_ids = [i for i, entry in latest.items() if entry["op"] != DELETE]
+    chunks = [upsert_ids[i:i + FETCH_CHUNK_SIZE] for i in range(0, len(upsert_ids), FETCH_CHUNK_SIZE)]
+    results = await asyncio.gather(*(
+        db.table(source.table).select(source.columns).in_("id", chunk).execute() for chunk in chunks
+    ))
+    rows = [row for res in results for row in res.data]
+    upserts = [row for row in rows if source.include(row)]
+    present = {str(row["id"]) for row in upserts}
+    # Deleted, or no longer visible (an unpublished blog), since the entry was written
+    deletes = [
+        {"id": entity_id, "deleted_at": entry["changed_at"]}
+        for entity_id, entry in latest.items() if entity_id not in present
+    ]
+    changes = {"snapshot": False, "upserts": upserts, "deletes": deletes, "has_more": has_more}
+    return changes, {"log": entries[-1]["id"] if entries else state["log"]}
+
+async def sync(watermarks: Dict[str, Dict[str, Any]], entities: List[str], limit: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Changes for each of `entities` after its watermark, at most `limit` per entity, and
+    the watermarks to send next time. An entity without a watermark starts with a snapshot.
+    """
+
+    async def one(entity: str):
+        state = watermarks.get(entity) or {"log": None, "after": None}
+        if "after" in state:
+            return await _snapshot(SOURCES[entity], state, limit)
+        return await _changes(SOURCES[entity], state, limit)
+
+    results = await asyncio.gather(*(one(entity) for entity in entities))
+    changes = {entity: result[0] for entity, result in zip(entities, results)}
+    next_watermarks = {**watermarks, **{entity: result[1] for entity, result in zip(entities, results)}}
+    return changes, next_watermarks
@@ -0,0 +1,201 @@
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.services.shloka_index import ShlokaIndex
+from app.utils.db import db
+from app.utils.logger import setup_logger
+from app.utils.metrics import register_metrics
+
+logger = setup_logger("geeta_corpus")
+
+LOAD_PAGE_SIZE = 1000
+# Bump when the snapshot file layout changes; files of another format are ignored
+SNAPSHOT_FORMAT = 1
+
+def corpus_version(chapters: List[Dict[str, Any]], shlokas: List[Dict[str, Any]]) -> str:
+    """Content hash of the corpus, so rebuilding unchanged data keeps the same version."""
+    content = json.dumps({"chapters": chapters, "shlokas": shlokas}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+def write_snapshot(path: str, chapters: List[Dict[str, Any]], shlokas: List[Dict[str, Any]]) -> str:
+    """Write the corpus file atomically and return its version."""
+    chapters = sorted(chapters, key=lambda c: c["chapter_number"])
+    shlokas = sorted(shlokas, key=lambda s: (s["chapter_number"], s["verse_number"]))
+    version = corpus_version(chapters, shlokas)
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "chapters": chapters,
+        "shlokas": shlokas,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return version
+
+class GeetaCorpus:
+    """
+    Immutable view of every chapter and shloka: lookups by chapter number and shloka id,
+    each chapter's shlokas in verse order (so a page is a list slice), and the search index.
+    `modified_at` is when this version was built (the snapshot's mtime), for Last-Modified.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        chapters: List[Dict[str, Any]],
+        shlokas: List[Dict[str, Any]],
+        modified_at: Optional[float] = None,
+    ):
+        self.version = version
+        self.modified_at = modified_at if modified_at is not None else time.time()
+        self.chapters = sorted(chapters, key=lambda c: c["chapter_number"])
+        self._chapters = {c["chapter_number"]: c for c in self.chapters}
+        self._shlokas = {str(s["id"]): s for s in shlokas}
+        self._by_chapter: Dict[int, List[Dict[str, Any]]] = {}
+        for shloka in sorted(shlokas, key=lambda s: (s["chapter_number"], s["verse_number"])):
+            self._by_chapter.setdefault(shloka["chapter_number"], []).append(shloka)
+        self._verses = {ch: [s["verse_number"] for s in rows] for ch, rows in self._by_chapter.items()}
+        self.search = ShlokaIndex(shlokas)
+
+    def __len__(self) -> int:
+        return len(self._shlokas)
+
+    def chapter(self, chapter_number: int) -> Optional[Dict[str, Any]]:
+        return self._chapters.get(chapter_number)
+
+    def shloka(self, shloka_id: str) -> Optional[Dict[str, Any]]:
+        return self._shlokas.get(shloka_id)
+
+    def chapter_shlokas(
+        self, chapter_number: int, offset: int, limit: int, after_verse: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """
+        (one page of the chapter's shlokas in verse order, the chapter's shloka count,
+        whether more follow). The page starts after verse `after_verse` when given,
+        otherwise at `offset`.
+        """
+        shlokas = self._by_chapter.get(chapter_number, [])
+        if after_verse is not None:
+            offset = bisect.bisect_right(self._verses.get(chapter_number, []), after_verse)
+        return shlokas[offset:offset + limit], len(shlokas), offset + limit < len(shlokas)
+
+class GeetaCorpusManager:
+    """
+    Serves the Gita from memory. The corpus comes from the snapshot file written by
+    scripts/build_geeta_corpus.py; the file is checked every GEETA_CORPUS_CHECK_SECONDS
+    and, when its version has changed, loaded in the background and swapped in.
+
+    Without a readable snapshot the corpus is read from the database once, so a fresh
+    checkout still works before the CLI has been run.
+    """
+
+    def __init__(self, snapshot_path: Optional[str], check_seconds: int):
+        self.snapshot_path = snapshot_path
+        self.check_seconds = check_seconds
+        self.corpus: Optional[GeetaCorpus] = None
+        self.source = None  # "snapshot" or "database"
+        self.load_ms = 0.0
+        self.checked_at = 0.0
+        self._mtime: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._reload_task: Optional[asyncio.Task] = None
+
+    def _snapshot_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.snapshot_path).st_mtime if self.snapshot_path else None
+        except OSError:
+            return None
+
+    def _load_snapshot(self) -> Optional[GeetaCorpus]:
+        mtime = self._snapshot_mtime()
+        if mtime is None:
+            return None
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable Gita snapshot: {e}")
+            return None
+        if snapshot.get("format") != SNAPSHOT_FORMAT:
+            logger.warning(f"Ignoring Gita snapshot of format {snapshot.get('format')}, expected {SNAPSHOT_FORMAT}")
+            return None
+        self._mtime = mtime
+        if self.corpus is not None and snapshot["version"] == self.corpus.version:
+            return self.corpus
+        return GeetaCorpus(snapshot["version"], snapshot["chapters"], snapshot["shlokas"], mtime)
+
+    async def _fetch_all(self, table: str, order: str) -> List[Dict[str, Any]]:
+        rows, offset = [], 0
+        while True:
+            res = await db.table(table).select("*").order(order).range(offset, offset + LOAD_PAGE_SIZE - 1).execute()
+            rows.extend(res.data)
+            if len(res.data) < LOAD_PAGE_SIZE:
+                return rows
+            offset += LOAD_PAGE_SIZE
+
+    async def _load(self) -> GeetaCorpus:
+        start = time.perf_counter()
+        corpus = await asyncio.to_thread(self._load_snapshot)
+        self.source = "snapshot"
+        if corpus is None:
+            logger.warning("No Gita snapshot, reading the corpus from the database (run scripts/build_geeta_corpus.py)")
+            chapters, shlokas = await asyncio.gather(
+                self._fetch_all("geeta_chapters", "chapter_number"),
+                self._fetch_all("geeta_shlokas", "id"),
+            )
+            corpus = await asyncio.to_thread(GeetaCorpus, corpus_version(chapters, shlokas), chapters, shlokas)
+            self.source = "database"
+        self.load_ms = (time.perf_counter() - start) * 1000
+        self.checked_at = time.time()
+        if corpus is not self.corpus:
+            logger.info(f"Gita corpus {corpus.version} loaded from {self.source}: {len(corpus)} shlokas, {self.load_ms:.0f}ms")
+        return corpus
+
+    async def _reload(self):
+        async with self._lock:
+            try:
+                self.corpus = await self._load()
+            except Exception as e:
+                logger.warning(f"Gita corpus reload failed: {e}")
+
+    async def get(self) -> GeetaCorpus:
+        if self.corpus is None:
+            async with self._lock:
+                if self.corpus is None:
+                    self.corpus = await self._load()
+        elif time.time() - self.checked_at > self.check_seconds and not (self._reload_task and not self._reload_task.done()):
+            self.checked_at = time.time()
+            mtime = self._snapshot_mtime()
+            if mtime is not None and mtime != self._mtime:
+                self._reload_task = asyncio.create_task(self._reload())
+        return self.corpus
+
+    async def warm(self):
+        """Startup hook: load the corpus before the first request needs it."""
+        try:
+            await self.get()
+        except Exception as e:
+            logger.warning(f"Gita corpus warm-up failed, will retry on first request: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.corpus is not None,
+            "version": self.corpus.version if self.corpus is not None else None,
+            "shlokas": len(self.corpus) if self.corpus is not None else 0,
+            "source": self.source,
+            "load_ms": round(self.load_ms, 1),
+            **(self.corpus.search.index.stats() if self.corpus is not None else {}),
+        }
+
+geeta_corpus = GeetaCorpusManager(settings.GEETA_CORPUS_PATH, settings.GEETA_CORPUS_CHECK_SECONDS)
+
+register_metrics("geeta_corpus", geeta_corpus.stats)
@@ -1,26 +1,153 @@
 import json
 import logging
+import random
+import re
 import time
 import asyncio
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
 import httpx
 from app.config import settings
 from app.utils.logger import setup_logger
+from app.utils.metrics import register_metrics
+from app.utils.prompt_cache import prompt_cache, prompt_key
+from app.utils.rate_limiter import TokenBucket
 
 logger = setup_logger("gemini_client")
 
+BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECONDS = 60.0
+CHARS_PER_TOKEN = 4  # Rough prompt-size estimate used to reserve TPM before the real count is known
+
 class GeminiError(Exception):
     pass
 
+class GeminiRetryableError(GeminiError):
+    """429/5xx from the API; `retry_after` is the server's requested delay in seconds, if it gave one."""
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class ModelLimiter:
+    """
+    Per-model admission control shared by every GeminiClient in the process:
+    a semaphore on in-flight requests, RPM and TPM token buckets, and a cooldown
+    that pauses all callers after a 429 instead of letting each one hit it in turn.
+    """
+
+    def __init__(self, concurrency: int, rpm: int, tpm: int):
+        self.concurrency, self.rpm, self.tpm = concurrency, rpm, tpm
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.in_flight = 0
+        self.requests = TokenBucket(rpm, per=60.0, capacity=max(1, rpm // 10))
+        self.tokens = TokenBucket(tpm, per=60.0)
+        self._resume_at = 0.0
+
+    def pause(self, seconds: float):
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    async def acquire(self, estimated_tokens: int):
+        while (wait := self._resume_at - time.monotonic()) > 0:
+            await asyncio.sleep(wait)
+        await self.requests.acquire()
+        await self.tokens.acquire(min(estimated_tokens, self.tokens.capacity))
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """Charge the TPM bucket for the difference between the reservation and the reported usage."""
+        self.tokens.debit(actual_tokens - min(estimated_tokens, self.tokens.capacity))
+
+MODEL_NAMES = {
+    "flash": "gemini-2.0-flash",
+    "pro": "gemini-1.5-pro",
+}
+
+_limiters = {
+    "flash": ModelLimiter(settings.GEMINI_MAX_CONCURRENCY, settings.GEMINI_RPM, settings.GEMINI_TPM),
+    "pro": ModelLimiter(settings.GEMINI_MAX_CONCURRENCY, settings.GEMINI_PRO_RPM, settings.GEMINI_PRO_TPM),
+}
+
+def _empty_stats() -> Dict[str, Any]:
+    return {
+        "requests": 0, "errors": 0, "retries": 0, "rate_limited": 0,
+        "latency_ms_total": 0.0, "latency_ms_max": 0.0,
+        "prompt_tokens": 0, "output_tokens": 0,
+    }
+
+_stats: Dict[str, Dict[str, Any]] = {alias: _empty_stats() for alias in MODEL_NAMES}
+
+def gemini_stats() -> Dict[str, Any]:
+    snapshot = {}
+    for alias, stats in _stats.items():
+        successes = stats["requests"] - stats["errors"]
+        snapshot[alias] = {
+            **stats,
+            "latency_ms_total": round(stats["latency_ms_total"], 1),
+            "latency_ms_max": round(stats["latency_ms_max"], 1),
+            "latency_ms_avg": round(stats["latency_ms_total"] / successes, 1) if successes else None,
+            "in_flight": _limiters[alias].in_flight,
+        }
+    return snapshot
+
+register_metrics("gemini", gemini_stats)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Keep-alive pool shared by all GeminiClient instances, so requests reuse TLS connections."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=BASE_URL,
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(
+                max_connections=settings.GEMINI_MAX_CONCURRENCY * len(MODEL_NAMES),
+                max_keepalive_connections=settings.GEMINI_MAX_CONCURRENCY * len(MODEL_NAMES),
+                keepalive_expiry=60.0,
+            ),
+            timeout=httpx.Timeout(60.0),
+        )
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def configure_model_limits(model_alias: str, concurrency: Optional[int] = None, rpm: Optional[int] = None, tpm: Optional[int] = None):
+    """Override one model's limits for this process, e.g. from a script's --rpm flag."""
+    current = _limiters[model_alias]
+    _limiters[model_alias] = ModelLimiter(concurrency or current.concurrency, rpm or current.rpm, tpm or current.tpm)
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Delay requested by the server: the Retry-After header, else the RetryInfo detail in the body."""
+    header = response.headers.get("retry-after")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    match = re.search(r'"retryDelay":\s*"([\d.]+)s"', response.text)
+    return float(match.group(1)) if match else None
+
 class GeminiClient:
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         self.api_key = settings.GEMINI_API_KEY
+        # Shared prompt cache from GEMINI_CACHE_BACKEND; None when caching is off
+        self.cache = prompt_cache if use_cache else None
         if not self.api_key:
             logger.warning("GEMINI_API_KEY not set. GeminiClient will fail.")
-        
+
         # Models configuration (REST API style)
-        self.flash_model = "gemini-2.0-flash"
-        self.pro_model = "gemini-1.5-pro"
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models"
+        self.flash_model = MODEL_NAMES["flash"]
+        self.pro_model = MODEL_NAMES["pro"]
+        self.base_url = BASE_URL
 
     def _get_model_name(self, model_alias: str) -> str:
         if model_alias == "flash":
@@ -30,20 +157,25 @@ class GeminiClient:
         else:
             return self.pro_model # Default
 
+    def _alias(self, model_alias: str) -> str:
+        return model_alias if model_alias in _limiters else "pro"
+
+    def _generation_config(self, is_json: bool) -> Dict[str, Any]:
+        generation_config = {}
+        if is_json:
+            generation_config["response_mime_type"] = "application/json"
+        return generation_config
+
     async def _call_api(self, prompt: str, model_alias: str, is_json: bool = False) -> str:
         if not self.api_key:
             raise GeminiError("API Key missing")
 
+        alias = self._alias(model_alias)
         model_name = self._get_model_name(model_alias)
-        url = f"{self.base_url}/{model_name}:generateContent?key={self.api_key}"
-        
-        headers = {"Content-Type": "application/json"}
-        
+        limiter, stats = _limiters[alias], _stats[alias]
+
         # Construct payload
-        generation_config = {}
-        if is_json:
-            generation_config["response_mime_type"] = "application/json"
-            
+        generation_config = self._generation_config(is_json)
         payload = {
             "contents": [{
                 "parts": [{"text": prompt}]
@@ -51,31 +183,82 @@ class GeminiClient:
             "generationConfig": generation_config
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=payload, timeout=60.0)
-            
-            if response.status_code != 200:
-                logger.error(f"Gemini API Error {response.status_code}: {response.text}")
-                raise GeminiError(f"API request failed: {response.status_code} - {response.text}")
-                
-            data = response.json()
+        estimated_tokens = len(prompt) // CHARS_PER_TOKEN + 1
+        await limiter.acquire(estimated_tokens)
+        async with limiter.semaphore:
+            stats["requests"] += 1
+            limiter.in_flight += 1
+            start = time.perf_counter()
             try:
-                text = data["candidates"][0]["content"]["parts"][0]["text"]
-                return text
-            except (KeyError, IndexError) as e:
-                logger.error(f"Unexpected API response format: {data}")
-                raise GeminiError(f"Failed to parse API response: {e}")
+                response = await get_http_client().post(
+                    f"/{model_name}:generateContent", params={"key": self.api_key}, json=payload
+                )
+            except httpx.HTTPError as e:
+                stats["errors"] += 1
+                raise GeminiRetryableError(f"API request failed: {e!r}", 0) from e
+            finally:
+                limiter.in_flight -= 1
+            latency_ms = (time.perf_counter() - start) * 1000
+
+        if response.status_code != 200:
+            stats["errors"] += 1
+            logger.error(f"Gemini API Error {response.status_code}: {response.text}")
+            if response.status_code in RETRYABLE_STATUS:
+                retry_after = _retry_after(response)
+                if response.status_code == 429:
+                    stats["rate_limited"] += 1
+                    # Everyone sharing this model waits, not just the caller that got the 429
+                    limiter.pause(retry_after if retry_after is not None else 2.0)
+                raise GeminiRetryableError(
+                    f"API request failed: {response.status_code} - {response.text}",
+                    response.status_code, retry_after,
+                )
+            raise GeminiError(f"API request failed: {response.status_code} - {response.text}")
+
+        data = response.json()
+        usage = data.get("usageMetadata", {})
+        stats["latency_ms_total"] += latency_ms
+        stats["latency_ms_max"] = max(stats["latency_ms_max"], latency_ms)
+        stats["prompt_tokens"] += usage.get("promptTokenCount", 0)
+        stats["output_tokens"] += usage.get("candidatesTokenCount", 0)
+        limiter.settle(estimated_tokens, usage.get("totalTokenCount", estimated_tokens))
+        try:
+            text = data["candidates"][0]["content"]["parts"][0]["text"]
+            return text
+        except (KeyError, IndexError) as e:
+            logger.error(f"Unexpected API response format: {data}")
+            # Usually a blocked or empty candidate; a fresh sample may succeed
+            raise GeminiRetryableError(f"Failed to parse API response: {e}", response.status_code)
 
-    async def generate_json(self, prompt: str, model: str = "flash", max_retries: int = 3) -> dict:
+    def _backoff(self, error: Exception, attempt: int, model_alias: str) -> float:
+        """Seconds to wait before the next attempt: the server's Retry-After when given, else jittered exponential."""
+        _stats[self._alias(model_alias)]["retries"] += 1
+        if isinstance(error, GeminiRetryableError) and error.retry_after is not None:
+            return min(error.retry_after, MAX_BACKOFF_SECONDS)
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, 2.0 ** attempt))
+
+    async def generate_json(self, prompt: str, model: str = "flash", max_retries: int = 3, bypass_cache: bool = False) -> dict:
+        """
+        `bypass_cache` skips the cache lookup for this call; the fresh response is still
+        stored, so it also serves to refresh an entry.
+        """
         full_prompt = prompt + "\n\nSystem Instruction: Respond with valid JSON only."
         start_time = time.time()
         attempt = 0
-        backoff = 2
-        
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = prompt_key(self._get_model_name(model), full_prompt, self._generation_config(True))
+            if not (bypass_cache or settings.GEMINI_CACHE_BYPASS):
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Gemini JSON cache hit: model={model}")
+                    return json.loads(cached)
+
         while attempt < max_retries:
             try:
                 text = await self._call_api(full_prompt, model, is_json=True)
-                
+
                 # Clean up potential markdown blocks if API returns them despite mime_type
                 clean_text = text.strip()
                 if clean_text.startswith("```json"):
@@ -84,31 +267,44 @@ class GeminiClient:
                     clean_text = clean_text[3:]
                 if clean_text.endswith("```"):
                     clean_text = clean_text[:-3]
-                
+
                 result = json.loads(clean_text)
-                
+
                 latency = (time.time() - start_time) * 1000
                 logger.info(f"Gemini JSON success: model={model}, latency={latency:.2f}ms")
+                if cache_key is not None:
+                    # Only parsed responses are stored, so a hit never replays a bad one
+                    await self.cache.set(cache_key, clean_text, latency)
                 return result
-                
+
             except Exception as e:
                 attempt += 1
                 logger.warning(f"Gemini JSON attempt {attempt} failed: {e}")
-                if attempt >= max_retries:
-                    logger.error(f"Gemini JSON failed after {max_retries} attempts")
+                # Other 4xx responses (bad request, auth) will not succeed on retry
+                fatal = isinstance(e, GeminiError) and not isinstance(e, GeminiRetryableError)
+                if fatal or attempt >= max_retries:
+                    logger.error(f"Gemini JSON failed after {attempt} attempts")
                     raise GeminiError(f"Failed to generate JSON: {e}")
-                
-                await asyncio.sleep(backoff ** attempt)
-        
+
+                await asyncio.sleep(self._backoff(e, attempt, model))
+
         raise GeminiError("Max retries exhausted")
 
-    async def generate_text(self, prompt: str, model: str = "pro") -> str:
+    async def generate_text(self, prompt: str, model: str = "pro", max_retries: int = 3) -> str:
         start_time = time.time()
-        try:
-            text = await self._call_api(prompt, model, is_json=False)
-            latency = (time.time() - start_time) * 1000
-            logger.info(f"Gemini Text success: model={model}, latency={latency:.2f}ms")
-            return text
-        except Exception as e:
-            logger.error(f"Gemini Text failed: {e}")
-            raise GeminiError(f"Failed to generate text: {e}")
+        attempt = 0
+        while True:
+            try:
+                text = await self._call_api(prompt, model, is_json=False)
+                latency = (time.time() - start_time) * 1000
+                logger.info(f"Gemini Text success: model={model}, latency={latency:.2f}ms")
+                return text
+            except GeminiRetryableError as e:
+                attempt += 1
+                if attempt >= max_retries:
+                    logger.error(f"Gemini Text failed: {e}")
+                    raise GeminiError(f"Failed to generate text: {e}")
+                await asyncio.sleep(self._backoff(e, attempt, model))
+            except Exception as e:
+                logger.error(f"Gemini Text failed: {e}")
+                raise GeminiError(f"Failed to generate text: {e}")
@@ -1,7 +1,11 @@
 import ephem
 import math
+import numpy as np
 import pytz
 from datetime import datetime, timedelta, date
+from functools import lru_cache
+from app.config import settings
+from app.utils.metrics import register_metrics
 
 # Constants for Vedic Astrology
 SIDEREAL_YEAR = 365.256363004
@@ -81,6 +85,96 @@ CITIES_DB = {
 
 IST = pytz.timezone("Asia/Kolkata")
 
+# Rahu period indices (0-7, sunrise to sunset)
+# Mon: 2nd part (1-2), Tue: 7th (6-7)...
+RAHU_INDICES = {0: 1, 1: 6, 2: 4, 3: 5, 4: 3, 5: 2, 6: 7} # Mon=0
+YAMA_INDICES = {0: 3, 1: 2, 2: 1, 3: 0, 4: 5, 5: 4, 6: 6}
+GULI_INDICES = {0: 5, 1: 4, 2: 3, 3: 2, 4: 1, 5: 0, 6: 6} # Sat Gulika is 1st part usually? Confirming... Sat Gulika is often cited as 6:00-7:30.
+
+# Default score and note per daily muhurat
+MUHURAT_NOTES = {
+    "Abhijit": (4.5, "Excellent for most auspicious activities. Midday power."),
+    "Brahma": (5.0, "Best for meditation, learning, and spiritual practices."),
+    "Godhuli": (4.0, "Auspicious for cattle, weddings, and evening prayers."),
+}
+
+# --- Range engine constants ---
+# ephem dates count days from 1899/12/31 12:00 UTC
+EPHEM_EPOCH_ORDINAL = date(1899, 12, 31).toordinal()
+EPHEM_JD_OFFSET = 2415020.0
+# ephem.Ecliptic(body) converts astrometric J2000 coordinates with the J2000 obliquity
+OBLIQUITY_J2000 = math.radians(23.4392911)
+EARTH_RADIUS_AU = 6378.137 / 149597870.7
+# Refraction of the upper limb at rise/set under ephem's default atmosphere (1010 mbar, 15 C),
+# as a function of semi-diameter: R = REFRACTION_BASE_DEG + REFRACTION_SD_SLOPE * sd
+REFRACTION_BASE_DEG = 0.5544
+REFRACTION_SD_SLOPE = 0.248
+# Grid steps (days) for sampling ephem and the Lagrange interpolation order used between samples;
+# interpolation error stays under an arcminute (a few seconds of rise/set or tithi time)
+SUN_SAMPLE_STEP = 8.0
+MOON_SAMPLE_STEP = 2.0
+INTERPOLATION_POINTS = 8
+LAGRANGE_NODES = np.arange(1 - INTERPOLATION_POINTS // 2, INTERPOLATION_POINTS // 2 + 1)
+LAGRANGE_SCALE = np.array([
+    1.0 / np.prod([j - k for k in LAGRANGE_NODES if k != j]) for j in LAGRANGE_NODES
+])
+# Mean rate of sidereal time (radians per day); removed before interpolating sidereal time
+SIDEREAL_RATE = 2 * math.pi * 1.00273790935
+# Approximate hour-angle rates (deg/day) used to step rise/set estimates
+SUN_HA_RATE = 360.0
+MOON_HA_RATE = 347.8
+HH_MM = [f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)]
+
+# --- Transition constants ---
+# Elements that split a 360 deg angle into equal parts: (part width in degrees, number of parts)
+TRANSITION_ELEMENTS = {
+    "tithi": (12.0, 30),
+    "karan": (6.0, 60),
+    "nakshatra": (360.0 / 27.0, 27),
+    "yoga": (360.0 / 27.0, 27),
+}
+# Bracketing step. The shortest element (a karan, ~10h) is longer, so each step crosses at most one boundary
+TRANSITION_SAMPLE_HOURS = 3.0
+# A tithi or nakshatra can run past 26h; search this far either side of the civil day
+TRANSITION_MAX_SPAN_HOURS = 28.0
+# Slowest rate (deg/day) of any element angle; turns the time tolerance into an angle tolerance
+TRANSITION_MIN_RATE = 10.0
+
+class DayEphemeris:
+    """
+    Sun and Moon longitudes around one day, memoized by ephem date.
+    Bracketing and root-solving for every element share these evaluations
+    (tithi and karan boundaries even coincide).
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.sun = ephem.Sun()
+        self.moon = ephem.Moon()
+        self.evaluations = 0
+        self._angles = {}
+
+    def angles(self, t: float) -> dict:
+        """Angle in degrees (0-360) behind each element at ephem date `t`."""
+        cached = self._angles.get(t)
+        if cached is not None:
+            return cached
+        when = ephem.Date(t)
+        self.sun.compute(when)
+        self.moon.compute(when)
+        self.evaluations += 1
+        sun_lon = math.degrees(ephem.Ecliptic(self.sun).lon)
+        moon_lon = math.degrees(ephem.Ecliptic(self.moon).lon)
+        ayanamsa = self.engine._get_ayanamsa(t + EPHEM_JD_OFFSET)
+        elongation = (moon_lon - sun_lon) % 360.0
+        cached = self._angles[t] = {
+            "tithi": elongation,
+            "karan": elongation,
+            "nakshatra": (moon_lon - ayanamsa) % 360.0,
+            "yoga": (sun_lon + moon_lon - 2 * ayanamsa) % 360.0,
+        }
+        return cached
+
 class PanchangEngine:
     def __init__(self):
         pass
@@ -110,37 +204,47 @@ class PanchangEngine:
         obs.elevation = 0
         return obs
     
-    def _to_ist_display(self, utc_dt):
+    def _to_local_display(self, utc_dt, tz=IST):
         if not utc_dt: return None
-        return pytz.utc.localize(utc_dt).astimezone(IST).strftime("%H:%M")
+        return pytz.utc.localize(utc_dt).astimezone(tz).strftime("%H:%M")
+
+    def _resolve_location(self, city_name, lat=None, lon=None):
+        """
+        Observer coordinates as ephem degree strings (ephem reads floats as radians).
+        Explicit lat/lon win; otherwise fall back to the known city, then Delhi.
+        """
+        if lat is not None and lon is not None:
+            return str(lat), str(lon)
+        city_data = CITIES_DB.get(city_name, CITIES_DB["Delhi"])
+        return city_data["lat"], city_data["lon"]
     
-    def _get_day_properties(self, date_str, lat, lon):
+    def _next_event(self, find, body):
+        """UTC datetime of the next rise/set found by `find`, or None in polar day/night."""
+        try:
+            return find(body).datetime()
+        except (ephem.AlwaysUpError, ephem.NeverUpError):
+            return None
+
+    def _get_day_properties(self, date_str, lat, lon, tz=IST):
         """
         Calculate sunrise, sunset, moonrise, day duration.
         """
         obs = ephem.Observer()
         obs.lat = lat
         obs.lon = lon
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-        obs.date = date_obj # Midnight of that day UTC
+        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+        # Search from local midnight so the events belong to the civil day in `tz`
+        local_midnight = tz.localize(date_obj)
+        obs.date = local_midnight.astimezone(pytz.utc).replace(tzinfo=None)
         
         sun = ephem.Sun()
         moon = ephem.Moon()
         
-        try:
-            sunrise_utc = obs.next_rising(sun).datetime()
-            sunset_utc = obs.next_setting(sun).datetime()
-            moonrise_utc = obs.next_rising(moon).datetime()
-            moonset_utc = obs.next_setting(moon).datetime()
-        except ephem.AlwaysUpError:
-             # Polar regions or weird edge case
-             sunrise_utc = None
-             sunset_utc = None
-             moonrise_utc = None
-        except ephem.AlwaysDownError:
-             sunrise_utc = None
-             sunset_utc = None
-             moonrise_utc = None
+        # Each event on its own: near the poles the moon can stay down while the sun still rises
+        sunrise_utc = self._next_event(obs.next_rising, sun)
+        sunset_utc = self._next_event(obs.next_setting, sun)
+        moonrise_utc = self._next_event(obs.next_rising, moon)
+        moonset_utc = self._next_event(obs.next_setting, moon)
              
         # Calculate day duration
         day_duration_mins = 0
@@ -156,23 +260,88 @@ class PanchangEngine:
             "day_duration_mins": day_duration_mins
         }
 
-    def calculate_panchang(self, date_str: str, city_name: str):
+    def _karan_names(self, karan_num):
+        """English and Hindi Karan names for karan number 1-60 (half-tithis from new moon)."""
+        # 1st Karan is Kinstughna (unique)
+        # Then Bava to Vishti cycle 8 times
+        # Then Shakuni, Chatushpada, Naga, Kimstughna
+        # Simplified Karan name map for now:
+        if karan_num == 1: 
+             karan_name = "Kimstughna"
+             karan_name_hi = "किस्तुघ्न"
+        elif karan_num > 57:
+             if karan_num == 58: 
+                  karan_name = "Shakuni"
+                  karan_name_hi = "शकुनि"
+             elif karan_num == 59: 
+                  karan_name = "Chatushpada"
+                  karan_name_hi = "चतुष्पद"
+             elif karan_num == 60: 
+                  karan_name = "Naga"
+                  karan_name_hi = "नाग"
+             else: 
+                  karan_name = "Kimstughna"
+                  karan_name_hi = "किस्तुघ्न"
+        else:
+             karan_cycle = ["Bava", "Balava", "Kaulava", "Taitila", "Gara", "Vanija", "Vishti"]
+             karan_name = karan_cycle[(karan_num - 2) % 7]
+             karan_name_hi = KARAN_CYCLE_HI[(karan_num - 2) % 7]
+        return karan_name, karan_name_hi
+
+    def _festivals_for_tithi(self, tithi_name, paksha):
+        """Simple festival/vrat lookups based on Tithi/Paksha. Returns (festival, vrat, festivals_list)."""
+        festival_name = None
+        vrat_name = None
+        
+        # Simple Logic for common Tithis
+        if tithi_name == "Ekadashi":
+            vrat_name = "Ekadashi"
+        elif tithi_name == "Purnima":
+            festival_name = "Purnima"
+            vrat_name = "Purnima Vrat"
+        elif tithi_name == "Amavasya":
+            festival_name = "Amavasya"
+            vrat_name = "Amavasya"
+        elif tithi_name == "Chaturthi":
+            if paksha == "Krishna":
+                vrat_name = "Sankashti Chaturthi"
+            else:
+                vrat_name = "Vinayaka Chaturthi"
+        elif tithi_name == "Trayodashi":
+             vrat_name = "Pradosh Vrat"
+        elif tithi_name == "Ashtami":
+             if paksha == "Krishna":
+                 # Kalashtami
+                 pass
+             else:
+                 vrat_name = "Durga Ashtami"
+
+        # Festivals list (JSONB)
+        festivals_list = []
+        if festival_name:
+            festivals_list.append(festival_name)
+        if vrat_name and vrat_name != festival_name:
+             festivals_list.append(vrat_name)
+        return festival_name, vrat_name, festivals_list
+
+    def calculate_panchang(self, date_str: str, city_name: str, lat=None, lon=None, tz_name: str = "Asia/Kolkata"):
         """
         Calculate daily Panchang details.
+        Known cities resolve from CITIES_DB; pass lat/lon (degrees) for any other location.
+        Times are displayed in `tz_name`.
         """
-        city_data = CITIES_DB.get(city_name, CITIES_DB["Delhi"])
-        lat = city_data["lat"]
-        lon = city_data["lon"]
+        tz = pytz.timezone(tz_name)
+        lat, lon = self._resolve_location(city_name, lat, lon)
         
-        props = self._get_day_properties(date_str, lat, lon)
+        props = self._get_day_properties(date_str, lat, lon, tz)
         sunrise_utc = props["sunrise_utc"]
         
         # Calculate Tithi, Nakshatra, Yoga at Sunrise time (Standard Panchang rule)
-        # If Sunrise is None (unlikely for India), fallback to 6 AM IST
+        # If Sunrise is None (polar day/night), fallback to 6 AM local time
         if not sunrise_utc:
              # Fallback
              dt = datetime.strptime(date_str, "%Y-%m-%d")
-             sunrise_utc = dt - timedelta(hours=5, minutes=30) + timedelta(hours=6) # 00:30 UTC
+             sunrise_utc = tz.localize(dt + timedelta(hours=6)).astimezone(pytz.utc).replace(tzinfo=None)
              
         # Create observer at Sunrise
         obs = ephem.Observer()
@@ -223,31 +392,7 @@ class PanchangEngine:
         # Karan = Tithi / 2 (6 deg spans)
         # But Karan calculation is complex as it changes every half-tithi
         karan_idx_calc = int(diff / 6.0)
-        # 1st Karan is Kinstughna (unique)
-        # Then Bava to Vishti cycle 8 times
-        # Then Shakuni, Chatushpada, Naga, Kimstughna
-        # Simplified Karan name map for now:
-        karan_num = karan_idx_calc + 1
-        if karan_num == 1: 
-             karan_name = "Kimstughna"
-             karan_name_hi = "किस्तुघ्न"
-        elif karan_num > 57:
-             if karan_num == 58: 
-                  karan_name = "Shakuni"
-                  karan_name_hi = "शकुनि"
-             elif karan_num == 59: 
-                  karan_name = "Chatushpada"
-                  karan_name_hi = "चतुष्पद"
-             elif karan_num == 60: 
-                  karan_name = "Naga"
-                  karan_name_hi = "नाग"
-             else: 
-                  karan_name = "Kimstughna"
-                  karan_name_hi = "किस्तुघ्न"
-        else:
-             karan_cycle = ["Bava", "Balava", "Kaulava", "Taitila", "Gara", "Vanija", "Vishti"]
-             karan_name = karan_cycle[(karan_num - 2) % 7]
-             karan_name_hi = KARAN_CYCLE_HI[(karan_num - 2) % 7]
+        karan_name, karan_name_hi = self._karan_names(karan_idx_calc + 1)
 
         # Rahu Kaal, Yamaganda, Gulika (Fixed slots based on Weekday)
         # A nicer implementation divides day/night into 8 parts (ashta bhagas)
@@ -265,11 +410,6 @@ class PanchangEngine:
         # 8 parts of the day
         one_eigth = day_len_mins / 8.0 # mins per part
         
-        # Rahu period indices (0-7, sunrise to sunset)
-        # Mon: 2nd part (1-2), Tue: 7th (6-7)...
-        rahu_indices = {0: 1, 1: 6, 2: 4, 3: 5, 4: 3, 5: 2, 6: 7} # Mon=0
-        yama_indices = {0: 3, 1: 2, 2: 1, 3: 0, 4: 5, 5: 4, 6: 6}
-        guli_indices = {0: 5, 1: 4, 2: 3, 3: 2, 4: 1, 5: 0, 6: 6} # Sat Gulika is 1st part usually? Confirming... Sat Gulika is often cited as 6:00-7:30.
         # Standard chart:
         # Day | Rahu | Yama | Gulika
         # Mon | 7:30-9 | 10:30-12 | 1:30-3
@@ -296,53 +436,21 @@ class PanchangEngine:
             s_dt = sunrise_dt_utc + timedelta(minutes=s_min)
             e_dt = sunrise_dt_utc + timedelta(minutes=e_min)
             
-            return f"{self._to_ist_display(s_dt)}-{self._to_ist_display(e_dt)}"
+            return f"{self._to_local_display(s_dt, tz)}-{self._to_local_display(e_dt, tz)}"
 
-        rahukaal = get_time_slot(rahu_indices.get(weekday, 0))
-        yamaganda = get_time_slot(yama_indices.get(weekday, 0))
-        gulika = get_time_slot(guli_indices.get(weekday, 0))
+        rahukaal = get_time_slot(RAHU_INDICES.get(weekday, 0))
+        yamaganda = get_time_slot(YAMA_INDICES.get(weekday, 0))
+        gulika = get_time_slot(GULI_INDICES.get(weekday, 0))
 
-        # Dictionary for simple festival/vrat lookups based on Tithi/Paksha
-        festival_name = None
-        vrat_name = None
-        
-        # Simple Logic for common Tithis
-        if tithi_name == "Ekadashi":
-            vrat_name = "Ekadashi"
-        elif tithi_name == "Purnima":
-            festival_name = "Purnima"
-            vrat_name = "Purnima Vrat"
-        elif tithi_name == "Amavasya":
-            festival_name = "Amavasya"
-            vrat_name = "Amavasya"
-        elif tithi_name == "Chaturthi":
-            if paksha == "Krishna":
-                vrat_name = "Sankashti Chaturthi"
-            else:
-                vrat_name = "Vinayaka Chaturthi"
-        elif tithi_name == "Trayodashi":
-             vrat_name = "Pradosh Vrat"
-        elif tithi_name == "Ashtami":
-             if paksha == "Krishna":
-                 # Kalashtami
-                 pass
-             else:
-                 vrat_name = "Durga Ashtami"
-
-        # Festivals list (JSONB)
-        festivals_list = []
-        if festival_name:
-            festivals_list.append(festival_name)
-        if vrat_name and vrat_name != festival_name:
-             festivals_list.append(vrat_name)
+        festival_name, vrat_name, festivals_list = self._festivals_for_tithi(tithi_name, paksha)
 
         return {
             "date": date_str,
             "city": city_name,
-            "sunrise": self._to_ist_display(props["sunrise_utc"]),
-            "sunset": self._to_ist_display(props["sunset_utc"]),
-            "moonrise": self._to_ist_display(props["moonrise_utc"]),
-            "moonset": self._to_ist_display(props["moonset_utc"]),
+            "sunrise": self._to_local_display(props["sunrise_utc"], tz),
+            "sunset": self._to_local_display(props["sunset_utc"], tz),
+            "moonrise": self._to_local_display(props["moonrise_utc"], tz),
+            "moonset": self._to_local_display(props["moonset_utc"], tz),
             "day_duration": f"{int(props['day_duration_mins'] // 60)}h {int(props['day_duration_mins'] % 60)}m",
             "tithi": tithi_name,
             "tithi_hindi": TITHI_NAMES_HI[tithi_idx % 30],
@@ -366,16 +474,30 @@ class PanchangEngine:
             "spiritual_message": None # Placeholder for now
         }
 
-    def calculate_muhurats(self, date_str, city_name):
+    def _muhurat_entry(self, kind, start_time, end_time, weekday, date_str, city_name):
+        score, reasoning = MUHURAT_NOTES[kind]
+        # Abhijit is usually considered bad on Wednesday (weekday 2); keep it but mark it down
+        if kind == "Abhijit" and weekday == 2:
+            score, reasoning = 2.0, "Abhijit is generally avoided on Wednesdays."
+        return {
+            "type": kind,
+            "start_time": start_time,
+            "end_time": end_time,
+            "score": score,
+            "reasoning": reasoning,
+            "date": date_str,
+            "city": city_name
+        }
+
+    def calculate_muhurats(self, date_str, city_name, lat=None, lon=None, tz_name: str = "Asia/Kolkata"):
         """
         Calculate auspicious daily muhurats.
         Abhijit, Brahma, Godhuli, Amrit Kaal.
         """
-        city_data = CITIES_DB.get(city_name, CITIES_DB["Delhi"])
-        lat = city_data["lat"]
-        lon = city_data["lon"]
+        tz = pytz.timezone(tz_name)
+        lat, lon = self._resolve_location(city_name, lat, lon)
         
-        props = self._get_day_properties(date_str, lat, lon)
+        props = self._get_day_properties(date_str, lat, lon, tz)
         sunrise_utc = props["sunrise_utc"]
         sunset_utc = props["sunset_utc"]
         day_mins = props["day_duration_mins"]
@@ -399,26 +521,10 @@ class PanchangEngine:
         abh_start = sunrise_utc + timedelta(minutes=abhijit_start_mins)
         abh_end = sunrise_utc + timedelta(minutes=abhijit_end_mins)
         
-        # Skip Abhijit on Wednesday (Weekday = 2) for "Auspiciousness"? 
-        # Usually it is considered bad on Wednesday. Let's mark it.
-        dt = datetime.strptime(date_str, "%Y-%m-%d")
-        week_d = dt.weekday()
-        
-        score_abh = 4.5
-        reason_abh = "Excellent for most auspicious activities. Midday power."
-        if week_d == 2: # Wednesday
-             score_abh = 2.0
-             reason_abh = "Abhijit is generally avoided on Wednesdays."
-             
-        muhurats.append({
-            "type": "Abhijit",
-            "start_time": self._to_ist_display(abh_start),
-            "end_time": self._to_ist_display(abh_end),
-            "score": score_abh,
-            "reasoning": reason_abh,
-             "date": date_str,
-             "city": city_name
-        })
+        week_d = datetime.strptime(date_str, "%Y-%m-%d").weekday()
+        muhurats.append(self._muhurat_entry(
+            "Abhijit", self._to_local_display(abh_start, tz), self._to_local_display(abh_end, tz), week_d, date_str, city_name
+        ))
         
         # 2. Brahma Muhurat
         # 2 Muhurats (48x2 = 96 mins) before Sunrise.
@@ -428,15 +534,9 @@ class PanchangEngine:
         brahma_start = sunrise_utc - timedelta(minutes=96)
         brahma_end = sunrise_utc - timedelta(minutes=48)
         
-        muhurats.append({
-            "type": "Brahma",
-            "start_time": self._to_ist_display(brahma_start),
-            "end_time": self._to_ist_display(brahma_end),
-            "score": 5.0,
-            "reasoning": "Best for meditation, learning, and spiritual practices.",
-             "date": date_str,
-             "city": city_name
-        })
+        muhurats.append(self._muhurat_entry(
+            "Brahma", self._to_local_display(brahma_start, tz), self._to_local_display(brahma_end, tz), week_d, date_str, city_name
+        ))
         
         # 3. Godhuli Muhurat
         # 12 mins before and after Sunset. Or 1 Muhurat centered on Sunset.
@@ -444,14 +544,487 @@ class PanchangEngine:
         godhuli_start = sunset_utc - timedelta(minutes=12)
         godhuli_end = sunset_utc + timedelta(minutes=12)
         
-        muhurats.append({
-            "type": "Godhuli",
-            "start_time": self._to_ist_display(godhuli_start),
-            "end_time": self._to_ist_display(godhuli_end),
-            "score": 4.0,
-            "reasoning": "Auspicious for cattle, weddings, and evening prayers.",
-             "date": date_str,
-             "city": city_name
-        })
+        muhurats.append(self._muhurat_entry(
+            "Godhuli", self._to_local_display(godhuli_start, tz), self._to_local_display(godhuli_end, tz), week_d, date_str, city_name
+        ))
         
         return muhurats
+
+
+    # --- Transitions ---
+
+    def _find_boundary(self, ephemeris, element, target, lo, hi, tolerance):
+        """
+        Ephem date in [lo, hi] where `element`'s angle reaches `target` degrees.
+        Illinois false position: the angles are nearly linear in time, so it converges in a few steps.
+        """
+        def offset(t):
+            return (ephemeris.angles(t)[element] - target + 180.0) % 360.0 - 180.0
+
+        f_lo, f_hi = offset(lo), offset(hi)
+        kept = 0
+        for _ in range(50):
+            t = (lo * f_hi - hi * f_lo) / (f_hi - f_lo)
+            f_t = offset(t)
+            if abs(f_t) <= tolerance * TRANSITION_MIN_RATE or hi - lo <= tolerance:
+                return t
+            if (f_t < 0) == (f_lo < 0):
+                lo, f_lo = t, f_t
+                if kept == -1:
+                    f_hi /= 2
+                kept = -1
+            else:
+                hi, f_hi = t, f_t
+                if kept == 1:
+                    f_lo /= 2
+                kept = 1
+        return t
+
+    def _transition_entry(self, element, index, start, end, tz, sunrises):
+        if element == "tithi":
+            name, name_hi = TITHI_NAMES[index], TITHI_NAMES_HI[index]
+        elif element == "karan":
+            name, name_hi = self._karan_names(index + 1)
+        elif element == "nakshatra":
+            name, name_hi = NAKSHATRA_NAMES[index], NAKSHATRA_NAMES_HI[index]
+        else:
+            name, name_hi = YOGA_NAMES[index], YOGA_NAMES_HI[index]
+        entry = {
+            "index": index,
+            "name": name,
+            "name_hindi": name_hi,
+            "start": pytz.utc.localize(ephem.Date(start).datetime()).astimezone(tz).isoformat(timespec="seconds"),
+            "end": pytz.utc.localize(ephem.Date(end).datetime()).astimezone(tz).isoformat(timespec="seconds"),
+        }
+        if element == "tithi":
+            entry["paksha"] = "Shukla" if index < 15 else "Krishna"
+            if sunrises:
+                # The calendar names each day after the tithi at sunrise: one spanning no sunrise is
+                # skipped (kshaya), one spanning two names both days (vriddhi)
+                inside = sum(1 for rise in sunrises if start <= rise < end)
+                entry["kshaya"] = inside == 0
+                entry["vriddhi"] = inside >= 2
+        return entry
+
+    def calculate_transitions(self, date_str: str, city_name=None, lat=None, lon=None,
+                              tz_name: str = "Asia/Kolkata", tolerance_seconds=None) -> dict:
+        """
+        Start and end of every tithi, karan, nakshatra and yoga active during the civil day.
+        Boundaries are bracketed on one shared sample grid and root-solved to `tolerance_seconds`
+        (PANCHANG_TRANSITION_TOLERANCE_SECONDS by default). Times are ISO 8601 in `tz_name`.
+        """
+        tz = pytz.timezone(tz_name)
+        lat, lon = self._resolve_location(city_name, lat, lon)
+        if tolerance_seconds is None:
+            tolerance_seconds = settings.PANCHANG_TRANSITION_TOLERANCE_SECONDS
+        tolerance = tolerance_seconds / 86400.0
+
+        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+        day_start = float(ephem.Date(tz.localize(date_obj).astimezone(pytz.utc).replace(tzinfo=None)))
+        day_end = float(ephem.Date(tz.localize(date_obj + timedelta(days=1)).astimezone(pytz.utc).replace(tzinfo=None)))
+
+        # Sunrises from yesterday to the day after tomorrow cover every span touching today
+        obs = ephem.Observer()
+        obs.lat = lat
+        obs.lon = lon
+        obs.date = day_start
+        sun = ephem.Sun()
+        sunrises = [self._next_event(obs.previous_rising, sun)]
+        for _ in range(3):
+            sunrises.append(self._next_event(obs.next_rising, sun))
+            if sunrises[-1] is None:
+                break
+            obs.date = sunrises[-1]
+        sunrises = [float(ephem.Date(r)) for r in sunrises] if all(sunrises) else []
+
+        margin = TRANSITION_MAX_SPAN_HOURS / 24.0
+        step = TRANSITION_SAMPLE_HOURS / 24.0
+        count = int(math.ceil((day_end - day_start + 2 * margin) / step))
+        samples = [day_start - margin + i * step for i in range(count + 1)]
+        ephemeris = DayEphemeris(self)
+
+        result = {}
+        for element, (width, parts) in TRANSITION_ELEMENTS.items():
+            # (time, index that starts there) for each boundary crossed inside the window
+            boundaries = []
+            prev_t = samples[0]
+            prev_index = int(ephemeris.angles(prev_t)[element] // width) % parts
+            for t in samples[1:]:
+                index = int(ephemeris.angles(t)[element] // width) % parts
+                if index != prev_index:
+                    boundary = self._find_boundary(ephemeris, element, index * width, prev_t, t, tolerance)
+                    boundaries.append((boundary, index))
+                prev_t, prev_index = t, index
+
+            result[element] = [
+                self._transition_entry(element, index, start, end, tz, sunrises)
+                for (start, index), (end, _) in zip(boundaries, boundaries[1:])
+                if end > day_start and start < day_end
+            ]
+        return result
+
+    # --- Range engine ---
+
+    def _sample_body(self, obs, body, grid):
+        """
+        Geocentric series for `body` on a regular grid of ephem dates, unwrapped for interpolation:
+        astrometric ra/dec, apparent ra/dec (radians), horizontal parallax and semi-diameter (degrees).
+        """
+        out = np.empty((6, len(grid)))
+        for i, t in enumerate(grid):
+            obs.date = t
+            body.compute(obs)
+            out[0, i], out[1, i] = body.a_ra, body.a_dec
+            out[2, i], out[3, i] = body.g_ra, body.g_dec
+            out[4, i], out[5, i] = body.earth_distance, body.radius
+        out[0] = np.unwrap(out[0])
+        out[2] = np.unwrap(out[2])
+        out[4] = np.degrees(np.arcsin(EARTH_RADIUS_AU / out[4]))
+        out[5] = np.degrees(out[5])
+        return out
+
+    def _ecliptic_lon(self, ra, dec):
+        """Ecliptic longitude (degrees) of J2000 ra/dec, matching math.degrees(ephem.Ecliptic(body).lon)."""
+        lon = np.arctan2(
+            np.sin(ra) * math.cos(OBLIQUITY_J2000) + np.tan(dec) * math.sin(OBLIQUITY_J2000),
+            np.cos(ra)
+        )
+        return np.degrees(lon) % 360.0
+
+    def _interpolate(self, grid_start, step, values, t):
+        """Lagrange interpolation of `values` (sampled every `step` days from `grid_start`) at times `t`."""
+        x = (np.nan_to_num(t, nan=grid_start) - grid_start) / step
+        i = np.floor(x).astype(int)
+        gaps = (x - i)[:, None] - LAGRANGE_NODES
+        # Weight of node j is prod_{k != j} (u - k) / (j - k), built from prefix and suffix products
+        left = np.ones_like(gaps)
+        right = np.ones_like(gaps)
+        left[:, 1:] = np.cumprod(gaps[:, :-1], axis=1)
+        right[:, :-1] = np.cumprod(gaps[:, :0:-1], axis=1)[:, ::-1]
+        weights = left * right * LAGRANGE_SCALE
+        return (values[..., i[:, None] + LAGRANGE_NODES] * weights).sum(axis=-1)
+
+    def _solve_horizon_crossing(self, lat, starts, sky, rising, rate, iterations=3):
+        """
+        Next rise (or set) after each time in `starts`, solved for all days at once.
+        `sky(t)` returns (hour angle deg, declination rad, geocentric altitude of the event deg).
+        Each step moves by the gap between the body's hour angle and the one it has on the
+        horizon. NaN marks days where the body never crosses the horizon.
+        """
+        def step(t, wrap):
+            ha, dec, h0 = sky(t)
+            cos_h = (np.sin(np.radians(h0)) - math.sin(lat) * np.sin(dec)) / (math.cos(lat) * np.cos(dec))
+            h_horizon = np.degrees(np.arccos(cos_h))
+            delta = (360.0 - h_horizon if rising else h_horizon) - ha
+            # The first step moves forward to the next occurrence; later ones take the nearest correction
+            delta = (delta + 180.0) % 360.0 - 180.0 if wrap else delta % 360.0
+            return t + delta / rate
+
+        with np.errstate(invalid="ignore"):
+            t = step(starts, wrap=False)
+            for _ in range(iterations):
+                t = step(t, wrap=True)
+            # Refinement can pull an event just after `start` back before it; take the next one instead
+            early = t < starts
+            if early.any():
+                t_next = t[early] + 360.0 / rate
+                for _ in range(iterations):
+                    t_next = step(t_next, wrap=True)
+                t[early] = np.where(t_next >= starts[early], t_next, np.nan)
+        return t
+
+    def _utc_offset(self, tz, local_dt, guess):
+        """UTC offset in effect at naive local time `local_dt` (`guess` is a nearby offset)."""
+        return tz.fromutc((local_dt - guess).replace(tzinfo=tz)).utcoffset()
+
+    def _utc_offsets(self, tz, dates):
+        """
+        UTC offsets (days) at local midnight and local noon of each date.
+        Offsets are looked up once a week; only weeks containing a transition are resolved per day.
+        """
+        midnight = np.empty(len(dates))
+        noon = np.empty(len(dates))
+        first = datetime(dates[0].year, dates[0].month, dates[0].day)
+        guess = tz.utcoffset(first + timedelta(hours=12), is_dst=False)
+        for week_start in range(0, len(dates), 7):
+            week = range(week_start, min(week_start + 7, len(dates)))
+            week_noons = [first + timedelta(days=i, hours=12) for i in (week[0], week[-1])]
+            start_offset = self._utc_offset(tz, week_noons[0] - timedelta(hours=12), guess)
+            end_offset = self._utc_offset(tz, week_noons[1], start_offset)
+            if start_offset == end_offset == self._utc_offset(tz, week_noons[0], start_offset):
+                midnight[week.start:week.stop] = noon[week.start:week.stop] = start_offset.total_seconds() / 86400.0
+            else:
+                for i in week:
+                    local_midnight = first + timedelta(days=i)
+                    midnight[i] = self._utc_offset(tz, local_midnight, guess).total_seconds() / 86400.0
+                    noon[i] = self._utc_offset(tz, local_midnight + timedelta(hours=12), guess).total_seconds() / 86400.0
+            guess = end_offset
+        return midnight, noon
+
+    def calculate_range(self, start, end, location, tz_name: str = "Asia/Kolkata") -> "PanchangRange":
+        """
+        Panchang for every day from `start` to `end` (inclusive, date or YYYY-MM-DD) in one pass.
+        `location` is a CITIES_DB city name or a (lat, lon) tuple in degrees.
+
+        ephem is sampled once on a coarse grid shared by all days (one observer, one Sun/Moon pair),
+        rise/set times are solved for every day together in NumPy, and tithi/nakshatra/yoga/karan
+        indices are computed as arrays. Times agree with calculate_panchang to within a minute.
+        """
+        tz = pytz.timezone(tz_name)
+        if isinstance(location, str):
+            city_name = location
+            lat, lon = self._resolve_location(location)
+        else:
+            city_name = None
+            lat, lon = self._resolve_location(None, *location)
+
+        start_date = start if isinstance(start, date) else datetime.strptime(start, "%Y-%m-%d").date()
+        end_date = end if isinstance(end, date) else datetime.strptime(end, "%Y-%m-%d").date()
+        dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+        # Local midnight of each civil day as an ephem date
+        ordinals = np.array([d.toordinal() for d in dates], dtype=float)
+        midnight_offsets, display_offsets = self._utc_offsets(tz, dates)
+        midnights = ordinals - EPHEM_EPOCH_ORDINAL - 0.5 - midnight_offsets
+
+        obs = ephem.Observer()
+        obs.lat = lat
+        obs.lon = lon
+        obs_lat = float(obs.lat)
+
+        # Sample both bodies (and local sidereal time) on grids covering every event we may solve for
+        series = {}
+        for name, body, sample_step in (("sun", ephem.Sun(), SUN_SAMPLE_STEP), ("moon", ephem.Moon(), MOON_SAMPLE_STEP)):
+            # Events fall up to ~2 days after the last midnight; interpolation needs half its points either side
+            margin = (INTERPOLATION_POINTS // 2 + 1) * sample_step
+            grid_start = midnights[0] - margin
+            grid = grid_start + sample_step * np.arange(int((midnights[-1] + 2 + 2 * margin - grid_start) / sample_step) + 1)
+            values = self._sample_body(obs, body, grid)
+            if name == "sun":
+                sidereal = np.empty(len(grid))
+                for i, t in enumerate(grid):
+                    obs.date = t
+                    sidereal[i] = obs.sidereal_time()
+                # Sidereal time turns ~4 times between samples; interpolate what is left after the mean rate
+                values = np.vstack([values, np.unwrap(sidereal - SIDEREAL_RATE * (grid - grid_start))])
+            series[name] = (grid_start, sample_step, values)
+
+        def at(name, t, rows):
+            grid_start, sample_step, values = series[name]
+            return self._interpolate(grid_start, sample_step, values[rows], t)
+
+        def sky(name):
+            def position(t):
+                sun_rows = at("sun", t, slice(2, 7))
+                lst = sun_rows[4] + SIDEREAL_RATE * (t - series["sun"][0])
+                ra, dec, parallax, semi_diameter = sun_rows[:4] if name == "sun" else at(name, t, slice(2, 6))
+                h0 = parallax - REFRACTION_BASE_DEG - (1.0 + REFRACTION_SD_SLOPE) * semi_diameter
+                return np.degrees(lst - ra) % 360.0, dec, h0
+            return position
+
+        sun, moon = ephem.Sun(), ephem.Moon()
+        events = {}
+        for key, name, body, find, rising, rate in (
+            ("sunrise", "sun", sun, obs.next_rising, True, SUN_HA_RATE),
+            ("sunset", "sun", sun, obs.next_setting, False, SUN_HA_RATE),
+            ("moonrise", "moon", moon, obs.next_rising, True, MOON_HA_RATE),
+            ("moonset", "moon", moon, obs.next_setting, False, MOON_HA_RATE),
+        ):
+            times = self._solve_horizon_crossing(obs_lat, midnights, sky(name), rising, rate)
+            # Near the poles a body can be circumpolar at midnight and still cross the horizon later
+            # that day; let ephem search those few days directly
+            for i in np.flatnonzero(np.isnan(times)):
+                obs.date = midnights[i]
+                event = self._next_event(find, body)
+                if event:
+                    times[i] = ephem.Date(event)
+            events[key] = times
+        sunrise, sunset, moonrise, moonset = events["sunrise"], events["sunset"], events["moonrise"], events["moonset"]
+
+        # Tithi, Nakshatra, Yoga and Karan at sunrise (6 AM local when the sun never rises)
+        at_sunrise = np.where(np.isnan(sunrise), midnights + 0.25, sunrise)
+        sun_lon = self._ecliptic_lon(*at("sun", at_sunrise, slice(0, 2)))
+        moon_lon = self._ecliptic_lon(*at("moon", at_sunrise, slice(0, 2)))
+        ayanamsa = self._get_ayanamsa(at_sunrise + EPHEM_JD_OFFSET)
+        sidereal_sun = (sun_lon - ayanamsa) % 360.0
+        sidereal_moon = (moon_lon - ayanamsa) % 360.0
+        diff = (moon_lon - sun_lon) % 360.0
+        nak_span = 360.0 / 27.0
+
+        day_length = np.where(np.isnan(sunrise) | np.isnan(sunset), 0.0, sunset - sunrise)
+        weekdays = ((ordinals - 1) % 7).astype(int)
+
+        return PanchangRange(self, city_name, tz, {
+            "date": [d.isoformat() for d in dates],
+            "weekday": weekdays,
+            "utc_offset": display_offsets,
+            "dst_transition": midnight_offsets != display_offsets,
+            "sunrise": sunrise,
+            "sunset": sunset,
+            "moonrise": moonrise,
+            "moonset": moonset,
+            "day_duration_mins": np.nan_to_num(day_length * 1440.0),
+            "tithi_index": (diff // 12.0).astype(int) % 30,
+            "nakshatra_index": (sidereal_moon // nak_span).astype(int) % 27,
+            "yoga_index": (((sidereal_sun + sidereal_moon) % 360.0) // nak_span).astype(int) % 27,
+            "karan_num": (diff // 6.0).astype(int) + 1,
+            "rahukaal_start": sunrise + np.array([RAHU_INDICES[w] for w in range(7)])[weekdays] * day_length / 8.0,
+            "yamaganda_start": sunrise + np.array([YAMA_INDICES[w] for w in range(7)])[weekdays] * day_length / 8.0,
+            "gulika_start": sunrise + np.array([GULI_INDICES[w] for w in range(7)])[weekdays] * day_length / 8.0,
+            "slot_length": day_length / 8.0,
+        })
+
+
+class PanchangRange:
+    """
+    Columnar result of PanchangEngine.calculate_range.
+    Every column has one entry per day; times are ephem dates (UTC) with NaN for "no event".
+    """
+
+    def __init__(self, engine: PanchangEngine, city, tz, columns: dict):
+        self.engine = engine
+        self.city = city
+        self.tz = tz
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns["date"])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def _local_hhmm(self, times):
+        """Format ephem dates as local HH:MM (truncated, like strftime), None where NaN."""
+        local = (times + 0.5 + self.columns["utc_offset"]) % 1.0
+        minutes = np.floor(np.nan_to_num(local) * 1440.0 + 1e-9).astype(int) % 1440
+        formatted = [None if t != t else HH_MM[m] for t, m in zip(times, minutes)]
+        # On DST transition days the noon offset may not apply to early events; convert those exactly
+        for i in np.flatnonzero(self.columns["dst_transition"] & ~np.isnan(times)):
+            formatted[i] = self.engine._to_local_display(ephem.Date(times[i]).datetime(), self.tz)
+        return formatted
+
+    def _slots(self, starts):
+        ends = starts + self.columns["slot_length"]
+        return [
+            "Unknown" if s is None else f"{s}-{e}"
+            for s, e in zip(self._local_hhmm(starts), self._local_hhmm(ends))
+        ]
+
+    def muhurat_rows(self):
+        """Abhijit, Brahma and Godhuli muhurats for every day, shaped like PanchangEngine.calculate_muhurats."""
+        cols = self.columns
+        sunrise, sunset = cols["sunrise"], cols["sunset"]
+        part = (sunset - sunrise) / 15.0
+        windows = {
+            "Abhijit": (sunrise + 7 * part, sunrise + 8 * part),
+            "Brahma": (sunrise - 96 / 1440.0, sunrise - 48 / 1440.0),
+            "Godhuli": (sunset - 12 / 1440.0, sunset + 12 / 1440.0),
+        }
+        formatted = {kind: (self._local_hhmm(start), self._local_hhmm(end)) for kind, (start, end) in windows.items()}
+
+        rows = []
+        for i, date_str in enumerate(cols["date"]):
+            if sunrise[i] != sunrise[i] or sunset[i] != sunset[i]:
+                continue  # no sunrise or sunset (polar day/night): no muhurats, as in calculate_muhurats
+            for kind, (starts, ends) in formatted.items():
+                rows.append(self.engine._muhurat_entry(
+                    kind, starts[i], ends[i], int(cols["weekday"][i]), date_str, self.city
+                ))
+        return rows
+
+    def to_rows(self):
+        """One dict per day, shaped like PanchangEngine.calculate_panchang output."""
+        cols = self.columns
+        sunrise = self._local_hhmm(cols["sunrise"])
+        sunset = self._local_hhmm(cols["sunset"])
+        moonrise = self._local_hhmm(cols["moonrise"])
+        moonset = self._local_hhmm(cols["moonset"])
+        rahukaal = self._slots(cols["rahukaal_start"])
+        yamaganda = self._slots(cols["yamaganda_start"])
+        gulika = self._slots(cols["gulika_start"])
+
+        rows = []
+        for i, date_str in enumerate(cols["date"]):
+            tithi_idx = int(cols["tithi_index"][i])
+            nak_idx = int(cols["nakshatra_index"][i])
+            yoga_idx = int(cols["yoga_index"][i])
+            tithi_name = TITHI_NAMES[tithi_idx]
+            paksha = "Shukla" if tithi_idx < 15 else "Krishna"
+            karan_name, karan_name_hi = self.engine._karan_names(int(cols["karan_num"][i]))
+            festival_name, vrat_name, festivals_list = self.engine._festivals_for_tithi(tithi_name, paksha)
+            day_mins = cols["day_duration_mins"][i]
+            rows.append({
+                "date": date_str,
+                "city": self.city,
+                "sunrise": sunrise[i],
+                "sunset": sunset[i],
+                "moonrise": moonrise[i],
+                "moonset": moonset[i],
+                "day_duration": f"{int(day_mins // 60)}h {int(day_mins % 60)}m",
+                "tithi": tithi_name,
+                "tithi_hindi": TITHI_NAMES_HI[tithi_idx],
+                "tithi_index": tithi_idx,
+                "paksha": paksha,
+                "nakshatra": NAKSHATRA_NAMES[nak_idx],
+                "nakshatra_hindi": NAKSHATRA_NAMES_HI[nak_idx],
+                "yoga": YOGA_NAMES[yoga_idx],
+                "yoga_hindi": YOGA_NAMES_HI[yoga_idx],
+                "karan": karan_name,
+                "karan_hindi": karan_name_hi,
+                "rahukaal": rahukaal[i],
+                "yamaganda": yamaganda[i],
+                "gulika": gulika[i],
+                "festival": festival_name,
+                "vrat": vrat_name,
+                "festivals": festivals_list,
+                "status": "complete",
+                "hindi_description": None,
+                "english_description": None,
+                "spiritual_message": None
+            })
+        return rows
+
+def snap_to_grid(value: float, grid: float) -> float:
+    return round(round(value / grid) * grid, 6)
+
+@lru_cache(maxsize=settings.PANCHANG_CACHE_MAX_ENTRIES)
+def _cached_location_panchang(date_str: str, lat: float, lon: float, tz_name: str) -> dict:
+    return PanchangEngine().calculate_panchang(date_str, None, lat, lon, tz_name)
+
+@lru_cache(maxsize=settings.PANCHANG_CACHE_MAX_ENTRIES)
+def _cached_location_transitions(date_str: str, lat: float, lon: float, tz_name: str) -> dict:
+    return PanchangEngine().calculate_transitions(date_str, None, lat, lon, tz_name)
+
+def calculate_panchang_cached(date_str: str, lat: float, lon: float, tz_name: str = "Asia/Kolkata") -> dict:
+    """
+    Live Panchang for arbitrary coordinates, memoized per (date, grid cell, tz).
+    Coordinates snap to a PANCHANG_GRID_DEG grid so nearby users share one entry.
+    """
+    grid = settings.PANCHANG_GRID_DEG
+    result = _cached_location_panchang(date_str, snap_to_grid(lat, grid), snap_to_grid(lon, grid), tz_name)
+    return dict(result)  # cached dict is shared; hand out a copy
+
+def calculate_transitions_cached(date_str: str, lat: float, lon: float, tz_name: str = "Asia/Kolkata") -> dict:
+    """Element start/end times for the day, memoized on the same grid as calculate_panchang_cached."""
+    grid = settings.PANCHANG_GRID_DEG
+    result = _cached_location_transitions(date_str, snap_to_grid(lat, grid), snap_to_grid(lon, grid), tz_name)
+    return {element: [dict(span) for span in spans] for element, spans in result.items()}
+
+def _lru_stats(cached_fn) -> dict:
+    info = cached_fn.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_ratio": round(info.hits / lookups, 4) if lookups else 0.0,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
+
+def panchang_cache_stats() -> dict:
+    stats = _lru_stats(_cached_location_panchang)
+    stats["grid_deg"] = settings.PANCHANG_GRID_DEG
+    stats["transitions"] = _lru_stats(_cached_location_transitions)
+    return stats
+
+register_metrics("panchang_engine", panchang_cache_stats)
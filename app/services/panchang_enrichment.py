@@ -0,0 +1,247 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.config import settings
+from app.services.gemini_client import GeminiClient, configure_model_limits
+from app.utils.db import db
+from app.utils.logger import setup_logger
+from app.utils.retry import async_retry
+
+logger = setup_logger("panchang_enrichment")
+
+# Written only by the enrichment stage; a null hindi_description marks a row as still pending
+ENRICHMENT_FIELDS = {"hindi_description", "english_description", "spiritual_message", "spiritual_message_hindi"}
+# Calculated by the engine, then merged with the AI festival list by enrichment: written when a
+# date is first stored, never by a later recalculation of it
+FESTIVAL_FIELDS = {"festival", "festivals", "vrat", "festival_hindi", "vrat_hindi"}
+PENDING_COLUMNS = "id, date, city, tithi, paksha, nakshatra, yoga, karan, sunrise, sunset, moonrise, moonset, festival, vrat, festivals"
+PAGE_SIZE = 1000
+
+def split_stored(rows: List[Dict[str, Any]], stored_dates: Set[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Calculated rows for stage one as (new, existing). New dates are written in full and
+    stay pending for enrichment; dates already stored only get their calculated columns
+    refreshed, leaving the enrichment and festival columns stage two owns.
+    """
+    new = [{k: v for k, v in row.items() if k not in ENRICHMENT_FIELDS}
+           for row in rows if str(row["date"]) not in stored_dates]
+    existing = [{k: v for k, v in row.items() if k not in ENRICHMENT_FIELDS | FESTIVAL_FIELDS}
+                for row in rows if str(row["date"]) in stored_dates]
+    return new, existing
+
+def fetch_stored_dates(client, city: str, start_date: str, end_date: str) -> Set[str]:
+    """Dates in the range that already have a row for `city`, read with a sync Supabase client (the scripts')."""
+    dates, offset = set(), 0
+    while True:
+        res = client.table("panchang_daily").select("date").eq("city", city)\
+            .gte("date", start_date).lte("date", end_date)\
+            .order("date").range(offset, offset + PAGE_SIZE - 1).execute()
+        dates.update(str(row["date"]) for row in res.data or [])
+        if len(res.data or []) < PAGE_SIZE:
+            return dates
+        offset += PAGE_SIZE
+
+def row_key(row: Dict[str, Any]) -> str:
+    return f"{row['date']}|{row['city']}"
+
+def build_prompt(row: Dict[str, Any]) -> str:
+    panchang_basic = {k: v for k, v in row.items() if k != "id"}
+    return f"""
+    Analyze the Panchang data for {row['date']} in {row['city']}: {panchang_basic}.
+
+    1. Identify if there are any major Hindu festivals or Vrats on this day.
+    2. Provide a short description (Hindi & English) for the day's significance.
+    3. Provide a short spiritual message/quote.
+
+    Output JSON only:
+    {{
+        "festivals": [
+            {{
+                "name": "Festival Name",
+                "name_hindi": "त्योहार का नाम",
+                "description": "Short description",
+                "type": "Major" | "Minor" | "Jayanti" | "Vrat"
+            }}
+        ],
+        "hindi_description": "2-3 lines in Hindi",
+        "english_description": "2-3 lines in English",
+        "spiritual_message": "One liner quote in English",
+        "spiritual_message_hindi": "हिंदी में आध्यात्मिक संदेश"
+    }}
+    If no festival, "festivals" should be empty list [].
+    """
+
+def _ai_festivals(ai_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    festivals = ai_data.get("festivals") or []
+    if not isinstance(festivals, list):
+        festivals = [festivals]
+    # Tolerate plain names in place of festival objects
+    return [f if isinstance(f, dict) else {"name": str(f)} for f in festivals if f]
+
+def merge_enrichment(row: Dict[str, Any], ai_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Columns to update on a stored Panchang row from one Gemini response."""
+    update = {field: ai_data.get(field) for field in ENRICHMENT_FIELDS}
+
+    ai_festivals = _ai_festivals(ai_data)
+    festival_names = [f["name"] for f in ai_festivals if f.get("name")]
+
+    # Keep the calculated festival first if the AI did not mention it
+    festival = row.get("festival")
+    if festival and festival not in festival_names:
+        festival_names.insert(0, festival)
+    update["festivals"] = festival_names
+
+    if festival_names:
+        if not festival:
+            festival = update["festival"] = festival_names[0]
+        for f in ai_festivals:
+            if f.get("name") == festival:
+                update["festival_hindi"] = f.get("name_hindi")
+                break
+        vrat_name = row.get("vrat")
+        if vrat_name:
+            for f in ai_festivals:
+                if f.get("name") == vrat_name:
+                    update["vrat_hindi"] = f.get("name_hindi")
+                    break
+    return update
+
+async def fetch_pending(start_date: str, end_date: str, city: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Stored rows in the date range that have not been enriched yet, read in full before any are updated."""
+    rows, offset = [], 0
+    while True:
+        query = db.table("panchang_daily").select(PENDING_COLUMNS)\
+            .is_("hindi_description", "null")\
+            .gte("date", start_date)\
+            .lte("date", end_date)
+        if city:
+            query = query.eq("city", city)
+        res = await query.order("id").range(offset, offset + PAGE_SIZE - 1).execute()
+        rows.extend(res.data or [])
+        if len(res.data or []) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+class EnrichmentProgress:
+    """
+    JSON file of rows already enriched and rows that failed, rewritten after every row.
+    Rows Gemini answered without a hindi_description stay null in the table, so the
+    `done` set is what stops a resumed run from paying for them again.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.done: Set[str] = set()
+        self.failed: Dict[str, str] = {}
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                data = json.load(f)
+            self.done = set(data.get("done", []))
+            self.failed = data.get("failed", {})
+
+    def mark_done(self, key: str):
+        self.done.add(key)
+        self.failed.pop(key, None)
+        self.save()
+
+    def mark_failed(self, key: str, error: str):
+        self.failed[key] = error
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"done": sorted(self.done), "failed": self.failed}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+class EnrichmentQueue:
+    """
+    Drains stored Panchang rows through Gemini with `workers` concurrent workers.
+
+    Pacing is left to GeminiClient's per-model limiter, set here to `rpm` requests per
+    minute, so the workers together stay inside the Gemini quota however many there are;
+    429s and 5xx are retried by the client with Retry-After-aware, jittered backoff.
+    Rows that still fail are recorded in the progress file and picked up by the next run.
+    """
+
+    def __init__(
+        self,
+        progress: EnrichmentProgress,
+        workers: int = settings.ENRICHMENT_WORKERS,
+        rpm: Optional[int] = None,
+        max_retries: int = settings.ENRICHMENT_MAX_RETRIES,
+        model: str = "flash",
+        gemini: Optional[GeminiClient] = None,
+    ):
+        self.progress = progress
+        self.workers = workers
+        self.model = model
+        self.max_retries = max_retries
+        self.gemini = gemini or GeminiClient()
+        if rpm:
+            configure_model_limits(model, concurrency=workers, rpm=rpm)
+        self.stats = {"enriched": 0, "failed": 0, "festivals_added": 0}
+
+    async def _store_festivals(self, date_str: str, ai_data: Dict[str, Any]):
+        for fest in _ai_festivals(ai_data):
+            if not fest.get("name"):
+                continue
+            existing = await db.table("festivals").select("id")\
+                .eq("name", fest["name"]).eq("start_date", date_str).execute()
+            if existing.data:
+                continue
+            await db.table("festivals").insert({
+                "name": fest["name"],
+                "name_hindi": fest.get("name_hindi"),
+                "start_date": date_str,
+                "end_date": date_str,
+                "description": fest.get("description"),
+            }).execute()
+            self.stats["festivals_added"] += 1
+
+    @async_retry(max_retries=3, delay=1.0, jitter=True)
+    async def _write(self, row: Dict[str, Any], ai_data: Dict[str, Any]):
+        await db.table("panchang_daily").update(merge_enrichment(row, ai_data)).eq("id", row["id"]).execute()
+
+    async def enrich_row(self, row: Dict[str, Any]):
+        ai_data = await self.gemini.generate_json(build_prompt(row), model=self.model, max_retries=self.max_retries)
+        # The Gemini call is the expensive part; don't lose it to a transient write error
+        await self._write(row, ai_data)
+        await self._store_festivals(row["date"], ai_data)
+
+    async def _worker(self, queue: "asyncio.Queue[Dict[str, Any]]", total: int, started: float):
+        while True:
+            try:
+                row = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            key = row_key(row)
+            try:
+                await self.enrich_row(row)
+                self.progress.mark_done(key)
+                self.stats["enriched"] += 1
+            except Exception as e:
+                logger.error(f"Enrichment failed for {key}: {e}")
+                self.progress.mark_failed(key, str(e))
+                self.stats["failed"] += 1
+
+            finished = self.stats["enriched"] + self.stats["failed"]
+            if finished % 25 == 0 or finished == total:
+                elapsed = time.perf_counter() - started
+                logger.info(f"[{finished}/{total}] enriched {self.stats['enriched']}, failed {self.stats['failed']} in {elapsed:.0f}s")
+
+    async def run(self, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        for row in rows:
+            if row_key(row) not in self.progress.done:
+                queue.put_nowait(row)
+        total = queue.qsize()
+        self.stats["skipped"] = len(rows) - total
+        if total:
+            started = time.perf_counter()
+            await asyncio.gather(*(self._worker(queue, total, started) for _ in range(min(self.workers, total))))
+        return self.stats
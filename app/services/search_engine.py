@@ -0,0 +1,285 @@
+import bisect
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+import numpy as np
+from app.utils.transliteration import phonetic_key
+
+# Words; Devanagari vowel signs and viramas are not \w, so the block (minus the dandas) is listed explicitly
+TOKEN_RE = re.compile(r"[\w\u0900-\u0963\u0966-\u097F]+")
+# Only the last query word is completed as a prefix, and only once it has this many characters
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 50
+PREFIX_WEIGHT = 0.8
+INITIAL_CAPACITY = 1024
+# Snippet length in words, and the markers put around matched words
+SNIPPET_WORDS = 24
+HIGHLIGHT_PRE = "<mark>"
+HIGHLIGHT_POST = "</mark>"
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower())
+
+def analyze(text: Optional[str]) -> List[str]:
+    """Index and query terms: tokens reduced to phonetic keys, so scripts and spellings meet."""
+    return [key for key in (phonetic_key(token) for token in tokenize(text)) if key]
+
+def highlight(text: Optional[str], query: str, words: int = SNIPPET_WORDS) -> Optional[str]:
+    """
+    Window of `text` around its first word matching `query` (the way `InvertedIndex`
+    matches: by phonetic key, the last query word also as a prefix), with every match in
+    the window wrapped in HIGHLIGHT_PRE/HIGHLIGHT_POST. None when nothing matches.
+    """
+    keys = analyze(query)
+    if not text or not keys:
+        return None
+    exact, last = set(keys), keys[-1]
+    prefix = last if len(last) >= MIN_PREFIX_LENGTH else None
+    tokens = list(TOKEN_RE.finditer(text))
+    hits = []
+    for i, match in enumerate(tokens):
+        key = phonetic_key(match.group().lower())
+        if key and (key in exact or (prefix and key.startswith(prefix))):
+            hits.append(i)
+    if not hits:
+        return None
+
+    start = max(0, min(hits[0] - words // 3, len(tokens) - words))
+    end = min(len(tokens), start + words)
+    parts, position = ["…" if start else ""], tokens[start].start()
+    for i in hits:
+        if start <= i < end:
+            match = tokens[i]
+            parts += [text[position:match.start()], HIGHLIGHT_PRE, match.group(), HIGHLIGHT_POST]
+            position = match.end()
+    parts += [text[position:tokens[end - 1].end()], "…" if end < len(tokens) else ""]
+    return "".join(parts)
+
+def top_positions(scores: np.ndarray, limit: int) -> np.ndarray:
+    """Positions of the `limit` highest scores, best first, ties in position order; only they are sorted."""
+    if limit <= 0:
+        return np.empty(0, dtype=np.int64)
+    if limit < len(scores):
+        kth = scores[np.argpartition(-scores, limit - 1)[limit - 1]]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")][:limit]
+
+class InvertedIndex:
+    """
+    BM25 ranking over documents made of weighted text fields.
+
+    A document's term frequency is the boost-weighted sum over its fields (title matches
+    count more than city matches), and its length is the boost-weighted token count.
+    Each document carries a `payload` dict, the stored result returned by `search`; the
+    payload values named in `facet_fields` are also kept as integer codes in NumPy
+    arrays, so filtering and facet counts are vectorized like the scoring.
+
+    Postings are dicts so documents can be added and removed in place (freed document
+    numbers are reused); each term's postings are converted to arrays on first use and
+    the arrays are dropped whenever that term changes.
+
+    Terms are phonetic keys (see `analyze`), computed once per document when it is added,
+    so "हनुमान", "hanumaan" and "hanuman" are the same term for documents and queries.
+
+    A query matches documents containing every query word, falling back to any word when
+    none do. The last word also matches terms it is a prefix of, so results keep up with
+    a user who is still typing.
+    """
+
+    def __init__(self, facet_fields: Tuple[str, ...] = (), k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.facet_fields = facet_fields
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.payloads: List[Optional[Dict[str, Any]]] = []
+        self.doc_terms: List[Optional[Dict[str, float]]] = []
+        self.doc_len = np.zeros(INITIAL_CAPACITY)
+        self.facet_codes = {name: np.full(INITIAL_CAPACITY, -1, dtype=np.int32) for name in facet_fields}
+        self.facet_values: Dict[str, List[Any]] = {name: [] for name in facet_fields}
+        self._facet_lookup: Dict[str, Dict[Any, int]] = {name: {} for name in facet_fields}
+        self.doc_numbers: Dict[Hashable, int] = {}
+        self.total_len = 0.0
+        self._free: List[int] = []
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._sorted_terms: Optional[List[str]] = None
+        self.version = 0  # Bumped on every change, so derived structures know when to rebuild
+
+    def __len__(self) -> int:
+        return len(self.doc_numbers)
+
+    def _grow(self):
+        capacity = len(self.doc_len) * 2
+        self.doc_len = np.resize(self.doc_len, capacity)
+        for name in self.facet_fields:
+            self.facet_codes[name] = np.resize(self.facet_codes[name], capacity)
+
+    def _facet_code(self, name: str, value: Any) -> int:
+        if value is None:
+            return -1
+        lookup = self._facet_lookup[name]
+        if value not in lookup:
+            lookup[value] = len(self.facet_values[name])
+            self.facet_values[name].append(value)
+        return lookup[value]
+
+    def add(self, key: Hashable, fields: Dict[str, Optional[str]], boosts: Dict[str, float], payload: Dict[str, Any]):
+        """Index (or re-index) one document; `fields` are its texts by field name."""
+        self.remove(key)
+        terms: Counter = Counter()
+        length = 0.0
+        for name, text in fields.items():
+            boost = boosts.get(name, 1.0)
+            tokens = analyze(text)
+            length += boost * len(tokens)
+            for token in tokens:
+                terms[token] += boost
+        if not terms:
+            return
+
+        doc = self._free.pop() if self._free else len(self.payloads)
+        if doc == len(self.payloads):
+            if doc == len(self.doc_len):
+                self._grow()
+            self.payloads.append(None)
+            self.doc_terms.append(None)
+        self.payloads[doc] = payload
+        self.doc_terms[doc] = dict(terms)
+        self.doc_len[doc] = length
+        for name in self.facet_fields:
+            self.facet_codes[name][doc] = self._facet_code(name, payload.get(name))
+        self.doc_numbers[key] = doc
+        self.total_len += length
+        for term, tf in terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                self._sorted_terms = None
+            posting[doc] = tf
+            self._arrays.pop(term, None)
+        self.version += 1
+
+    def remove(self, key: Hashable):
+        doc = self.doc_numbers.pop(key, None)
+        if doc is None:
+            return
+        for term in self.doc_terms[doc]:
+            posting = self.postings[term]
+            del posting[doc]
+            self._arrays.pop(term, None)
+            if not posting:
+                del self.postings[term]
+                self._sorted_terms = None
+        self.total_len -= self.doc_len[doc]
+        self.payloads[doc] = None
+        self.doc_terms[doc] = None
+        self.doc_len[doc] = 0.0
+        self._free.append(doc)
+        self.version += 1
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        doc = self.doc_numbers.get(key)
+        return self.payloads[doc] if doc is not None else None
+
+    def documents(self) -> List[Dict[str, Any]]:
+        return [payload for payload in self.payloads if payload is not None]
+
+    def _posting_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            posting = self.postings[term]
+            arrays = self._arrays[term] = (
+                np.fromiter(posting.keys(), dtype=np.int64, count=len(posting)),
+                np.fromiter(posting.values(), dtype=float, count=len(posting)),
+            )
+        return arrays
+
+    def terms_with_prefix(self, prefix: str) -> List[str]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        end = bisect.bisect_left(self._sorted_terms, prefix + "\uffff")
+        return self._sorted_terms[start:end]
+
+    def _expand(self, word: str, last: bool) -> List[Tuple[str, float]]:
+        """Index terms that satisfy one query word, with their weights."""
+        expansions = [(word, 1.0)] if word in self.postings else []
+        if last and len(word) >= MIN_PREFIX_LENGTH:
+            longer = [t for t in self.terms_with_prefix(word) if t != word]
+            longer = heapq.nlargest(MAX_PREFIX_EXPANSIONS, longer, key=lambda t: len(self.postings[t]))
+            expansions += [(t, PREFIX_WEIGHT) for t in longer]
+        return expansions
+
+    def score(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(document numbers, BM25 scores) of the matches: all words if possible, else any."""
+        n_docs = len(self)
+        if not words or not n_docs:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        size = len(self.payloads)
+        avg_len = self.total_len / n_docs or 1.0
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_len[:size] / avg_len)
+        scores = np.zeros(size)
+        matched = np.zeros(size, dtype=np.int32)
+        for i, word in enumerate(words):
+            # A document's score for one word is its best-scoring expansion
+            best = np.zeros(size)
+            for term, weight in self._expand(word, last=i == len(words) - 1):
+                docs, tfs = self._posting_arrays(term)
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                values = weight * idf * tfs * (self.k1 + 1) / (tfs + length_norm[docs])
+                best[docs] = np.maximum(best[docs], values)
+            scores += best
+            matched += best > 0
+        docs = np.flatnonzero(matched == len(words))
+        if not len(docs):
+            docs = np.flatnonzero(matched)
+        return docs, scores[docs]
+
+    def search(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: int = 20,
+        filters: Optional[Dict[str, Optional[Iterable[Any]]]] = None,
+        facets: Iterable[str] = (),
+        rerank: Optional[Callable[[List[Dict[str, Any]], np.ndarray], np.ndarray]] = None,
+    ) -> Dict[str, Any]:
+        """
+        One page of payloads ranked by score, with the total match count and facet counts.
+        `filters` (on `facet_fields`; None values are ignored) keeps documents whose value is
+        among the allowed ones. Facet counts are taken over all matches before filtering, so
+        clients can show every option. `rerank(payloads, scores)` may return adjusted scores
+        for all matches at once.
+        """
+        docs, scores = self.score(analyze(query))
+
+        facet_counts = {}
+        for name in facets:
+            codes = self.facet_codes[name][docs]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self.facet_values[name]))
+            order = np.argsort(-counts, kind="stable")
+            facet_counts[name] = {self.facet_values[name][c]: int(counts[c]) for c in order if counts[c]}
+
+        for name, values in (filters or {}).items():
+            if values is None:
+                continue
+            lookup = self._facet_lookup[name]
+            keep = np.isin(self.facet_codes[name][docs], [lookup[v] for v in values if v in lookup])
+            docs, scores = docs[keep], scores[keep]
+
+        if rerank is not None and len(docs):
+            scores = rerank([self.payloads[doc] for doc in docs], scores)
+        page = top_positions(scores, offset + limit)[offset:]
+        return {
+            "items": [{**self.payloads[docs[i]], "score": round(float(scores[i]), 4)} for i in page],
+            "total": len(docs),
+            "facets": facet_counts,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"documents": len(self), "terms": len(self.postings)}
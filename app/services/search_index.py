@@ -0,0 +1,312 @@
+import asyncio
+import os
+import pickle
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.config import settings
+from app.services.search_engine import InvertedIndex
+from app.utils.db import db
+from app.utils.logger import setup_logger
+from app.utils.metrics import register_metrics
+
+logger = setup_logger("search_index")
+
+LOAD_PAGE_SIZE = 1000
+# After a failed refresh or a partial build, how long until the database is tried again
+RETRY_SECONDS = 60
+# Payload fields results can be filtered and counted by
+FACET_FIELDS = ("type", "deity")
+# Bump when the document layout or tokenization changes, so old snapshots are rebuilt
+SNAPSHOT_VERSION = 4
+
+def _first(values: Optional[List[str]]) -> Optional[str]:
+    return values[0] if values else None
+
+def _join(values: Optional[List[str]]) -> Optional[str]:
+    return " ".join(str(v) for v in values) if values else None
+
+class SearchSource:
+    """
+    How one table is indexed: the columns read, the text fields and their boosts, and
+    the result shown for a hit. Rows for which `include` is false are left out.
+    """
+
+    def __init__(
+        self,
+        doc_type: str,
+        table: str,
+        columns: str,
+        fields: Dict[str, Tuple[Callable[[Dict[str, Any]], Optional[str]], float]],
+        title: str,
+        subtitle: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None,
+        image_url: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None,
+        include: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ):
+        self.doc_type = doc_type
+        self.table = table
+        self.columns = columns
+        self.fields = fields
+        self.boosts = {name: boost for name, (_, boost) in fields.items()}
+        self.title = title
+        self.subtitle = subtitle
+        self.image_url = image_url
+        self.include = include
+
+    def document(self, row: Dict[str, Any]) -> Optional[Tuple[Dict[str, Optional[str]], Dict[str, Any]]]:
+        """(field texts, result payload) for a row, or None if the row is not searchable."""
+        if self.include and not self.include(row):
+            return None
+        texts = {name: extract(row) for name, (extract, _) in self.fields.items()}
+        payload = {
+            "type": self.doc_type,
+            "id": str(row["id"]),
+            "title": row.get(self.title),
+            "subtitle": self.subtitle(row) if self.subtitle else None,
+            "image_url": self.image_url(row) if self.image_url else None,
+            "deity": row.get("deity"),
+        }
+        return texts, payload
+
+SOURCES: Dict[str, SearchSource] = {source.doc_type: source for source in [
+    SearchSource(
+        "temple", "temples", "id, name, city, state, deity, image_urls",
+        {
+            "name": (lambda r: r.get("name"), 3.0),
+            "deity": (lambda r: r.get("deity"), 1.5),
+            "city": (lambda r: r.get("city"), 1.0),
+            "state": (lambda r: r.get("state"), 0.5),
+        },
+        title="name",
+        subtitle=lambda r: r.get("city"),
+        image_url=lambda r: _first(r.get("image_urls")),
+    ),
+    SearchSource(
+        "aarti", "aartis", "id, title, deity",
+        {"title": (lambda r: r.get("title"), 3.0), "deity": (lambda r: r.get("deity"), 1.5)},
+        title="title",
+        subtitle=lambda r: r.get("deity"),
+    ),
+    SearchSource(
+        "bhajan", "bhajans", "id, title, singer, deity, category, image_url",
+        {
+            "title": (lambda r: r.get("title"), 3.0),
+            "deity": (lambda r: r.get("deity"), 1.5),
+            "singer": (lambda r: r.get("singer"), 1.0),
+            "category": (lambda r: r.get("category"), 0.5),
+        },
+        title="title",
+        subtitle=lambda r: r.get("singer"),
+        image_url=lambda r: r.get("image_url"),
+    ),
+    SearchSource(
+        "puja", "puja_guides", "id, title, category, deity, image_urls",
+        {
+            "title": (lambda r: r.get("title"), 3.0),
+            "deity": (lambda r: r.get("deity"), 1.5),
+            "category": (lambda r: r.get("category"), 0.5),
+        },
+        title="title",
+        subtitle=lambda r: r.get("category"),
+        image_url=lambda r: _first(r.get("image_urls")),
+    ),
+    SearchSource(
+        "blog", "blogs", "id, title, category, tags, status",
+        {
+            "title": (lambda r: r.get("title"), 3.0),
+            "tags": (lambda r: _join(r.get("tags")), 1.0),
+            "category": (lambda r: r.get("category"), 0.5),
+        },
+        title="title",
+        subtitle=lambda r: r.get("category"),
+        # Drafts are not public
+        include=lambda r: r.get("status") == "published",
+    ),
+]}
+
+class SearchIndexManager:
+    """
+    Process-wide search index over every SOURCES table.
+
+    Built in the background at startup: from the snapshot file when it is younger than
+    SEARCH_INDEX_REFRESH_SECONDS, otherwise from the database, after which a new snapshot
+    is written. Admin writes are applied incrementally; changes made elsewhere (scripts,
+    other workers) arrive with the periodic rebuild, which runs while the current index
+    keeps serving. The snapshot is also rewritten at shutdown.
+
+    A rebuild that cannot read every table keeps the current index. Only the first build
+    serves what it could read (better than no search at all); that partial index is never
+    written to the snapshot, and the database is tried again after RETRY_SECONDS.
+    """
+
+    def __init__(self, snapshot_path: Optional[str], refresh_seconds: int):
+        self.snapshot_path = snapshot_path
+        self.refresh_seconds = refresh_seconds
+        self.index: Optional[InvertedIndex] = None
+        self.built_at = 0.0
+        self.refresh_at = 0.0
+        self.partial = False  # Some tables could not be read into the current index
+        self.load_ms = 0.0
+        self.source = None  # "snapshot" or "database"
+        self._lock = asyncio.Lock()
+        self._replay: Optional[List[Tuple[Callable, tuple]]] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _load_snapshot(self) -> Optional[InvertedIndex]:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable search snapshot: {e}")
+            return None
+        if snapshot.get("version") != SNAPSHOT_VERSION or time.time() - snapshot["built_at"] > self.refresh_seconds:
+            return None
+        self.built_at = snapshot["built_at"]
+        self.refresh_at = self.built_at + self.refresh_seconds
+        self.partial = False
+        return snapshot["index"]
+
+    def save_snapshot(self):
+        if not self.snapshot_path or self.index is None or self.partial:
+            return
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": SNAPSHOT_VERSION, "built_at": self.built_at, "index": self.index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.snapshot_path)
+
+    async def _fetch_all(self, source: SearchSource) -> List[Dict[str, Any]]:
+        rows, offset = [], 0
+        while True:
+            res = await db.table(source.table).select(source.columns)\
+                .order("id").range(offset, offset + LOAD_PAGE_SIZE - 1).execute()
+            rows.extend(res.data)
+            if len(res.data) < LOAD_PAGE_SIZE:
+                return rows
+            offset += LOAD_PAGE_SIZE
+
+    async def _build(self, allow_partial: bool) -> InvertedIndex:
+        """
+        Index every SOURCES table. Raises when no table could be read, or when any could
+        not and `allow_partial` is false (a refresh, which keeps the index it has).
+        """
+        self._replay = []
+        try:
+            index = InvertedIndex(facet_fields=FACET_FIELDS)
+            tables = await asyncio.gather(*(self._fetch_all(source) for source in SOURCES.values()), return_exceptions=True)
+            failed = [source.table for source, rows in zip(SOURCES.values(), tables) if isinstance(rows, Exception)]
+            for source, rows in zip(SOURCES.values(), tables):
+                if isinstance(rows, Exception):
+                    logger.warning(f"Search index could not read {source.table}: {rows}")
+            if len(failed) == len(SOURCES):
+                raise RuntimeError("Search index build failed: no table could be read")
+            if failed and not allow_partial:
+                raise RuntimeError(f"Search index refresh failed for {', '.join(failed)}")
+            for source, rows in zip(SOURCES.values(), tables):
+                if not isinstance(rows, Exception):
+                    for row in rows:
+                        _apply_upsert(index, source, row)
+            # Writes that landed while the tables were being read
+            for apply, args in self._replay:
+                apply(index, *args)
+        finally:
+            self._replay = None
+        self.built_at = time.time()
+        self.partial = bool(failed)
+        self.refresh_at = self.built_at + (RETRY_SECONDS if failed else self.refresh_seconds)
+        return index
+
+    async def _load(self, allow_snapshot: bool) -> InvertedIndex:
+        start = time.perf_counter()
+        index = self._load_snapshot() if allow_snapshot else None
+        self.source = "snapshot" if index is not None else "database"
+        if index is None:
+            # Only the first build may serve a partial index; a refresh keeps the current one
+            index = await self._build(allow_partial=self.index is None)
+        self.load_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Search index loaded from {self.source}: {len(index)} documents, {self.load_ms:.0f}ms")
+        return index
+
+    async def _reload(self):
+        async with self._lock:
+            try:
+                self.index = await self._load(allow_snapshot=False)
+                self.save_snapshot()
+            except Exception as e:
+                self.refresh_at = time.time() + RETRY_SECONDS
+                logger.warning(f"Search index rebuild failed, keeping the current index: {e}")
+
+    async def get(self) -> InvertedIndex:
+        if self.index is None:
+            async with self._lock:
+                if self.index is None:
+                    self.index = await self._load(allow_snapshot=True)
+                    if self.source == "database":
+                        self.save_snapshot()
+        elif time.time() >= self.refresh_at and not (self._refresh_task and not self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._reload())
+        return self.index
+
+    async def warm(self):
+        """Startup hook: load the index before the first search needs it."""
+        try:
+            await self.get()
+        except Exception as e:
+            logger.warning(f"Search index warm-up failed, will retry on first search: {e}")
+
+    def _apply(self, apply: Callable, *args):
+        if self.index is not None:
+            apply(self.index, *args)
+        if self._replay is not None:
+            self._replay.append((apply, args))
+
+    def upsert(self, doc_type: str, row: Dict[str, Any]):
+        """Apply an inserted or updated row; it needs the SOURCES columns of its type."""
+        self._apply(_apply_upsert, SOURCES[doc_type], row)
+
+    def remove(self, doc_type: str, doc_id: str):
+        self._apply(_apply_remove, SOURCES[doc_type], str(doc_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.index is not None,
+            **(self.index.stats() if self.index is not None else {}),
+            "source": self.source,
+            "partial": self.partial,
+            "age_seconds": round(time.time() - self.built_at, 1) if self.built_at else None,
+            "load_ms": round(self.load_ms, 1),
+        }
+
+def _apply_upsert(index: InvertedIndex, source: SearchSource, row: Dict[str, Any]):
+    document = source.document(row)
+    if document is None:
+        index.remove((source.doc_type, str(row["id"])))
+    else:
+        texts, payload = document
+        index.add((source.doc_type, payload["id"]), texts, source.boosts, payload)
+
+def _apply_remove(index: InvertedIndex, source: SearchSource, doc_id: str):
+    index.remove((source.doc_type, doc_id))
+
+async def refresh_document(doc_type: str, doc_id: str):
+    """
+    Re-read one row after an admin write and apply it, so partial updates index the whole row.
+    Failures are logged only: the write itself succeeded, and the next rebuild catches up.
+    Before the first build there is nothing to update, but during it the write is replayed
+    onto the new index, which may already have read the row's old version.
+    """
+    if search_index.index is None and search_index._replay is None:
+        return
+    source = SOURCES[doc_type]
+    try:
+        res = await db.table(source.table).select(source.columns).eq("id", doc_id).execute()
+        if res.data:
+            search_index.upsert(doc_type, res.data[0])
+        else:
+            search_index.remove(doc_type, doc_id)
+    except Exception as e:
+        logger.warning(f"Search index update failed for {doc_type} {doc_id}: {e}")
+
+search_index = SearchIndexManager(settings.SEARCH_INDEX_PATH, settings.SEARCH_INDEX_REFRESH_SECONDS)
+
+register_metrics("search_index", search_index.stats)
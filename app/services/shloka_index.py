@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, Optional
+from app.services.search_engine import InvertedIndex, highlight
+
+# Columns returned for each search hit; the rest of the row is only searched
+RESULT_COLUMNS = (
+    "id", "chapter_number", "verse_number", "sanskrit_text", "transliteration",
+    "hindi_translation", "english_translation", "tags",
+)
+
+def _word_by_word(row: Dict[str, Any]) -> Optional[str]:
+    words = row.get("word_by_word") or []
+    return "; ".join(
+        " ".join(w.get(part) for part in ("sanskrit", "transliteration", "hindi", "english") if w.get(part))
+        for w in words if isinstance(w, dict)
+    ) or None
+
+def _tags(row: Dict[str, Any]) -> Optional[str]:
+    return ", ".join(row.get("tags") or []) or None
+
+# Searched text of a shloka by field, with its boost. Tags are curated topics, so they
+# weigh most; meanings and word glosses repeat the translation in other words.
+FIELDS = {
+    "tags": (_tags, 2.0),
+    "english_translation": (lambda r: r.get("english_translation"), 1.0),
+    "hindi_translation": (lambda r: r.get("hindi_translation"), 1.0),
+    "sanskrit_text": (lambda r: r.get("sanskrit_text"), 1.0),
+    "transliteration": (lambda r: r.get("transliteration"), 1.0),
+    "word_by_word": (_word_by_word, 0.7),
+    "english_meaning": (lambda r: r.get("english_meaning"), 0.5),
+    "hindi_meaning": (lambda r: r.get("hindi_meaning"), 0.5),
+}
+BOOSTS = {name: boost for name, (_, boost) in FIELDS.items()}
+
+class ShlokaIndex:
+    """The shloka rows by id, and a BM25 index over every text field of them."""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = {str(row["id"]): row for row in rows}
+        self.index = InvertedIndex(facet_fields=("chapter_number",))
+        for shloka_id, row in self.rows.items():
+            texts = {name: extract(row) for name, (extract, _) in FIELDS.items()}
+            self.index.add(shloka_id, texts, BOOSTS, {"id": shloka_id, "chapter_number": row.get("chapter_number")})
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def search(self, query: str, chapter: Optional[int] = None, offset: int = 0, limit: int = 20) -> Dict[str, Any]:
+        """
+        One page of ranked shlokas, each with a `highlights` snippet per matching field,
+        plus the total and the match count per chapter (before the chapter filter).
+        """
+        result = self.index.search(
+            query, offset=offset, limit=limit,
+            filters={"chapter_number": [chapter] if chapter is not None else None},
+            facets=("chapter_number",),
+        )
+        items = []
+        for hit in result["items"]:
+            row = self.rows[hit["id"]]
+            highlights = {}
+            for name, (extract, _) in FIELDS.items():
+                snippet = highlight(extract(row), query)
+                if snippet:
+                    highlights[name] = snippet
+            items.append({
+                **{column: row.get(column) for column in RESULT_COLUMNS},
+                "score": hit["score"],
+                "highlights": highlights,
+            })
+        return {"items": items, "total": result["total"], "chapters": result["facets"]["chapter_number"]}
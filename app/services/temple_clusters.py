@@ -0,0 +1,154 @@
+import math
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.services.temple_index import TempleSpatialIndex, temple_index, fetch_temples_by_ids
+
+# Columns returned for individual map markers
+POINT_COLUMNS = "id, name, deity, city, latitude, longitude"
+MAX_MERCATOR_LAT = 85.05112878
+# Pyramids kept at once (one per deity filter in use, plus the unfiltered one)
+MAX_PYRAMIDS = 32
+
+def lng_to_x(lng: float) -> float:
+    """Web-Mercator x in [0, 1)."""
+    return (lng + 180.0) / 360.0
+
+def lat_to_y(lat: float) -> float:
+    """Web-Mercator y in [0, 1), 0 at the top."""
+    lat = math.radians(max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat)))
+    return (1.0 - math.log(math.tan(lat) + 1.0 / math.cos(lat)) / math.pi) / 2.0
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(sw_lat, sw_lng, ne_lat, ne_lng) of a slippy-map tile."""
+    n = 2 ** z
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+    return lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0
+
+def tiles_for_bounds(z: int, sw_lat: float, sw_lng: float, ne_lat: float, ne_lng: float) -> List[Tuple[int, int]]:
+    n = 2 ** z
+    x0, x1 = int(lng_to_x(sw_lng) * n), int(lng_to_x(ne_lng) * n)
+    y0, y1 = int(lat_to_y(ne_lat) * n), int(lat_to_y(sw_lat) * n)
+    clamp = lambda v: max(0, min(n - 1, v))
+    return [(x, y) for x in range(clamp(x0), clamp(x1) + 1) for y in range(clamp(y0), clamp(y1) + 1)]
+
+class ClusterPyramid:
+    """
+    Grid clusters for every zoom level from 0 to `max_zoom`, computed in one pass.
+
+    Each tile is split into `grid` x `grid` cells (`grid` = 2 ** `cell_bits`, so cell
+    coordinates are the low bits of finer ones); a cell's cluster holds its temple count,
+    centroid and per-deity counts. Cells are stored per zoom in one array sorted by
+    (tile, cell), so the clusters of any tile are a contiguous slice found by binary search.
+    """
+
+    def __init__(self, index: TempleSpatialIndex, max_zoom: int, cell_bits: int, deity: Optional[str] = None):
+        self.max_zoom = max_zoom
+        self.cell_bits = cell_bits
+        self.grid = grid = 1 << cell_bits
+        self.deity_names = {code: name for name, code in index.deity_codes.items()}
+        self.levels: Dict[int, Dict[str, np.ndarray]] = {}
+
+        slots = index.live_slots()
+        if deity:
+            code = index.deity_codes.get(deity)
+            slots = slots[index.deity[slots] == code] if code is not None else slots[:0]
+        lats, lngs, deities = index.lat[slots], index.lon[slots], index.deity[slots]
+        self.ids = index.ids[slots]
+
+        # Cell coordinates at the finest level; coarser levels are right shifts of these
+        scale = 2 ** (max_zoom + self.cell_bits)
+        clipped = np.radians(np.clip(lats, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+        gx = np.minimum((lngs + 180.0) / 360.0 * scale, scale - 1).astype(np.int64)
+        gy = np.minimum((1.0 - np.log(np.tan(clipped) + 1.0 / np.cos(clipped)) / np.pi) / 2.0 * scale, scale - 1).astype(np.int64)
+        n_deities = len(self.deity_names) + 1
+
+        for z in range(max_zoom + 1):
+            cx, cy = gx >> (max_zoom - z), gy >> (max_zoom - z)
+            tile_key = ((cx >> self.cell_bits) << z) | (cy >> self.cell_bits)
+            cell = ((cy & (grid - 1)) << self.cell_bits) | (cx & (grid - 1))
+            keys, inverse, counts = np.unique((tile_key << (2 * self.cell_bits)) | cell, return_inverse=True, return_counts=True)
+
+            first = np.empty(len(keys), dtype=np.int64)
+            first[inverse] = np.arange(len(slots))
+            # Per-deity counts as (cluster, deity) pairs sorted by cluster
+            pairs, pair_counts = np.unique(inverse * n_deities + (deities + 1), return_counts=True)
+            self.levels[z] = {
+                "keys": keys,
+                "count": counts,
+                "lat": np.bincount(inverse, weights=lats, minlength=len(keys)) / counts,
+                "lng": np.bincount(inverse, weights=lngs, minlength=len(keys)) / counts,
+                "first": first,
+                "pair_cluster": pairs // n_deities,
+                "pair_deity": pairs % n_deities - 1,
+                "pair_count": pair_counts,
+            }
+
+    def tile(self, z: int, x: int, y: int) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Clusters in the tile, plus ids of temples that sit alone in their cell."""
+        level = self.levels[z]
+        base = ((x << z) | y) << (2 * self.cell_bits)
+        lo, hi = np.searchsorted(level["keys"], [base, base + self.grid * self.grid])
+        clusters, point_ids = [], []
+        pair_lo, pair_hi = np.searchsorted(level["pair_cluster"], [lo, hi])
+        pair_cluster = level["pair_cluster"][pair_lo:pair_hi]
+        for i in range(lo, hi):
+            count = int(level["count"][i])
+            if count == 1:
+                point_ids.append(self.ids[level["first"][i]])
+                continue
+            a, b = np.searchsorted(pair_cluster, [i, i + 1])
+            deities = {
+                self.deity_names.get(int(d), "Unknown"): int(c)
+                for d, c in zip(level["pair_deity"][pair_lo + a:pair_lo + b], level["pair_count"][pair_lo + a:pair_lo + b])
+            }
+            clusters.append({
+                "lat": round(float(level["lat"][i]), 6),
+                "lng": round(float(level["lng"][i]), 6),
+                "count": count,
+                "deities": deities,
+            })
+        return clusters, point_ids
+
+# Pyramids by deity filter (least recently used first), each tagged with the index object and version it was built from
+_pyramids: "OrderedDict[Optional[str], Tuple[int, int, ClusterPyramid]]" = OrderedDict()
+
+def canonical_deity(index: TempleSpatialIndex, deity: str) -> Optional[str]:
+    """The deity name as stored in the index (matched ignoring case and spaces), or None if no temple has it."""
+    if deity in index.deity_codes:
+        return deity
+    wanted = deity.strip().casefold()
+    return next((name for name in index.deity_codes if name and name.strip().casefold() == wanted), None)
+
+def get_pyramid(index: TempleSpatialIndex, deity: Optional[str] = None) -> ClusterPyramid:
+    """
+    Pyramid for the current index contents; rebuilt lazily on the first request after a write.
+    `deity` must be a name from the index (see canonical_deity).
+    """
+    cached = _pyramids.get(deity)
+    if cached is None or cached[0] != id(index) or cached[1] != index.version:
+        cached = (id(index), index.version, ClusterPyramid(index, settings.TEMPLE_CLUSTER_MAX_ZOOM, settings.TEMPLE_CLUSTER_GRID_BITS, deity))
+        _pyramids[deity] = cached
+    _pyramids.move_to_end(deity)
+    while len(_pyramids) > MAX_PYRAMIDS:
+        _pyramids.popitem(last=False)
+    return cached[2]
+
+async def cluster_tile(z: int, x: int, y: int, deity: Optional[str] = None) -> Dict[str, Any]:
+    """
+    One map tile: cluster centroids with per-deity counts, and individual temples.
+    From TEMPLE_CLUSTER_POINTS_ZOOM upwards every temple in the tile is returned as a point.
+    """
+    index = await temple_index.get()
+    if deity:
+        deity = canonical_deity(index, deity)
+        if deity is None:
+            return {"z": z, "x": x, "y": y, "clusters": [], "points": []}
+    if z >= settings.TEMPLE_CLUSTER_POINTS_ZOOM or z > settings.TEMPLE_CLUSTER_MAX_ZOOM:
+        clusters, point_ids = [], index.within_bounds(*tile_bounds(z, x, y), deity)[0].tolist()
+    else:
+        clusters, point_ids = get_pyramid(index, deity).tile(z, x, y)
+    points = await fetch_temples_by_ids(point_ids, POINT_COLUMNS)
+    return {"z": z, "x": x, "y": y, "clusters": clusters, "points": points}
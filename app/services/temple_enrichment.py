@@ -0,0 +1,184 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.services.gemini_client import GeminiClient
+from app.utils.logger import setup_logger
+
+logger = setup_logger("temple_enrichment")
+
+# Keys requested for every temple, in the prompt's own words
+TEMPLE_KEYS_SPEC = """
+        - deity: (String) Main deity if not already correct.
+        - timings: (String) Typical opening hours (e.g. "6:00 AM - 12:00 PM, 4:00 PM - 9:00 PM").
+        - history: (String) Brief history (approx 100 words).
+        - significance: (String) Religious or architectural significance (approx 100 words).
+        - darshan_timings: (JSON Array of strings) e.g. ["Morning: 6 AM - 12 PM", "Evening: 4 PM - 9 PM"]
+        - puja_timings: (JSON Array of strings) List of daily aartis/pujas.
+        - major_festivals: (JSON Array of strings) Top 3-5 festivals celebrated here.
+        - how_to_reach: (JSON Object) keys: "by_air", "by_train", "by_road".
+        - nearby_attractions: (JSON Array of strings) 3 nearby places to visit.
+        - interesting_facts: (JSON Array of strings) 2-3 unique facts.
+        - dress_code: (String) typically "Traditional wear recommended" or specific rules.
+        - photography_allowed: (Boolean) true/false.
+        - entry_fee: (String) e.g. "Free" or amount.
+        - best_time_to_visit: (String) e.g. "October to March".
+"""
+
+# An item is accepted only if these are non-empty strings and the list keys, when present, are lists
+REQUIRED_TEXT_KEYS = ("history", "significance")
+LIST_KEYS = ("darshan_timings", "puja_timings", "major_festivals", "nearby_attractions", "interesting_facts")
+
+def build_batch_prompt(temples: List[Dict[str, Any]], keys_spec: str = TEMPLE_KEYS_SPEC) -> str:
+    records = [
+        {
+            "id": str(t["id"]),
+            "name": t["name"],
+            "city": t.get("city"),
+            "state": t.get("state"),
+            "current_deity": t.get("deity") or "Unknown",
+        }
+        for t in temples
+    ]
+    return f"""
+        Enrich the database records for these {len(records)} Hindu Temples:
+        {json.dumps(records, ensure_ascii=False, indent=2)}
+
+        Return a JSON array with exactly one object per temple, in any order. Each object must
+        contain the temple's "id" copied unchanged, plus the following keys. If information is not
+        available, provide a reasonable best guess based on general knowledge of this temple or
+        similar temples in the region, but keep it factual.
+
+        Keys:
+        {keys_spec}
+        """
+
+def validate_item(item: Any) -> bool:
+    if not isinstance(item, dict):
+        return False
+    for key in REQUIRED_TEXT_KEYS:
+        value = item.get(key)
+        if not isinstance(value, str) or not value.strip():
+            return False
+    return all(item.get(key) is None or isinstance(item[key], list) for key in LIST_KEYS)
+
+def _as_items(response: Any) -> List[Any]:
+    """The response array; also accepts the array wrapped in a single-key object, e.g. {"temples": [...]}."""
+    if isinstance(response, list):
+        return response
+    if isinstance(response, dict):
+        if "id" in response:
+            return [response]
+        lists = [v for v in response.values() if isinstance(v, list)]
+        if len(lists) == 1:
+            return lists[0]
+    raise ValueError(f"Expected a JSON array, got {type(response).__name__}")
+
+def to_update_payload(temple: Dict[str, Any], ai_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Columns written by scripts/enrich_temples.py for one enriched temple."""
+    return {
+        "deity": ai_data.get("deity", temple.get("deity")),
+        "timings": ai_data.get("timings", temple.get("timings", "Not Available")),
+        "history": ai_data.get("history"),
+        "significance": ai_data.get("significance"),
+        "darshan_timings": ai_data.get("darshan_timings"),
+        "puja_timings": ai_data.get("puja_timings", []),
+        "major_festivals": ai_data.get("major_festivals", []),
+        "how_to_reach": ai_data.get("how_to_reach"),
+        "nearby_attractions": ai_data.get("nearby_attractions", []),
+        "interesting_facts": ai_data.get("interesting_facts", []),
+        "dress_code": ai_data.get("dress_code"),
+        "photography_allowed": ai_data.get("photography_allowed"),
+        "entry_fee": ai_data.get("entry_fee"),
+        "best_time_to_visit": ai_data.get("best_time_to_visit"),
+        "enriched_at": "now()",
+        "is_ai_enriched": True,
+    }
+
+class TempleBatchEnricher:
+    """
+    Enriches temples `batch_size` at a time: one Gemini request per batch, answered with a
+    JSON array that is validated item by item.
+
+    Items that are missing or invalid are retried one temple per request; a batch whose
+    whole response is unusable (truncated, not an array, request failed) is split in half
+    and each half retried. All batches are issued at once and paced by GeminiClient's
+    per-model limiter.
+    """
+
+    def __init__(
+        self,
+        gemini: Optional[GeminiClient] = None,
+        batch_size: int = 8,
+        model: str = "flash",
+        keys_spec: str = TEMPLE_KEYS_SPEC,
+    ):
+        self.gemini = gemini or GeminiClient()
+        self.batch_size = max(1, batch_size)
+        self.model = model
+        self.keys_spec = keys_spec
+        self.stats = {"enriched": 0, "failed": 0, "requests": 0, "split_batches": 0, "retried_items": 0}
+
+    async def _request(self, temples: List[Dict[str, Any]]) -> List[Any]:
+        self.stats["requests"] += 1
+        return _as_items(await self.gemini.generate_json(build_batch_prompt(temples, self.keys_spec), model=self.model))
+
+    async def enrich_batch(self, temples: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Validated AI data by temple id; temples that could not be enriched are absent."""
+        try:
+            items = await self._request(temples)
+        except Exception as e:
+            if len(temples) == 1:
+                logger.warning(f"Enrichment failed for {temples[0].get('name')}: {e}")
+                return {}
+            self.stats["split_batches"] += 1
+            middle = len(temples) // 2
+            halves = await asyncio.gather(self.enrich_batch(temples[:middle]), self.enrich_batch(temples[middle:]))
+            return {**halves[0], **halves[1]}
+
+        wanted = {str(t["id"]) for t in temples}
+        results: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            item_id = str(item.get("id")) if isinstance(item, dict) else None
+            if item_id in wanted and item_id not in results and validate_item(item):
+                results[item_id] = item
+
+        missing = [t for t in temples if str(t["id"]) not in results]
+        if missing and len(temples) > 1:
+            self.stats["retried_items"] += len(missing)
+            retried = await asyncio.gather(*(self.enrich_batch([t]) for t in missing))
+            for result in retried:
+                results.update(result)
+        return results
+
+    async def run(
+        self,
+        temples: List[Dict[str, Any]],
+        on_enriched: Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[None]],
+    ) -> Dict[str, Any]:
+        """Enrich all `temples`, awaiting `on_enriched(temple, ai_data)` as each batch finishes."""
+        started = time.perf_counter()
+
+        async def process(batch: List[Dict[str, Any]]):
+            results = await self.enrich_batch(batch)
+            for temple in batch:
+                ai_data = results.get(str(temple["id"]))
+                if ai_data is None:
+                    self.stats["failed"] += 1
+                    continue
+                try:
+                    await on_enriched(temple, ai_data)
+                    self.stats["enriched"] += 1
+                except Exception as e:
+                    logger.error(f"Saving enrichment failed for {temple.get('name')}: {e}")
+                    self.stats["failed"] += 1
+
+        batches = [temples[i:i + self.batch_size] for i in range(0, len(temples), self.batch_size)]
+        await asyncio.gather(*(process(batch) for batch in batches))
+
+        elapsed = time.perf_counter() - started
+        return {
+            **self.stats,
+            "elapsed_seconds": round(elapsed, 1),
+            "temples_per_minute": round(self.stats["enriched"] / elapsed * 60, 1) if elapsed > 0 else None,
+        }
@@ -0,0 +1,266 @@
+import asyncio
+import itertools
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.utils.db import db
+from app.utils.geo import EARTH_RADIUS_KM, KM_PER_DEG_LAT, bounding_box, haversine_km, page_by_distance
+from app.utils.logger import setup_logger
+from app.utils.metrics import register_metrics
+
+logger = setup_logger("temple_index")
+
+INDEX_COLUMNS = "id, latitude, longitude, deity"
+LOAD_PAGE_SIZE = 1000
+INITIAL_CAPACITY = 1024
+
+class TempleSpatialIndex:
+    """
+    Temple id, latitude, longitude and deity held in flat NumPy arrays, bucketed into a
+    fixed lat/lng grid of `cell_deg` degrees.
+
+    A query only touches the rows in the grid cells overlapping its bounding box and
+    measures them in one vectorized pass. Rows are updated in place, and slots freed by
+    deletes are reused, so writes never rebuild the arrays.
+    """
+
+    def __init__(self, cell_deg: float):
+        self.cell_deg = cell_deg
+        self.ids = np.empty(INITIAL_CAPACITY, dtype=object)
+        self.size = 0  # Slots ever used; freed ones are in `_free`
+        self.lat = np.zeros(INITIAL_CAPACITY)
+        self.lon = np.zeros(INITIAL_CAPACITY)
+        self.deity = np.full(INITIAL_CAPACITY, -1, dtype=np.int32)
+        self.slots: Dict[str, int] = {}
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        self.deity_codes: Dict[str, int] = {}
+        self._free: List[int] = []
+        self.version = 0  # Bumped on every write, so derived structures know when to rebuild
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _deity_code(self, deity: Optional[str]) -> int:
+        if not deity:
+            return -1
+        return self.deity_codes.setdefault(deity, len(self.deity_codes))
+
+    def _grow(self):
+        capacity = len(self.lat) * 2
+        self.ids = np.resize(self.ids, capacity)
+        self.lat = np.resize(self.lat, capacity)
+        self.lon = np.resize(self.lon, capacity)
+        self.deity = np.resize(self.deity, capacity)
+
+    def upsert(self, temple_id: str, lat: Optional[float], lon: Optional[float], deity: Optional[str]):
+        if lat is None or lon is None:
+            self.remove(temple_id)
+            return
+        lat, lon = float(lat), float(lon)
+        slot = self.slots.get(temple_id)
+        if slot is not None:
+            self._unlink(slot)
+        elif self._free:
+            slot = self._free.pop()
+        else:
+            slot = self.size
+            if slot == len(self.lat):
+                self._grow()
+            self.size += 1
+        self.slots[temple_id] = slot
+        self.ids[slot] = temple_id
+        self.lat[slot], self.lon[slot] = lat, lon
+        self.deity[slot] = self._deity_code(deity)
+        self.cells.setdefault(self._cell(lat, lon), []).append(slot)
+        self.version += 1
+
+    def _unlink(self, slot: int):
+        cell = self._cell(self.lat[slot], self.lon[slot])
+        self.cells[cell].remove(slot)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def remove(self, temple_id: str):
+        slot = self.slots.pop(temple_id, None)
+        if slot is None:
+            return
+        self._unlink(slot)
+        self.ids[slot] = None
+        self._free.append(slot)
+        self.version += 1
+
+    def live_slots(self) -> np.ndarray:
+        return np.fromiter(self.slots.values(), dtype=np.int64, count=len(self.slots))
+
+    def distances_to(self, lat: float, lon: float, temple_ids: List[str]) -> np.ndarray:
+        """Distances in km from the point to each temple; NaN for temples not in the index."""
+        slots = np.array([self.slots.get(str(i), -1) for i in temple_ids], dtype=np.int64)
+        known = slots >= 0
+        distances = np.full(len(slots), np.nan)
+        distances[known] = haversine_km(lat, lon, self.lat[slots[known]], self.lon[slots[known]])
+        return distances
+
+    def _candidates(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> np.ndarray:
+        (row_min, col_min), (row_max, col_max) = self._cell(lat_min, lon_min), self._cell(lat_max, lon_max)
+        span = (row_max - row_min + 1) * (col_max - col_min + 1)
+        if span <= len(self.cells):
+            keys = (k for k in itertools.product(range(row_min, row_max + 1), range(col_min, col_max + 1)) if k in self.cells)
+        else:
+            # Wide viewports: walking the occupied cells is cheaper than walking the box
+            keys = (k for k in self.cells if row_min <= k[0] <= row_max and col_min <= k[1] <= col_max)
+        return np.fromiter(itertools.chain.from_iterable(self.cells[k] for k in keys), dtype=np.int64)
+
+    def _filter_deity(self, slots: np.ndarray, deity: Optional[str]) -> np.ndarray:
+        if not deity:
+            return slots
+        code = self.deity_codes.get(deity)
+        if code is None:
+            return slots[:0]
+        return slots[self.deity[slots] == code]
+
+    def within_radius(self, lat: float, lon: float, radius_km: float, deity: Optional[str] = None,
+                      offset: int = 0, limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Ids within `radius_km` of the point, nearest first, with their distances in km, and
+        the total number in range. With `limit` only that page is ranked and returned.
+        """
+        lat_min, lat_max, lon_min, lon_max = bounding_box(lat, lon, radius_km)
+        slots = self._filter_deity(self._candidates(lat_min, lat_max, lon_min, lon_max), deity)
+        distances = haversine_km(lat, lon, self.lat[slots], self.lon[slots])
+        inside = distances <= radius_km
+        slots, distances = slots[inside], distances[inside]
+        order = page_by_distance(distances, offset, limit) if limit is not None else np.argsort(distances, kind="stable")[offset:]
+        return self.ids[slots[order]], distances[order], len(slots)
+
+    def nearest(self, lat: float, lon: float, k: int, deity: Optional[str] = None,
+                max_radius_km: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """The `k` nearest ids, searched in widening rings until k are found inside the ring."""
+        limit = max_radius_km or math.pi * EARTH_RADIUS_KM
+        radius = min(self.cell_deg * KM_PER_DEG_LAT, limit)
+        while True:
+            ids, distances, total = self.within_radius(lat, lon, radius, deity, limit=k)
+            if total >= k or radius >= limit or total == len(self):
+                return ids, distances
+            radius = min(radius * 2, limit)
+
+    def within_bounds(self, sw_lat: float, sw_lng: float, ne_lat: float, ne_lng: float, deity: Optional[str] = None,
+                      offset: int = 0, limit: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        """Ids inside the box, nearest to its centre first, and their total; with `limit` only that page."""
+        slots = self._filter_deity(self._candidates(sw_lat, ne_lat, sw_lng, ne_lng), deity)
+        lats, lons = self.lat[slots], self.lon[slots]
+        inside = (lats >= sw_lat) & (lats <= ne_lat) & (lons >= sw_lng) & (lons <= ne_lng)
+        slots = slots[inside]
+        distances = haversine_km((sw_lat + ne_lat) / 2, (sw_lng + ne_lng) / 2, self.lat[slots], self.lon[slots])
+        order = page_by_distance(distances, offset, limit) if limit is not None else np.argsort(distances, kind="stable")[offset:]
+        return self.ids[slots[order]], len(slots)
+
+class TempleIndexManager:
+    """
+    Process-wide index, loaded from the temples table on first use.
+
+    The admin write routes apply their changes incrementally. Each app process has its
+    own copy, so writes made elsewhere (other workers, scripts) show up after the
+    periodic reload every TEMPLE_INDEX_REFRESH_SECONDS; the reload runs in the
+    background while the current index keeps serving.
+    """
+
+    def __init__(self, cell_deg: float, refresh_seconds: int):
+        self.cell_deg = cell_deg
+        self.refresh_seconds = refresh_seconds
+        self.index: Optional[TempleSpatialIndex] = None
+        self.loaded_at = 0.0
+        self.load_ms = 0.0
+        self._lock = asyncio.Lock()
+        self._replay: Optional[List[Tuple[str, tuple]]] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def _build(self) -> TempleSpatialIndex:
+        start = time.perf_counter()
+        self._replay = []
+        try:
+            index = TempleSpatialIndex(self.cell_deg)
+            offset = 0
+            while True:
+                res = await db.table("temples").select(INDEX_COLUMNS)\
+                    .order("id").range(offset, offset + LOAD_PAGE_SIZE - 1).execute()
+                for row in res.data:
+                    index.upsert(str(row["id"]), row.get("latitude"), row.get("longitude"), row.get("deity"))
+                if len(res.data) < LOAD_PAGE_SIZE:
+                    break
+                offset += LOAD_PAGE_SIZE
+            # Writes that landed while the pages were being read
+            for op, args in self._replay:
+                getattr(index, op)(*args)
+        finally:
+            self._replay = None
+        self.load_ms = (time.perf_counter() - start) * 1000
+        self.loaded_at = time.time()
+        logger.info(f"Temple index loaded: {len(index)} temples in {len(index.cells)} cells, {self.load_ms:.0f}ms")
+        return index
+
+    async def _reload(self):
+        async with self._lock:
+            try:
+                self.index = await self._build()
+            except Exception as e:
+                logger.warning(f"Temple index reload failed: {e}")
+
+    async def get(self) -> TempleSpatialIndex:
+        if self.index is None:
+            async with self._lock:
+                if self.index is None:
+                    self.index = await self._build()
+        elif time.time() - self.loaded_at > self.refresh_seconds and not (self._refresh_task and not self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._reload())
+        return self.index
+
+    def _apply(self, op: str, *args):
+        if self.index is not None:
+            getattr(self.index, op)(*args)
+        if self._replay is not None:
+            self._replay.append((op, args))
+
+    def upsert(self, temple: Dict[str, Any]):
+        """Apply an inserted or updated row; fields missing from a partial update keep their indexed values."""
+        temple_id = str(temple["id"])
+        current = {}
+        if self.index is not None and temple_id in self.index.slots:
+            slot = self.index.slots[temple_id]
+            codes = {code: name for name, code in self.index.deity_codes.items()}
+            current = {
+                "latitude": float(self.index.lat[slot]),
+                "longitude": float(self.index.lon[slot]),
+                "deity": codes.get(int(self.index.deity[slot])),
+            }
+        merged = {**current, **{k: v for k, v in temple.items() if k in ("latitude", "longitude", "deity")}}
+        self._apply("upsert", temple_id, merged.get("latitude"), merged.get("longitude"), merged.get("deity"))
+
+    def remove(self, temple_id: str):
+        self._apply("remove", str(temple_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.index is not None,
+            "temples": len(self.index) if self.index is not None else 0,
+            "cells": len(self.index.cells) if self.index is not None else 0,
+            "age_seconds": round(time.time() - self.loaded_at, 1) if self.loaded_at else None,
+            "load_ms": round(self.load_ms, 1),
+        }
+
+temple_index = TempleIndexManager(settings.TEMPLE_INDEX_CELL_DEG, settings.TEMPLE_INDEX_REFRESH_SECONDS)
+
+register_metrics("temple_index", temple_index.stats)
+
+async def fetch_temples_by_ids(ids: List[str], columns: str = "*", chunk_size: int = 100) -> List[Dict[str, Any]]:
+    """Full rows for `ids`, in the same order; ids that no longer exist are skipped."""
+    if not ids:
+        return []
+    chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+    results = await asyncio.gather(*(db.table("temples").select(columns).in_("id", chunk).execute() for chunk in chunks))
+    by_id = {str(row["id"]): row for res in results for row in res.data}
+    return [by_id[i] for i in ids if i in by_id]
@@ -0,0 +1,228 @@
+import asyncio
+import base64
+import inspect
+import json
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Dict, Optional, Set
+from fastapi.responses import Response
+from app.config import settings
+from app.utils.compression import ENCODINGS, BEST, accepted_encoding, compress, is_compressible, representation_etag
+from app.utils.conditional import cache_headers, content_etag, is_not_modified, not_modified_response
+from app.utils.redis_client import redis_client
+from app.utils.logger import setup_logger
+
+logger = setup_logger("cache")
+
+KEY_PREFIX = "cache"
+
+class LRUCacheBackend:
+    """In-process fallback used when Upstash Redis is not configured."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: int):
+        self._entries[key] = (value, time.time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def delete_prefix(self, prefix: str):
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
+
+class RedisCacheBackend:
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl: int):
+        await self.client.set(key, value, ex=ttl)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*keys)
+
+    async def delete_prefix(self, prefix: str):
+        cursor = 0
+        while True:
+            cursor, keys = await self.client.scan(cursor, match=f"{prefix}*", count=500)
+            if keys:
+                await self.client.delete(*keys)
+            if not cursor or int(cursor) == 0:
+                break
+
+def get_cache_backend():
+    if redis_client is not None:
+        return RedisCacheBackend(redis_client)
+    return LRUCacheBackend(settings.CACHE_LRU_MAX_ENTRIES)
+
+backend = get_cache_backend()
+
+# Keys currently being refreshed in the background, and the tasks doing it (kept to avoid GC)
+_refreshing: Set[str] = set()
+_background_tasks: Set[asyncio.Task] = set()
+
+def build_key(namespace: str, key_template: str, params: Dict[str, Any]) -> str:
+    rendered = key_template.format(**{k: "" if v is None else v for k, v in params.items()})
+    return f"{KEY_PREFIX}:{namespace}:{rendered}"
+
+def _encode_variants(body: bytes, media_type: Optional[str]) -> Dict[str, str]:
+    """Every compressed form of a body worth compressing, base64 so entries stay JSON strings."""
+    if len(body) < settings.COMPRESSION_MIN_BYTES or not is_compressible(media_type):
+        return {}
+    return {encoding: base64.b64encode(compress(body, encoding, BEST)).decode() for encoding in ENCODINGS}
+
+async def _store(key: str, response: Response, ttl: int, stale_ttl: int, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    stored_at = time.time()
+    # Compressed and hashed once here, so hits are served without recompressing
+    encoded, etag = await asyncio.to_thread(
+        lambda: (_encode_variants(response.body, response.media_type), content_etag(response.body))
+    )
+    # A refresh that produced the same content keeps its Last-Modified
+    unchanged = previous is not None and previous.get("etag") == etag
+    entry = {
+        "body": response.body.decode("utf-8"),
+        "media_type": response.media_type,
+        "encoded": encoded,
+        "etag": etag,
+        "last_modified": previous.get("last_modified", stored_at) if unchanged else stored_at,
+        "stored_at": stored_at,
+        "ttl": ttl,
+    }
+    await backend.set(key, json.dumps(entry), ttl + stale_ttl)
+    return entry
+
+def _to_response(entry: Dict[str, Any], state: str, stale_ttl: Optional[int] = None) -> Response:
+    """
+    The cached response, or an empty 304 when the client's validators still match.
+    `stale_ttl` (http_cache routes) adds a Cache-Control for the entry's remaining freshness.
+    """
+    encoding = accepted_encoding.get()
+    encoded = entry.get("encoded") or {}
+    served = encoding if encoding in encoded else None
+    etag = representation_etag(entry["etag"], served) if entry.get("etag") else None
+    max_age = entry["ttl"] - (time.time() - entry["stored_at"]) if stale_ttl is not None else None
+    headers = {"X-Cache": state, **cache_headers(etag, entry.get("last_modified"), max_age, stale_ttl or 0)}
+    if encoded:
+        headers["Vary"] = ", ".join(filter(None, (headers.get("Vary"), "Accept-Encoding")))
+    if is_not_modified(etag, entry.get("last_modified")):
+        return not_modified_response(headers)
+    if served:
+        headers["Content-Encoding"] = served
+        content = base64.b64decode(encoded[served])
+    else:
+        content = entry["body"]
+    return Response(
+        content=content,
+        status_code=200,
+        media_type=entry.get("media_type") or "application/json",
+        headers=headers,
+    )
+
+def _schedule_refresh(key: str, produce, ttl: int, stale_ttl: int, previous: Dict[str, Any]):
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+
+    async def refresh():
+        try:
+            response = await produce()
+            if response.status_code == 200:
+                await _store(key, response, ttl, stale_ttl, previous)
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {key}: {e}")
+        finally:
+            _refreshing.discard(key)
+
+    task = asyncio.create_task(refresh())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+def cached(namespace: str, key: str, ttl: int, stale_ttl: int = 0, http_cache: bool = False):
+    """
+    Cache successful (200) responses of a route handler.
+
+    `key` is a format template over the handler's parameters, e.g. "{date}:{city}".
+    Entries are fresh for `ttl` seconds; for a further `stale_ttl` seconds they are
+    still served immediately while a background task refreshes them.
+
+    Responses carry an ETag (a hash of the content) and Last-Modified, and a request
+    whose If-None-Match / If-Modified-Since still matches gets a 304 straight from the
+    entry. `http_cache` routes also send Cache-Control with the same freshness, so clients
+    (and a CDN, with HTTP_CACHE_PUBLIC) can serve them and revalidate in the background.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        http_stale_ttl = stale_ttl if http_cache else None
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not settings.CACHE_ENABLED:
+                return await func(*args, **kwargs)
+
+            bound = signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            cache_key = build_key(namespace, key, bound.arguments)
+
+            try:
+                raw = await backend.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Cache read failed for {cache_key}: {e}")
+                raw = None
+
+            if raw:
+                entry = json.loads(raw)
+                if time.time() - entry["stored_at"] < entry["ttl"]:
+                    return _to_response(entry, "HIT", http_stale_ttl)
+                _schedule_refresh(cache_key, lambda: func(*args, **kwargs), ttl, stale_ttl, entry)
+                return _to_response(entry, "STALE", http_stale_ttl)
+
+            response = await func(*args, **kwargs)
+            if response.status_code == 200:
+                try:
+                    entry = await _store(cache_key, response, ttl, stale_ttl)
+                    # Identity ETag; CompressionMiddleware suffixes it if it compresses the body
+                    response.headers.update(cache_headers(
+                        entry["etag"], entry["last_modified"], ttl if http_cache else None, stale_ttl
+                    ))
+                except Exception as e:
+                    logger.warning(f"Cache write failed for {cache_key}: {e}")
+                response.headers["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+    return decorator
+
+async def invalidate(namespace: str, key: Optional[str] = None, **params):
+    """
+    Drop cached entries after a write.
+    With `key` (and its params) only that entry goes; without it the whole namespace is cleared.
+    """
+    try:
+        if key is None:
+            await backend.delete_prefix(f"{KEY_PREFIX}:{namespace}:")
+        else:
+            await backend.delete(build_key(namespace, key, params))
+    except Exception as e:
+        logger.warning(f"Cache invalidation failed for {namespace}: {e}")
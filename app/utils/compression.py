@@ -0,0 +1,117 @@
+import gzip
+from contextvars import ContextVar
+from typing import Dict, Optional
+import brotli
+from app.config import settings
+
+# Encodings we produce, best first when a client accepts several equally
+ENCODINGS = ("br", "gzip")
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+# Per-response compression favours speed; bodies stored in the response cache are
+# compressed once, so they get the slower, smaller setting
+FAST = {"br": 4, "gzip": 6}
+BEST = {"br": 9, "gzip": 9}
+
+# Encoding negotiated for the current request (None for identity), set by CompressionMiddleware
+accepted_encoding: ContextVar[Optional[str]] = ContextVar("accepted_encoding", default=None)
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The preferred encoding of ENCODINGS allowed by an Accept-Encoding header, honouring q-values."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    best = max(ENCODINGS, key=lambda e: weights.get(e, wildcard))
+    return best if weights.get(best, wildcard) > 0 else None
+
+def compress(body: bytes, encoding: str, levels: Dict[str, int] = FAST) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=levels["br"])
+    return gzip.compress(body, compresslevel=levels["gzip"], mtime=0)
+
+def representation_etag(etag: str, encoding: Optional[str]) -> str:
+    """The ETag of the `encoding` form of a body: each content-coding is its own representation."""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+def is_compressible(media_type: Optional[str]) -> bool:
+    return bool(media_type) and media_type.startswith(COMPRESSIBLE_TYPES)
+
+class CompressionMiddleware:
+    """
+    Compresses complete responses of a compressible type and at least `minimum_size`
+    bytes with brotli or gzip, whichever the client prefers. Responses that already
+    carry a Content-Encoding (precompressed cache hits) and streamed responses pass
+    through untouched. The negotiated encoding is published in `accepted_encoding`
+    so handlers and the response cache can serve precompressed bodies.
+    """
+
+    def __init__(self, app, minimum_size: int = settings.COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        token = accepted_encoding.set(encoding)
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] in (204, 304):
+                    # No body to compress (and no Content-Length to add)
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            response_headers = [(k, v) for k, v in start["headers"] if k.lower() != b"content-length"]
+            names = {k.lower() for k, _ in response_headers}
+            content_type = next((v.decode("latin-1") for k, v in response_headers if k.lower() == b"content-type"), None)
+            eligible = (
+                not message.get("more_body", False)
+                and b"content-encoding" not in names
+                and len(body) >= self.minimum_size
+                and is_compressible(content_type)
+            )
+            if eligible:
+                if encoding:
+                    body = compress(body, encoding)
+                    response_headers = [
+                        (k, representation_etag(v.decode("latin-1"), encoding).encode("latin-1") if k.lower() == b"etag" else v)
+                        for k, v in response_headers
+                    ]
+                    response_headers.append((b"content-encoding", encoding.encode()))
+                vary = [v for k, v in response_headers if k.lower() == b"vary"]
+                if not any(b"accept-encoding" in v.lower() for v in vary):
+                    response_headers = [(k, v) for k, v in response_headers if k.lower() != b"vary"]
+                    response_headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+            if not message.get("more_body", False):
+                response_headers.append((b"content-length", str(len(body)).encode()))
+                await send({**start, "headers": response_headers})
+                await send({**message, "body": body})
+            else:
+                # Streaming: the rest of the body goes out as produced, unchanged
+                await send(start)
+                await send(message)
+            start = None
+
+        try:
+            await self.app(scope, receive, send_compressed)
+        finally:
+            accepted_encoding.reset(token)
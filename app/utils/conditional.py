@@ -0,0 +1,138 @@
+import hashlib
+from contextvars import ContextVar
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+import orjson
+from fastapi.responses import Response
+from app.config import settings
+from app.utils.compression import ENCODINGS
+
+# (If-None-Match, If-Modified-Since) of the current request, set by ConditionalGetMiddleware
+request_validators: ContextVar[Tuple[Optional[str], Optional[str]]] = ContextVar("request_validators", default=(None, None))
+
+def content_etag(body: bytes) -> str:
+    """
+    Strong ETag for a JSON response body. The envelope's `timestamp` changes on every
+    render, so it is left out of the hash: rebuilding the same data gives the same tag.
+    """
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        payload = None
+    if isinstance(payload, dict):
+        payload.pop("timestamp", None)
+        body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def _identity_etag(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for encoding in ENCODINGS:
+        if tag.endswith(f'-{encoding}"'):
+            return tag[:-len(encoding) - 2] + '"'
+    return tag
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+def is_not_modified(etag: Optional[str], last_modified: Optional[float] = None) -> bool:
+    """
+    Whether the current request's validators still match. If-None-Match wins when both
+    are sent; tags are compared ignoring the content-coding suffix, so a client that
+    cached the gzip form still revalidates against the same data.
+    """
+    if_none_match, if_modified_since = request_validators.get()
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        current = _identity_etag(etag)
+        return any(tag.strip() == "*" or _identity_etag(tag) == current for tag in if_none_match.split(","))
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+def cache_headers(
+    etag: Optional[str],
+    last_modified: Optional[float] = None,
+    max_age: Optional[int] = None,
+    stale_while_revalidate: int = 0,
+) -> Dict[str, str]:
+    """
+    Validator headers, plus a Cache-Control when `max_age` is given. These routes need an
+    API key, so responses are `private` (the app's own HTTP cache only) unless
+    HTTP_CACHE_PUBLIC lets a shared CDN store them; they then vary on X-API-Key, so the
+    CDN never answers a request without the key from a response fetched with it.
+    """
+    headers = {}
+    if etag:
+        headers["ETag"] = etag
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    if max_age is not None:
+        scope = "public" if settings.HTTP_CACHE_PUBLIC else "private"
+        headers["Cache-Control"] = f"{scope}, max-age={max(int(max_age), 0)}, stale-while-revalidate={stale_while_revalidate}"
+        if settings.HTTP_CACHE_PUBLIC:
+            headers["Vary"] = "X-API-Key"
+    return headers
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+class ConditionalGetMiddleware:
+    """
+    Publishes the request's If-None-Match / If-Modified-Since in `request_validators`,
+    so the response cache and handlers can answer 304 before building a body. A full
+    200 GET whose ETag or Last-Modified still matches (a cache miss) is also sent as
+    an empty 304 here, so the client never downloads a body it already has.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        validators = tuple(
+            headers[name].decode("latin-1") if name in headers else None
+            for name in (b"if-none-match", b"if-modified-since")
+        )
+        if validators == (None, None):
+            await self.app(scope, receive, send)
+            return
+        token = request_validators.set(validators)
+        suppress = False
+
+        async def send_conditional(message):
+            nonlocal suppress
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                response_headers = {k.lower(): v.decode("latin-1") for k, v in message["headers"]}
+                last_modified = response_headers.get(b"last-modified")
+                try:
+                    modified_at = parsedate_to_datetime(last_modified).timestamp() if last_modified else None
+                except (TypeError, ValueError):
+                    modified_at = None
+                if is_not_modified(response_headers.get(b"etag"), modified_at):
+                    suppress = True
+                    dropped = (b"content-length", b"content-type", b"content-encoding")
+                    message = {
+                        **message,
+                        "status": 304,
+                        "headers": [(k, v) for k, v in message["headers"] if k.lower() not in dropped],
+                    }
+            elif message["type"] == "http.response.body" and suppress:
+                if message.get("more_body", False):
+                    return
+                message = {"type": "http.response.body", "body": b""}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_conditional)
+        finally:
+            request_validators.reset(token)
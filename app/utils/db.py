@@ -0,0 +1,53 @@
+from typing import Optional
+import httpx
+from postgrest import AsyncPostgrestClient
+from app.config import settings
+
+PLACEHOLDER_URL = "https://placeholder.supabase.co"
+PLACEHOLDER_KEY = "placeholder"
+
+def build_http_client(base_url: str, key: str) -> httpx.AsyncClient:
+    """
+    Shared keep-alive pool for PostgREST traffic.
+    Every router talks to the same Supabase host, so the pool limits double as per-host limits.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.DB_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.DB_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.DB_POOL_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers={
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        },
+        limits=limits,
+        timeout=httpx.Timeout(settings.DB_TIMEOUT_SECONDS),
+        http2=settings.DB_HTTP2,
+        follow_redirects=True,
+    )
+
+def build_db_client(url: str, key: str) -> AsyncPostgrestClient:
+    rest_url = f"{url.rstrip('/')}/rest/v1"
+    return AsyncPostgrestClient(
+        rest_url,
+        headers={"apikey": key, "Authorization": f"Bearer {key}"},
+        http_client=build_http_client(rest_url, key),
+    )
+
+def get_db_client() -> AsyncPostgrestClient:
+    url = settings.SUPABASE_URL
+    key = settings.SUPABASE_KEY
+    if not url or not key:
+        # Fallback for build/test environments without credentials
+        return build_db_client(PLACEHOLDER_URL, PLACEHOLDER_KEY)
+    return build_db_client(url, key)
+
+# Async drop-in for `supabase.table(...)`: same query builder, but `.execute()` must be awaited
+db = get_db_client()
+
+async def close_db_client(client: Optional[AsyncPostgrestClient] = None):
+    await (client or db).aclose()
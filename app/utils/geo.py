@@ -0,0 +1,40 @@
+import math
+from typing import Optional, Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.0
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km from one point to arrays of points, in one vectorized pass."""
+    lat_r, lon_r = math.radians(lat), math.radians(lon)
+    lats_r, lons_r = np.radians(lats), np.radians(lons)
+    a = np.sin((lats_r - lat_r) / 2) ** 2 + math.cos(lat_r) * np.cos(lats_r) * np.sin((lons_r - lon_r) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(lat_min, lat_max, lon_min, lon_max) enclosing the circle of `radius_km` around the point."""
+    lat_delta = radius_km / KM_PER_DEG_LAT
+    lon_delta = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta
+
+def nearest_order(distances: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+    """
+    Positions of the `limit` smallest distances, nearest first (all of them when `limit` is None).
+
+    Only the selected prefix is sorted: `argpartition` finds it in linear time. Ties are
+    broken by position, and every candidate tied with the last selected distance is kept
+    until the final cut, so consecutive pages never repeat or skip a row.
+    """
+    n = len(distances)
+    if limit is None or limit >= n:
+        return np.argsort(distances, kind="stable")
+    if limit <= 0:
+        return np.empty(0, dtype=np.int64)
+    kth = distances[np.argpartition(distances, limit - 1)[limit - 1]]
+    selected = np.flatnonzero(distances <= kth)
+    return selected[np.argsort(distances[selected], kind="stable")][:limit]
+
+def page_by_distance(distances: np.ndarray, offset: int, limit: int) -> np.ndarray:
+    """Positions for one page of a nearest-first listing, without sorting beyond the page."""
+    return nearest_order(distances, offset + limit)[offset:]
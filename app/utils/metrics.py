@@ -0,0 +1,10 @@
+from typing import Any, Callable, Dict
+
+# name -> zero-arg callable returning a JSON-serialisable snapshot
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+def register_metrics(name: str, provider: Callable[[], Dict[str, Any]]):
+    _providers[name] = provider
+
+def collect_metrics() -> Dict[str, Any]:
+    return {name: provider() for name, provider in _providers.items()}
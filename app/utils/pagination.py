@@ -0,0 +1,108 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.utils.cache import KEY_PREFIX, backend
+from app.utils.logger import setup_logger
+from app.utils.singleflight import get_singleflight
+
+logger = setup_logger("pagination")
+
+# List order: newest first, with id breaking ties between rows created in the same instant
+SORT_COLUMN = "created_at"
+TIE_BREAKER = "id"
+
+count_flight = get_singleflight("list_counts")
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Opaque, URL-safe token for the sort key of the last row of a page."""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, keys: Tuple[str, ...]) -> Dict[str, Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(values, dict) or set(values) != set(keys):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+def _quote(value: Any) -> str:
+    """A value inside a PostgREST `or` filter, where commas and parentheses are syntax."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+async def fetch_page(
+    query,
+    cursor: Optional[str],
+    limit: int,
+    offset: int = 0,
+    sort_column: str = SORT_COLUMN,
+    desc: bool = True,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of `query` (a select that includes `sort_column` and `id`) in
+    (sort_column, id) order, and the cursor of the next page (None on the last page).
+
+    With a cursor the page starts right after the row it was taken from, using a
+    condition on the sort key that an index on (sort_column, id) answers directly, so
+    every page costs the same however deep it is. Without one the page starts at
+    `offset`, for clients still paging by number. Rows with a NULL sort value come last.
+    """
+    query = query.order(sort_column, desc=desc, nullsfirst=False).order(TIE_BREAKER, desc=desc)
+    if cursor:
+        after = decode_cursor(cursor, (sort_column, TIE_BREAKER))
+        op = "lt" if desc else "gt"
+        last_id = after[TIE_BREAKER]
+        if after[sort_column] is None:
+            query = query.is_(sort_column, "null").filter(TIE_BREAKER, op, last_id)
+        else:
+            value = _quote(after[sort_column])
+            query = query.or_(
+                f"{sort_column}.{op}.{value},"
+                f"and({sort_column}.eq.{value},{TIE_BREAKER}.{op}.{_quote(last_id)}),"
+                f"{sort_column}.is.null"
+            )
+        res = await query.limit(limit + 1).execute()
+    else:
+        # One extra row tells whether another page follows
+        res = await query.range(offset, offset + limit).execute()
+
+    rows = res.data or []
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor({sort_column: last.get(sort_column), TIE_BREAKER: last[TIE_BREAKER]})
+
+async def estimated_count(key: str, query) -> Optional[int]:
+    """
+    Row count for a list and its filters, cached for LIST_COUNT_TTL_SECONDS under `key`.
+    `query` is a `select(..., count="estimated", head=True)` with the list's filters:
+    exact for small results, the planner's estimate for large ones. It is only executed
+    on a cache miss, and concurrent misses share one execution. None if it failed.
+    """
+    cache_key = f"{KEY_PREFIX}:counts:{key}"
+    try:
+        raw = await backend.get(cache_key)
+        if raw is not None:
+            return json.loads(raw)
+    except Exception as e:
+        logger.warning(f"Count cache read failed for {key}: {e}")
+
+    async def compute():
+        total = (await query.execute()).count
+        try:
+            await backend.set(cache_key, json.dumps(total), settings.LIST_COUNT_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"Count cache write failed for {key}: {e}")
+        return total
+
+    try:
+        return await count_flight.do(cache_key, compute)
+    except Exception as e:
+        logger.warning(f"Count failed for {key}: {e}")
+        return None
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from app.config import settings
+from app.utils.logger import setup_logger
+from app.utils.metrics import register_metrics
+
+logger = setup_logger("prompt_cache")
+
+KEY_PREFIX = "gemini"
+
+def prompt_key(model: str, prompt: str, generation_config: Dict[str, Any]) -> str:
+    """Content address of one request: the same model, prompt and config always map to the same key."""
+    material = json.dumps({"model": model, "prompt": prompt, "config": generation_config}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class SQLitePromptCache:
+    """
+    Local file cache for scripts that are re-run after partial failures.
+    Entries expire after `ttl` seconds; past `max_entries` the least recently used go first.
+    Queries run in a worker thread, one at a time on the shared connection.
+    """
+
+    def __init__(self, path: str, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS prompt_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, latency_ms REAL NOT NULL,"
+            " created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS prompt_cache_last_used ON prompt_cache (last_used_at)")
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[Tuple[str, float]]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, latency_ms: float):
+        await asyncio.to_thread(self._set, key, value, latency_ms)
+
+    def _get(self, key: str) -> Optional[Tuple[str, float]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, latency_ms, created_at FROM prompt_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, latency_ms, created_at = row
+            if created_at + self.ttl <= now:
+                self._conn.execute("DELETE FROM prompt_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE prompt_cache SET last_used_at = ? WHERE key = ?", (now, key))
+            return value, latency_ms
+
+    def _set(self, key: str, value: str, latency_ms: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prompt_cache (key, value, latency_ms, created_at, last_used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, latency_ms, now, now),
+            )
+            self._conn.execute("DELETE FROM prompt_cache WHERE created_at <= ?", (now - self.ttl,))
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM prompt_cache").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM prompt_cache WHERE key IN "
+                    "(SELECT key FROM prompt_cache ORDER BY last_used_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+class RedisPromptCache:
+    """
+    Shared cache on Upstash Redis. Redis expires entries after `ttl`; a sorted set of
+    last-use times keeps the entry count at `max_entries` by evicting the oldest.
+    """
+
+    def __init__(self, client, ttl: int, max_entries: int):
+        self.client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lru_key = f"{KEY_PREFIX}:lru"
+
+    async def get(self, key: str) -> Optional[Tuple[str, float]]:
+        raw = await self.client.get(f"{KEY_PREFIX}:{key}")
+        if raw is None:
+            return None
+        await self.client.zadd(self.lru_key, {key: time.time()})
+        entry = json.loads(raw)
+        return entry["value"], entry["latency_ms"]
+
+    async def set(self, key: str, value: str, latency_ms: float):
+        await self.client.set(f"{KEY_PREFIX}:{key}", json.dumps({"value": value, "latency_ms": latency_ms}), ex=self.ttl)
+        await self.client.zadd(self.lru_key, {key: time.time()})
+        overflow = await self.client.zcard(self.lru_key) - self.max_entries
+        if overflow > 0:
+            evicted = await self.client.zpopmin(self.lru_key, overflow)
+            members = [member for member, _ in evicted]
+            if members:
+                await self.client.delete(*(f"{KEY_PREFIX}:{member}" for member in members))
+
+class PromptCache:
+    """Backend plus hit/miss accounting. Lookup and write failures are logged and treated as misses."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.saved_latency_ms = 0.0
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            entry = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Prompt cache read failed: {e}")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        value, latency_ms = entry
+        self.hits += 1
+        self.saved_latency_ms += latency_ms
+        return value
+
+    async def set(self, key: str, value: str, latency_ms: float):
+        try:
+            await self.backend.set(key, value, latency_ms)
+            self.writes += 1
+        except Exception as e:
+            logger.warning(f"Prompt cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "saved_latency_ms": round(self.saved_latency_ms, 1),
+        }
+
+def get_prompt_cache() -> Optional[PromptCache]:
+    """The cache selected by GEMINI_CACHE_BACKEND ("sqlite" or "redis"), or None when caching is off."""
+    backend_name = settings.GEMINI_CACHE_BACKEND
+    if backend_name == "sqlite":
+        backend = SQLitePromptCache(settings.GEMINI_CACHE_PATH, settings.GEMINI_CACHE_TTL_SECONDS, settings.GEMINI_CACHE_MAX_ENTRIES)
+    elif backend_name == "redis":
+        from app.utils.redis_client import redis_client
+        if redis_client is None:
+            logger.warning("GEMINI_CACHE_BACKEND=redis but Upstash Redis is not configured; prompt cache disabled")
+            return None
+        backend = RedisPromptCache(redis_client, settings.GEMINI_CACHE_TTL_SECONDS, settings.GEMINI_CACHE_MAX_ENTRIES)
+    else:
+        return None
+    return PromptCache(backend)
+
+prompt_cache = get_prompt_cache()
+
+if prompt_cache is not None:
+    register_metrics("gemini_cache", prompt_cache.stats)
@@ -0,0 +1,47 @@
+import asyncio
+import time
+from typing import Optional
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per `per` seconds, bursting up to `capacity`.
+
+    `acquire()` waits until enough tokens are available, so callers sharing one bucket
+    are spread out to the configured rate regardless of how many of them there are.
+    """
+
+    def __init__(self, rate: float, per: float = 60.0, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate / per
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, tokens: float = 1.0):
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of capacity {self.capacity}")
+        # The lock keeps waiters in FIFO order, so one large request is not starved by small ones
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def debit(self, tokens: float):
+        """Charge tokens without waiting; the balance may go negative, delaying later acquires."""
+        self._refill()
+        self._tokens -= tokens
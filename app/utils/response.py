@@ -1,9 +1,20 @@
 from typing import Any, Optional
 from fastapi.responses import JSONResponse
 from datetime import datetime
+import orjson
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson: several times faster than the stdlib on large
+    payloads (month panchang, blog HTML). Non-string dict keys (e.g. chapter numbers) are
+    written as strings, as the stdlib does, and NumPy values are serialized directly.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
 
 def success_response(data: Any = None, message: str = "Success") -> JSONResponse:
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=200,
         content={
             "status": "ok",
@@ -14,7 +25,7 @@ def success_response(data: Any = None, message: str = "Success") -> JSONResponse
     )
 
 def error_response(message: str, code: int = 400) -> JSONResponse:
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=code,
         content={
             "success": False,
@@ -1,10 +1,11 @@
 import asyncio
 import logging
+import random
 from functools import wraps
 
 logger = logging.getLogger(__name__)
 
-def async_retry(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0, exceptions: tuple = (Exception,)):
+def async_retry(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0, exceptions: tuple = (Exception,), jitter: bool = False):
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
@@ -16,8 +17,10 @@ def async_retry(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0,
                     if attempt == max_retries - 1:
                         logger.error(f"Function {func.__name__} failed after {max_retries} attempts. Error: {e}")
                         raise
-                    logger.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {e}. Retrying in {current_delay}s...")
-                    await asyncio.sleep(current_delay)
+                    # Jitter spreads out retries from concurrent callers that failed together
+                    sleep_for = random.uniform(0, current_delay) if jitter else current_delay
+                    logger.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {e}. Retrying in {sleep_for:.1f}s...")
+                    await asyncio.sleep(sleep_for)
                     current_delay *= backoff
         return wrapper
     return decorator
@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from app.utils.metrics import register_metrics
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical lookups: while a call for `key` is in flight,
+    further callers await the same result instead of issuing their own.
+    The shared result object is handed to every caller, so treat it as read-only.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executed += 1
+            # Run as its own task so a disconnecting leader does not cancel the followers
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller went away
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+            "in_flight": len(self._inflight),
+        }
+
+_groups: Dict[str, SingleFlight] = {}
+
+def get_singleflight(name: str) -> SingleFlight:
+    if name not in _groups:
+        _groups[name] = SingleFlight(name)
+    return _groups[name]
+
+register_metrics("singleflight", lambda: {name: group.stats() for name, group in _groups.items()})
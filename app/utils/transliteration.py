@@ -0,0 +1,146 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# Devanagari to a plain Roman spelling (Hindi-style, as users type it), before phonetic folding
+CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "ळ": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+    # Precomposed nukta letters
+    "क़": "q", "ख़": "kh", "ग़": "g", "ज़": "z", "ड़": "r", "ढ़": "rh", "फ़": "f", "य़": "y",
+}
+VOWELS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ee", "उ": "u", "ऊ": "oo", "ऋ": "ri", "ॠ": "ri",
+    "ऌ": "li", "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऑ": "o", "ऍ": "e",
+}
+MATRAS = {
+    "ा": "aa", "ि": "i", "ी": "ee", "ु": "u", "ू": "oo", "ृ": "ri", "ॄ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॉ": "o", "ॅ": "e",
+}
+SIGNS = {"ं": "n", "ँ": "n", "ः": "h", "ऽ": "", "ॐ": "om"}
+VIRAMA = "्"
+NUKTA = "़"
+DIGITS = {chr(0x0966 + i): str(i) for i in range(10)}
+
+# IAST letters whose base letter alone would lose the sound
+IAST = str.maketrans({"ṛ": "ri", "ṝ": "ri", "ś": "sh", "ṣ": "sh", "ṅ": "n", "ñ": "n", "ṇ": "n", "ṃ": "n", "ḥ": "h"})
+
+# Applied in order to the Roman spelling: aspirates and sibilants fold to one letter,
+# long vowels to short, and loan-sound spellings to their nearest native letter
+FOLDS = [
+    ("chh", "c"), ("ch", "c"), ("sh", "s"), ("kh", "k"), ("gh", "g"), ("jh", "j"),
+    ("th", "t"), ("dh", "d"), ("ph", "p"), ("bh", "b"), ("rh", "r"),
+    ("aa", "a"), ("ee", "i"), ("ii", "i"), ("oo", "u"), ("uu", "u"),
+    ("f", "p"), ("w", "v"), ("z", "j"), ("q", "k"), ("x", "ks"),
+]
+DOUBLED = re.compile(r"(.)\1+")
+# Anusvara spelled "m" before a consonant ("shambhu") is the same sound as "n" ("shanbhu")
+NASAL_M = re.compile(r"m(?=[bcdgjklnpqrstvy])")
+ROMAN_VOWELS = set("aeiou")
+ROMAN_CONSONANTS = set("bcdfghjklmnpqrstvwxyz")
+# Extra folds of prefix_key: a short "e"/"o" typed so far may still become "ee"/"oo"
+PREFIX_FOLDS = [("e", "i"), ("o", "u")]
+
+def devanagari_to_roman(word: str, drop_schwa: bool = True) -> str:
+    """
+    Roman spelling of a Devanagari word as Hindi speakers write it: consonants carry an
+    inherent "a" unless a vowel sign or virama follows, and that "a" is dropped at the end
+    of the word (राम -> raam) and between a vowel and a consonant-vowel pair
+    (जगदीश -> jagdeesh, आरती -> aartee). Characters outside the block pass through.
+
+    With `drop_schwa` false (for words still being typed) only the "a" of the last
+    consonant is dropped, since the next keystroke may add a vowel sign to it
+    (गणप -> ganap, गणपति -> ganapati).
+    """
+    # (kind, text): "C" consonant, "V" written vowel, "A" inherent a, "S" anything else
+    parts = []
+    for ch in word:
+        if ch == NUKTA:
+            continue
+        inherent = bool(parts) and parts[-1][0] == "A"
+        if ch in MATRAS or ch == VIRAMA:
+            if inherent:
+                parts.pop()
+            if ch in MATRAS:
+                parts.append(("V", MATRAS[ch]))
+        elif ch in CONSONANTS:
+            parts += [("C", CONSONANTS[ch]), ("A", "a")]
+        elif ch in VOWELS:
+            parts.append(("V", VOWELS[ch]))
+        else:
+            parts.append(("S", SIGNS.get(ch, DIGITS.get(ch, ch))))
+
+    letters = sum(1 for kind, _ in parts if kind in ("C", "V"))
+    if parts and parts[-1][0] == "A" and (letters > 1 or not drop_schwa):
+        parts.pop()
+    if not drop_schwa:
+        return "".join(text for _, text in parts)
+    kinds = [kind for kind, _ in parts]
+    for i in range(2, len(parts) - 2):
+        if kinds[i] == "A" and kinds[i - 1] == "C" and kinds[i - 2] in ("V", "A") \
+                and kinds[i + 1] == "C" and kinds[i + 2] in ("V", "A"):
+            kinds[i] = None
+    return "".join(text for (_, text), kind in zip(parts, kinds) if kind is not None)
+
+def drop_medial_a(word: str) -> str:
+    """
+    The medial "a" rule of devanagari_to_roman applied to a folded Roman spelling, so a
+    written "a" that Hindi speech drops meets the Devanagari form (ganapati -> ganpati,
+    jagadish -> jagdish). Like there, an "a" dropped just before does not count as a vowel.
+    """
+    kept = []
+    dropped_at = None
+    for i, ch in enumerate(word):
+        if ch == "a" and 2 <= i < len(word) - 2 and word[i - 2] in ROMAN_VOWELS and i - 2 != dropped_at \
+                and word[i - 1] in ROMAN_CONSONANTS and word[i + 1] in ROMAN_CONSONANTS and word[i + 2] in ROMAN_VOWELS:
+            dropped_at = i
+            continue
+        kept.append(ch)
+    return "".join(kept)
+
+def strip_diacritics(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.translate(IAST))
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+@lru_cache(maxsize=100_000)
+def phonetic_key(word: str) -> str:
+    """
+    Spelling-independent key of one lowercase word, so "हनुमान", "hanuman" and "hanumaan"
+    all become "hanuman", "krishna", "kṛṣṇa" and "कृष्ण" all become "krisn", and
+    "गणपति" and "ganapati" both become "ganpati".
+    """
+    if any("\u0900" <= ch <= "\u097f" for ch in word):
+        word = devanagari_to_roman(word)
+    word = strip_diacritics(word)
+    for old, new in FOLDS:
+        word = word.replace(old, new)
+    word = NASAL_M.sub("n", word)
+    word = DOUBLED.sub(r"\1", word)
+    word = drop_medial_a(word)
+    # Final short "a" is written or dropped freely (rama/ram, shiva/shiv)
+    if len(word) > 2 and word.endswith("a"):
+        word = word[:-1]
+    # Final "ai" and "ay" are the same sound (jai, jay, जय)
+    if word.endswith("ai"):
+        word = word[:-1] + "y"
+    return word
+
+@lru_cache(maxsize=100_000)
+def prefix_key(word: str) -> str:
+    """
+    Key of a word that may be cut short mid-typing: the letter folds of phonetic_key
+    (scripts, aspirates, vowel length), without its rules that look at letters still to
+    come (medial and final "a", final "ai", "m" before a consonant). The key of every
+    prefix of a word is a prefix of the key of the word ("ganap" of "ganapati").
+    """
+    if any("\u0900" <= ch <= "\u097f" for ch in word):
+        word = devanagari_to_roman(word, drop_schwa=False)
+    word = strip_diacritics(word)
+    for old, new in FOLDS + PREFIX_FOLDS:
+        word = word.replace(old, new)
+    return DOUBLED.sub(r"\1", word)
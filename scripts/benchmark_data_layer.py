@@ -0,0 +1,109 @@
+"""
+benchmark_data_layer.py — Requests/sec of the blocking `supabase` client vs the
+                          pooled async `db` client under concurrent load.
+
+A local stub PostgREST server (fixed latency per request) stands in for Supabase,
+so the numbers only reflect how each client behaves inside the event loop.
+
+Usage:
+  python scripts/benchmark_data_layer.py
+  python scripts/benchmark_data_layer.py --concurrency 50 --duration 5 --latency_ms 20
+"""
+
+import sys
+import os
+import time
+import json
+import asyncio
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from postgrest import SyncPostgrestClient
+from app.utils.db import build_db_client
+
+STUB_ROWS = json.dumps([
+    {"id": str(i), "name": f"Temple {i}", "city": "Varanasi", "deity": "Shiva"}
+    for i in range(20)
+]).encode()
+
+
+def start_stub_postgrest(latency_ms: float) -> ThreadingHTTPServer:
+    """Minimal PostgREST stand-in: every GET returns the same rows after a fixed delay."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency_ms / 1000.0)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(STUB_ROWS)))
+            self.end_headers()
+            self.wfile.write(STUB_ROWS)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_load(handler, concurrency: int, duration: float) -> float:
+    """Run `concurrency` clients in a loop against `handler` and return requests/sec."""
+    completed = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal completed
+        while time.perf_counter() < deadline:
+            await handler()
+            completed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return completed / (time.perf_counter() - start)
+
+
+async def main(concurrency: int, duration: float, latency_ms: float):
+    server = start_stub_postgrest(latency_ms)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Stub PostgREST at {base_url} ({latency_ms}ms/request), {concurrency} concurrent clients, {duration}s each\n")
+
+    # Before: the sync client used by the routers, called from an async handler
+    sync_client = SyncPostgrestClient(f"{base_url}/rest/v1", headers={"apikey": "bench"})
+
+    async def blocking_handler():
+        sync_client.table("temples").select("id, name, city, deity").eq("city", "Varanasi").execute()
+
+    # After: the shared, pooled async client from app.utils.db
+    async_client = build_db_client(base_url, "bench")
+
+    async def async_handler():
+        await async_client.table("temples").select("id, name, city, deity").eq("city", "Varanasi").execute()
+
+    before = await run_load(blocking_handler, concurrency, duration)
+    after = await run_load(async_handler, concurrency, duration)
+
+    sync_client.session.close()
+    await async_client.aclose()
+    server.shutdown()
+
+    print(f"{'client':<28}{'req/s':>10}")
+    print(f"{'sync supabase (before)':<28}{before:>10.1f}")
+    print(f"{'async pooled db (after)':<28}{after:>10.1f}")
+    print(f"\nSpeedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async PostgREST access")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per run")
+    parser.add_argument("--latency_ms", type=float, default=20.0, help="Stub server latency per request")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.concurrency, args.duration, args.latency_ms))
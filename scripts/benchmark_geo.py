@@ -0,0 +1,97 @@
+"""
+benchmark_geo.py — Distance ranking of nearby-temple candidates: the old per-row `math`
+                   haversine loop plus full sort vs `app.utils.geo` (one NumPy pass, then
+                   `argpartition` for just the requested page), plus an agreement check.
+
+Candidates are random points in a square inscribed in the --radius circle, so nearly all
+of them are in range, the worst case for ranking.
+
+Usage:
+  python scripts/benchmark_geo.py
+  python scripts/benchmark_geo.py --sizes 10000 100000 --page_size 20 --pages 1 10 100
+"""
+
+import sys
+import os
+import math
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.geo import KM_PER_DEG_LAT, haversine_km, nearest_order, page_by_distance
+
+
+def best_of(repeat: int, fn):
+    """Run `fn` `repeat` times and return (best seconds, last result)."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def row_loop(lat, lng, lats, lngs, radius):
+    """The pre-index /nearby implementation: math per row, then sort everything."""
+    temples = []
+    for t_lat, t_lng in zip(lats, lngs):
+        d_lat = math.radians(t_lat - lat)
+        d_lng = math.radians(t_lng - lng)
+        a = math.sin(d_lat / 2) ** 2 + math.cos(math.radians(lat)) * math.cos(math.radians(t_lat)) * math.sin(d_lng / 2) ** 2
+        dist = 6371.0 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        if dist <= radius:
+            temples.append(dist)
+    temples.sort()
+    return temples
+
+
+def main(args):
+    rng = np.random.default_rng(7)
+    lat, lng = args.lat, args.lng
+    print(f"Query ({lat}, {lng}), radius {args.radius} km, page size {args.page_size}, best of {args.repeat}")
+
+    for size in args.sizes:
+        delta = args.radius / KM_PER_DEG_LAT / math.sqrt(2)
+        lats = lat + rng.uniform(-delta, delta, size)
+        lngs = lng + rng.uniform(-delta, delta, size) / math.cos(math.radians(lat))
+        lat_list, lng_list = lats.tolist(), lngs.tolist()
+
+        loop_s, loop_result = best_of(args.repeat, lambda: row_loop(lat, lng, lat_list, lng_list, args.radius))
+        dist_s, distances = best_of(args.repeat, lambda: haversine_km(lat, lng, lats, lngs))
+        sort_s, full_order = best_of(args.repeat, lambda: nearest_order(distances))
+
+        print(f"\n{size:,} candidates")
+        print(f"  row loop + sort        {loop_s * 1000:9.2f} ms")
+        print(f"  numpy haversine        {dist_s * 1000:9.2f} ms")
+        print(f"  + full argsort         {sort_s * 1000:9.2f} ms")
+        page_times = {}
+        for page in args.pages:
+            offset = (page - 1) * args.page_size
+            page_s, order = best_of(args.repeat, lambda: page_by_distance(distances, offset, args.page_size))
+            page_times[page] = page_s
+            expected = full_order[offset:offset + args.page_size]
+            status = "ok" if np.array_equal(order, expected) else "MISMATCH"
+            print(f"  + page {page:<4} argpartition {page_s * 1000:7.2f} ms  ({status})")
+
+        in_range = np.sort(distances[distances <= args.radius])
+        max_gap = float(np.max(np.abs(in_range - np.array(loop_result)))) if len(in_range) == len(loop_result) else float("nan")
+        print(f"  max distance gap vs row loop: {max_gap:.2e} km")
+        first_page = page_times.get(args.pages[0], 0.0)
+        print(f"  speedup, page {args.pages[0]} vs row loop: {loop_s / (dist_s + first_page):.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark vectorized distance ranking")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="Candidate counts")
+    parser.add_argument("--lat", type=float, default=25.3176, help="Query latitude (default: Varanasi)")
+    parser.add_argument("--lng", type=float, default=82.9739, help="Query longitude")
+    parser.add_argument("--radius", type=float, default=50.0, help="Radius in km")
+    parser.add_argument("--page_size", type=int, default=20, help="Results per page")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100], help="Pages to rank")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions; the best is reported")
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,108 @@
+"""
+benchmark_panchang_range.py — Days/sec of the per-day `calculate_panchang` loop vs the
+                               vectorized `calculate_range` engine, plus an agreement check.
+
+Both paths produce the same row dicts; the check reports how many days differ in
+tithi/nakshatra/yoga/karan and the largest sunrise/sunset/moonrise/moonset gap in minutes.
+
+Usage:
+  python scripts/benchmark_panchang_range.py
+  python scripts/benchmark_panchang_range.py --city Varanasi --start 2026-01-01 --end 2026-12-31
+  python scripts/benchmark_panchang_range.py --lat 40.7128 --lng -74.006 --tz America/New_York
+"""
+
+import sys
+import os
+import time
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.panchang_engine import PanchangEngine
+
+INDEX_FIELDS = ["tithi_index", "nakshatra", "yoga", "karan"]
+TIME_FIELDS = ["sunrise", "sunset", "moonrise", "moonset"]
+
+
+def best_of(repeat: int, fn):
+    """Run `fn` `repeat` times and return (best seconds, last result)."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def minutes(hhmm):
+    hours, mins = hhmm.split(":")
+    return int(hours) * 60 + int(mins)
+
+
+def compare(loop_rows, range_rows):
+    index_mismatches = {field: 0 for field in INDEX_FIELDS}
+    max_gap = {field: 0 for field in TIME_FIELDS}
+    presence_mismatches = 0
+    for a, b in zip(loop_rows, range_rows):
+        for field in INDEX_FIELDS:
+            if a[field] != b[field]:
+                index_mismatches[field] += 1
+        for field in TIME_FIELDS:
+            if (a[field] is None) != (b[field] is None):
+                presence_mismatches += 1
+            elif a[field] is not None:
+                gap = abs(minutes(a[field]) - minutes(b[field]))
+                max_gap[field] = max(max_gap[field], min(gap, 1440 - gap))
+    return index_mismatches, max_gap, presence_mismatches
+
+
+def main(args):
+    engine = PanchangEngine()
+    start = datetime.strptime(args.start, "%Y-%m-%d")
+    end = datetime.strptime(args.end, "%Y-%m-%d")
+    dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((end - start).days + 1)]
+    if args.lat is not None and args.lng is not None:
+        location, label = (args.lat, args.lng), f"({args.lat}, {args.lng})"
+    else:
+        location, label = args.city, args.city
+    print(f"{len(dates)} days at {label} [{args.tz}], best of {args.repeat}\n")
+
+    def per_day_loop():
+        return [
+            engine.calculate_panchang(d, args.city, args.lat, args.lng, args.tz)
+            for d in dates
+        ]
+
+    def vectorized():
+        return engine.calculate_range(args.start, args.end, location, args.tz).to_rows()
+
+    loop_time, loop_rows = best_of(args.repeat, per_day_loop)
+    range_time, range_rows = best_of(args.repeat, vectorized)
+
+    print(f"{'engine':<28}{'total ms':>10}{'days/s':>12}")
+    print(f"{'per-day loop (before)':<28}{loop_time * 1000:>10.1f}{len(dates) / loop_time:>12.0f}")
+    print(f"{'calculate_range (after)':<28}{range_time * 1000:>10.1f}{len(dates) / range_time:>12.0f}")
+    print(f"\nSpeedup: {loop_time / range_time:.1f}x")
+
+    index_mismatches, max_gap, presence_mismatches = compare(loop_rows, range_rows)
+    print("\nAgreement with the per-day engine:")
+    for field, count in index_mismatches.items():
+        print(f"  {field:<14}{count} day(s) differ")
+    for field, gap in max_gap.items():
+        print(f"  {field:<14}max gap {gap} min")
+    print(f"  {'rise/set':<14}{presence_mismatches} event(s) present in only one result")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-day vs vectorized Panchang generation")
+    parser.add_argument("--start", default="2026-01-01", help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", default="2026-12-31", help="Last date, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--city", default="Delhi", help="City from CITIES_DB")
+    parser.add_argument("--lat", type=float, default=None, help="Latitude (overrides --city)")
+    parser.add_argument("--lng", type=float, default=None, help="Longitude (overrides --city)")
+    parser.add_argument("--tz", default="Asia/Kolkata", help="IANA timezone for local times")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per engine; the best is reported")
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,171 @@
+"""
+benchmark_projections.py — Bytes read from Supabase and bytes sent to clients by the list
+                           endpoints with `select("*")` (before) vs the list-view
+                           projections in app/models/projections.py (after).
+
+A local stub PostgREST serves synthetic rows shaped like production (long temple history,
+aarti lyrics, blog HTML) and honours `select`, so the byte counts reflect the columns
+each version asks for. The app runs in-process against it through FastAPI's TestClient.
+
+Usage:
+  python scripts/benchmark_projections.py
+  python scripts/benchmark_projections.py --rows 5000 --page_size 50
+"""
+
+import sys
+import os
+import json
+import random
+import argparse
+import threading
+from unittest import mock
+from urllib.parse import urlparse, parse_qsl
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+API_KEY = "bench"
+
+
+def synthetic_tables(rows: int):
+    rng = random.Random(7)
+    text = lambda words: " ".join(rng.choice(["mandir", "darshan", "bhakti", "prasad", "aarti", "yatra", "shikhara"]) for _ in range(words))
+    temples = [{
+        "id": f"t{i:06d}", "slug": f"temple-{i}", "name": f"Shri Temple {i}", "deity": rng.choice(["Shiva", "Vishnu", "Durga"]),
+        "type": "Temple", "address": text(12), "city": "Varanasi", "state": "Uttar Pradesh",
+        "latitude": 25.3 + rng.uniform(-0.5, 0.5), "longitude": 83.0 + rng.uniform(-0.5, 0.5),
+        "contact": "+91 00000 00000", "description": text(80), "image_urls": [f"https://img.example/{i}/{k}.jpg" for k in range(4)],
+        "timings": text(10), "darshan_timings": [{"label": "Morning", "start": "05:00", "end": "12:00"}],
+        "puja_timings": [{"label": "Aarti", "start": "19:00", "end": "19:30"}], "history": text(300),
+        "significance": text(120), "major_festivals": [text(3) for _ in range(5)], "how_to_reach": text(60),
+        "nearby_attractions": [text(4) for _ in range(5)], "interesting_facts": [text(15) for _ in range(5)],
+        "dress_code": text(10), "photography_allowed": False, "entry_fee": "Free", "best_time_to_visit": text(8),
+        "status": "enriched", "created_at": f"2024-01-01T00:00:{i % 60:02d}+00:00",
+    } for i in range(rows)]
+    aartis = [{
+        "id": f"a{i:04d}", "title": f"Aarti {i}", "deity": "Hanuman", "aarti_type": "general", "language": "Hindi",
+        "audio_url": f"https://audio.example/{i}.mp3", "audio_source_url": "https://source.example", "storage_provider": "SUPABASE",
+        "duration_seconds": 300, "lyrics_hindi": "जय हनुमान ज्ञान गुन सागर " * 60, "lyrics_english_transliteration": text(300),
+        "lyrics_english_meaning": text(300), "significance": text(60), "best_time": "Evening", "estimated_duration_minutes": 5,
+        "status": "complete", "created_at": f"2024-01-01T00:{i % 60:02d}:00+00:00",
+    } for i in range(min(rows, 200))]
+    blogs = [{
+        "id": f"b{i:04d}", "title": f"Blog {i}", "slug": f"blog-{i}", "meta_description": text(20),
+        "content_html": "<p>" + text(1300) + "</p>", "faqs": [{"question": text(8), "answer": text(40)} for _ in range(5)],
+        "tags": ["temple", "puja"], "category": "Travel", "status": "published", "ai_generated": True,
+        "published_at": "2024-01-02T00:00:00+00:00", "created_at": f"2024-01-01T{i % 24:02d}:00:00+00:00",
+    } for i in range(min(rows, 200))]
+    return {"temples": temples, "aartis": aartis, "blogs": blogs}
+
+
+def start_stub_postgrest(tables, counter):
+    """PostgREST stand-in honouring select, eq/in filters and paging; adds response bytes to `counter`."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _rows(self):
+            url = urlparse(self.path)
+            rows = tables.get(url.path.rsplit("/", 1)[-1], [])
+            select, offset, limit = None, 0, None
+            for key, value in parse_qsl(url.query):
+                op, _, arg = value.partition(".")
+                if key == "select":
+                    select = [c.strip() for c in value.split(",")]
+                elif key == "offset":
+                    offset = int(value)
+                elif key == "limit":
+                    limit = int(value)
+                elif op == "eq":
+                    rows = [r for r in rows if str(r.get(key)) == arg]
+                elif op == "in":
+                    wanted = {v.strip('"') for v in arg.strip("()").split(",")}
+                    rows = [r for r in rows if str(r.get(key)) in wanted]
+            if self.headers.get("Range"):
+                start, end = self.headers["Range"].split("-")
+                offset, limit = int(start), int(end) - int(start) + 1
+            total = len(rows)
+            rows = rows[offset:offset + limit if limit is not None else None]
+            if select and select != ["*"]:
+                rows = [{c: r.get(c) for c in select} for r in rows]
+            return rows, total
+
+        def do_GET(self):
+            rows, total = self._rows()
+            body = json.dumps(rows).encode()
+            counter[0] += len(body)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Range", f"0-{max(len(rows) - 1, 0)}/{total}")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_HEAD(self):
+            _, total = self._rows()
+            self.send_response(200)
+            self.send_header("Content-Range", f"*/{total}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(rows: int, page_size: int):
+    counter = [0]
+    server = start_stub_postgrest(synthetic_tables(rows), counter)
+    os.environ.update(
+        SUPABASE_URL=f"http://127.0.0.1:{server.server_address[1]}", SUPABASE_KEY=API_KEY, ADMIN_API_KEY=API_KEY,
+        UPSTASH_REDIS_URL="", UPSTASH_REDIS_TOKEN="", SEARCH_INDEX_PATH="", GEETA_CORPUS_PATH="", CACHE_ENABLED="false",
+    )
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.models.projections import Projection
+
+    endpoints = [
+        ("list_temples", "/v1/temples", {"page_size": page_size, "include_total": "false"}),
+        ("temples_within_bounds", "/v1/temples/within-bounds",
+         {"sw_lat": 25.2, "sw_lng": 82.9, "ne_lat": 25.4, "ne_lng": 83.1, "page_size": page_size}),
+        ("get_nearby_temples", "/v1/temples/nearby", {"lat": 25.3, "lng": 83.0, "radius": 20, "page_size": page_size}),
+        ("list_blogs", "/blog/list", {"limit": page_size}),
+        ("list_aartis", "/v1/aartis", {"page_size": page_size, "include_total": "false"}),
+        ("list_aartis_admin", "/v1/aartis/admin/list", {}),
+    ]
+
+    def measure(client, path, params):
+        counter[0] = 0
+        response = client.get(path, params=params, headers={"x-api-key": API_KEY})
+        assert response.status_code == 200, response.text
+        return counter[0], len(response.content)
+
+    with TestClient(app) as client:
+        client.get("/v1/temples/nearby", params={"lat": 25.3, "lng": 83.0}, headers={"x-api-key": API_KEY})  # load the temple index
+        results = []
+        for name, path, params in endpoints:
+            with mock.patch.object(Projection, "select", lambda self, fields=None: "*"):
+                before = measure(client, path, params)
+            after = measure(client, path, params)
+            results.append((name, before, after))
+    server.shutdown()
+
+    kb = lambda n: f"{n / 1024:,.1f} KB"
+    print(f"{rows} temples, page size {page_size}\n")
+    print(f"{'endpoint':<24}{'from supabase':>30}{'to client':>30}")
+    print(f"{'':<24}{'before':>15}{'after':>15}{'before':>15}{'after':>15}")
+    for name, (db_before, out_before), (db_after, out_after) in results:
+        print(f"{name:<24}{kb(db_before):>15}{kb(db_after):>15}{kb(out_before):>15}{kb(out_after):>15}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bytes transferred by list endpoints before/after projections")
+    parser.add_argument("--rows", type=int, default=2000, help="Synthetic temples (aartis and blogs are capped at 200)")
+    parser.add_argument("--page_size", type=int, default=20)
+    args = parser.parse_args()
+
+    main(args.rows, args.page_size)
@@ -0,0 +1,49 @@
+"""
+build_geeta_corpus.py — Write the Bhagavad Gita snapshot file the API serves /v1/geeta/* from.
+
+Reads every row of geeta_chapters and geeta_shlokas and writes them, with a content-hash
+version, to GEETA_CORPUS_PATH (or --output). Running app processes pick up a changed
+version within GEETA_CORPUS_CHECK_SECONDS. Re-run after scripts/seed_geeta.py.
+
+Usage:
+  python scripts/build_geeta_corpus.py
+  python scripts/build_geeta_corpus.py --output /srv/data/geeta_corpus.json
+"""
+
+import sys
+import os
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.geeta_corpus import LOAD_PAGE_SIZE, write_snapshot
+from app.utils.supabase_client import supabase
+
+load_dotenv()
+
+
+def fetch_all(table: str, order: str):
+    rows, offset = [], 0
+    while True:
+        res = supabase.table(table).select("*").order(order).range(offset, offset + LOAD_PAGE_SIZE - 1).execute()
+        rows.extend(res.data)
+        if len(res.data) < LOAD_PAGE_SIZE:
+            return rows
+        offset += LOAD_PAGE_SIZE
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the Gita corpus snapshot from Supabase")
+    parser.add_argument("--output", default=settings.GEETA_CORPUS_PATH, help="Snapshot file to write")
+    args = parser.parse_args()
+
+    chapters = fetch_all("geeta_chapters", "chapter_number")
+    shlokas = fetch_all("geeta_shlokas", "id")
+    if not chapters or not shlokas:
+        print(f"✗ Nothing to write: {len(chapters)} chapters, {len(shlokas)} shlokas")
+        sys.exit(1)
+
+    version = write_snapshot(args.output, chapters, shlokas)
+    print(f"✅ Wrote {args.output}: {len(chapters)} chapters, {len(shlokas)} shlokas, version {version}")
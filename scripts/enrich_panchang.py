@@ -0,0 +1,71 @@
+"""
+enrich_panchang.py — Stage two of Panchang generation: AI descriptions, spiritual
+                     messages and festivals for rows that are already stored.
+
+Stage one (generate_daily_data.py, generate_panchang_cities.py) writes the calculated
+rows with hindi_description left null. This script reads those pending rows and drains
+them through Gemini with --workers concurrent workers, paced by GeminiClient's
+token bucket at --rpm requests per minute. Each finished row is recorded in the
+progress file, so an interrupted or failed run resumes where it stopped.
+
+Usage:
+  python scripts/enrich_panchang.py --start_date 2026-01-01 --end_date 2026-12-31
+  python scripts/enrich_panchang.py --city Delhi --days 30 --workers 8 --rpm 60
+  python scripts/enrich_panchang.py --reset
+"""
+
+import sys
+import os
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.panchang_enrichment import EnrichmentProgress, EnrichmentQueue, fetch_pending
+
+load_dotenv()
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PROGRESS = os.path.join(ROOT_DIR, ".panchang_enrichment_progress.json")
+
+
+async def enrich_pending(start_date, end_date, city=None, workers=settings.ENRICHMENT_WORKERS,
+                         rpm=settings.GEMINI_RPM, progress_path=DEFAULT_PROGRESS, reset=False):
+    if reset and os.path.exists(progress_path):
+        os.remove(progress_path)
+    progress = EnrichmentProgress(progress_path)
+
+    rows = await fetch_pending(str(start_date), str(end_date), city)
+    label = city or "all cities"
+    print(f"Enrichment for {label}, {start_date} to {end_date}: {len(rows)} pending row(s), {workers} worker(s) at {rpm} RPM")
+
+    stats = await EnrichmentQueue(progress, workers=workers, rpm=rpm).run(rows)
+    print(f"Enrichment completed: {stats['enriched']} enriched, {stats['failed']} failed, "
+          f"{stats['skipped']} already done, {stats['festivals_added']} festival(s) added.")
+    if stats["failed"]:
+        print("Re-run the same command to retry the failed rows.")
+    return stats
+
+
+def main(args):
+    start_date = datetime.strptime(args.start_date, "%Y-%m-%d").date() if args.start_date else datetime.now().date()
+    end_date = datetime.strptime(args.end_date, "%Y-%m-%d").date() if args.end_date else start_date + timedelta(days=args.days - 1)
+    asyncio.run(enrich_pending(start_date, end_date, args.city, args.workers, args.rpm, args.progress, args.reset))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enrich stored Panchang rows with Gemini")
+    parser.add_argument("--start_date", type=str, help="Start date YYYY-MM-DD (default: today)")
+    parser.add_argument("--end_date", type=str, help="End date YYYY-MM-DD, inclusive (optional)")
+    parser.add_argument("--days", type=int, default=365, help="Number of days (ignored if end_date provided)")
+    parser.add_argument("--city", type=str, help="Only this city (default: every city)")
+    parser.add_argument("--workers", type=int, default=settings.ENRICHMENT_WORKERS, help="Concurrent Gemini workers")
+    parser.add_argument("--rpm", type=int, default=settings.GEMINI_RPM, help="Gemini requests per minute across all workers")
+    parser.add_argument("--progress", type=str, default=DEFAULT_PROGRESS, help="Progress file")
+    parser.add_argument("--reset", action="store_true", help="Forget previous progress")
+    args = parser.parse_args()
+
+    main(args)
@@ -8,170 +8,65 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.panchang_engine import PanchangEngine
-from app.services.gemini_client import GeminiClient
+from app.services.panchang_enrichment import fetch_stored_dates, split_stored
 from app.utils.supabase_client import supabase
-import uuid
-import json
+from enrich_panchang import enrich_pending, DEFAULT_PROGRESS
 
 load_dotenv()
 
-async def enrich_with_ai(date_str, city, panchang_basic):
-    """
-    Use Gemini to get festival details and descriptions.
+MUHURAT_TYPES = ["Abhijit", "Brahma", "Godhuli"]
+
+def store_panchang(start_date, end_date, city, batch_size=30):
     """
-    gemini = GeminiClient()
-    
-    prompt = f"""
-    Analyze the Panchang data for {date_str} in {city}: {panchang_basic}.
-    
-    1. Identify if there are any major Hindu festivals or Vrats on this day.
-    2. Provide a short description (Hindi & English) for the day's significance.
-    3. Provide a short spiritual message/quote.
-    
-    Output JSON only:
-    {{
-        "festivals": [
-            {{
-                "name": "Festival Name",
-                "name_hindi": "त्योहार का नाम",
-                "description": "Short description",
-                "type": "Major" | "Minor" | "Jayanti" | "Vrat"
-            }}
-        ],
-        "hindi_description": "2-3 lines in Hindi",
-        "english_description": "2-3 lines in English",
-        "spiritual_message": "One liner quote in English",
-        "spiritual_message_hindi": "हिंदी में आध्यात्मिक संदेश"
-    }}
-    If no festival, "festivals" should be empty list [].
+    Stage one: calculate and store every row, with no AI calls.
+    New dates stay pending for stage two. Re-running over stored dates refreshes only the
+    calculated columns, so existing descriptions and merged AI festivals are never wiped.
+    Needs a unique constraint on panchang_daily (date, city).
     """
-    
-    try:
-        data = await gemini.generate_json(prompt, model="flash")
-        return data
-    except Exception as e:
-        print(f"  ! AI Enrichment failed: {e}")
-        return {}
-
-async def generate_daily_data(start_date_str=None, end_date_str=None, days=10, city="Delhi", batch_size=30):
+    engine = PanchangEngine()
+    result = engine.calculate_range(start_date, end_date, city)
+    rows = result.to_rows()
+    muhurats = result.muhurat_rows()
+
+    # New and already stored dates go in separate batches: an upsert writes the columns its rows carry
+    stored = fetch_stored_dates(supabase, city, str(start_date), str(end_date))
+    for group in split_stored(rows, stored):
+        for i in range(0, len(group), batch_size):
+            batch = group[i:i + batch_size]
+            supabase.table("panchang_daily").upsert(batch, on_conflict="date,city").execute()
+            print(f"  Stored {batch[0]['date']} to {batch[-1]['date']}")
+
+    # Replace the auto-generated muhurats for these dates
+    supabase.table("muhurats").delete()\
+        .eq("city", city)\
+        .gte("date", str(start_date))\
+        .lte("date", str(end_date))\
+        .in_("type", MUHURAT_TYPES)\
+        .execute()
+    for i in range(0, len(muhurats), batch_size):
+        supabase.table("muhurats").insert(muhurats[i:i + batch_size]).execute()
+    print(f"  Stored {len(muhurats)} muhurats")
+    return len(rows)
+
+async def generate_daily_data(start_date_str=None, end_date_str=None, days=10, city="Delhi", batch_size=30,
+                              enrich=True, workers=None, rpm=None, progress_path=DEFAULT_PROGRESS):
     start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date() if start_date_str else datetime.now().date()
-    
+
     if end_date_str:
         end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
         days = (end_date - start_date).days + 1
-    
+    end_date = start_date + timedelta(days=days - 1)
+
     print(f"Starting Panchang Generation for {city}. Start: {start_date}, Days: {days}, Batch Size: {batch_size}")
-    
-    engine = PanchangEngine()
-    
-    for i in range(days):
-        current_date = start_date + timedelta(days=i)
-        date_str = current_date.strftime("%Y-%m-%d")
-        
-        print(f"[{i+1}/{days}] Processing {date_str}...")
-        
-        # 1. Calculate Panchang
-        try:
-            panchang_data = engine.calculate_panchang(date_str, city)
-            
-            # 2. AI Enrichment
-            ai_data = await enrich_with_ai(date_str, city, panchang_data)
-            
-            # Merge Data
-            full_data = panchang_data.copy()
-            if ai_data:
-                full_data["hindi_description"] = ai_data.get("hindi_description")
-                full_data["english_description"] = ai_data.get("english_description")
-                full_data["spiritual_message"] = ai_data.get("spiritual_message")
-                full_data["spiritual_message_hindi"] = ai_data.get("spiritual_message_hindi")
-                
-                # Update festivals list in panchang table
-                ai_festivals = ai_data.get("festivals", [])
-                festival_names = [f["name"] for f in ai_festivals]
-                
-                # Merge with existing calculated festival if any
-                existing_festival = full_data.get("festival")
-                if existing_festival and existing_festival not in festival_names:
-                    festival_names.insert(0, existing_festival)
-                
-                full_data["festivals"] = festival_names # Update the list column
-                
-                # If AI found a festival and we didn't have one, set the main 'festival' field to the first one
-                if festival_names:
-                    if not full_data.get("festival"):
-                        full_data["festival"] = festival_names[0]
-                    # Attempt to set festival_hindi if matched
-                    for f in ai_festivals:
-                        if f["name"] == full_data["festival"]:
-                            full_data["festival_hindi"] = f.get("name_hindi")
-                            break
-                    # Also map vrat_hindi if any
-                    vrat_name = full_data.get("vrat")
-                    if vrat_name:
-                        for f in ai_festivals:
-                            if f["name"] == vrat_name:
-                                full_data["vrat_hindi"] = f.get("name_hindi")
-                                break
-
-            # Prepare data for DB
-            db_payload = full_data.copy()
-
-            # Upsert Panchang
-            # Check existing
-            res = supabase.table("panchang_daily").select("id").eq("date", date_str).eq("city", city).execute()
-            if res.data:
-                # print(f"  - Updating Panchang for {date_str}")
-                supabase.table("panchang_daily").update(db_payload).eq("id", res.data[0]['id']).execute()
-            else:
-                # print(f"  - Inserting Panchang for {date_str}")
-                supabase.table("panchang_daily").insert(db_payload).execute()
-                
-            # 3. Insert Festivals into 'festivals' table
-            if ai_data and ai_data.get("festivals"):
-                for fest in ai_data["festivals"]:
-                    # Check if exists to avoid dupes (rough check by name & date)
-                    # We might want a unique constraint or check logic. 
-                    # For now, simple check:
-                    f_res = supabase.table("festivals").select("id").eq("name", fest["name"]).eq("start_date", date_str).execute()
-                    
-                    if not f_res.data:
-                        f_payload = {
-                            "name": fest["name"],
-                            "name_hindi": fest.get("name_hindi"),
-                            "start_date": date_str,
-                            "end_date": date_str,
-                            "description": fest.get("description"),
-                             # "type": fest.get("type") # If schema has type
-                        }
-                        supabase.table("festivals").insert(f_payload).execute()
-                        print(f"  + Inserted Festival: {fest['name']}")
-                 
-        except Exception as e:
-            print(f"  ! Error generating Panchang/Festival: {e}")
-            continue
-
-        # 4. Calculate Muhurats
-        try:
-            muhurats = engine.calculate_muhurats(date_str, city)
-            
-            # Upsert Muhurats
-            # We first delete existing auto-generated ones for this date/city/type to avoid duplicates 
-            # or we just insert if not checks. 
-            # Strategy: Delete overlap for these specific types on this date/city.
-            types_to_remove = ["Abhijit", "Brahma", "Godhuli"]
-            supabase.table("muhurats").delete().eq("date", date_str).eq("city", city).in_("type", types_to_remove).execute()
-            
-            if muhurats:
-                # print(f"  - Inserting {len(muhurats)} Muhurats")
-                supabase.table("muhurats").insert(muhurats).execute()
-                
-        except Exception as e:
-            print(f"  ! Error generating Muhurats: {e}")
-        
-        # Batch Handling
-        if (i + 1) % batch_size == 0:
-            print(f"--- Batch {int((i+1)/batch_size)} Completed ({i+1} days) ---")
-            await asyncio.sleep(1)
+
+    # 1. Calculate and store all rows
+    stored = store_panchang(start_date, end_date, city, batch_size)
+    print(f"Stage one completed: {stored} day(s) stored.")
+
+    # 2. Drain the rows still missing AI enrichment
+    if enrich:
+        kwargs = {k: v for k, v in {"workers": workers, "rpm": rpm}.items() if v is not None}
+        await enrich_pending(start_date, end_date, city, progress_path=progress_path, **kwargs)
 
     print("Generation completed successfully.")
 
@@ -182,8 +77,14 @@ if __name__ == "__main__":
     parser.add_argument('--start_date', type=str, help='Start date YYYY-MM-DD')
     parser.add_argument('--end_date', type=str, help='End date YYYY-MM-DD (optional)')
     parser.add_argument('--city', type=str, default='Delhi', help='City name')
-    parser.add_argument('--batch_size', type=int, default=30, help='Batch size for logging')
-    
+    parser.add_argument('--batch_size', type=int, default=30, help='Rows per upsert request')
+    parser.add_argument('--skip_enrichment', action='store_true', help='Only calculate and store; run enrich_panchang.py later')
+    parser.add_argument('--workers', type=int, help='Concurrent Gemini workers for enrichment')
+    parser.add_argument('--rpm', type=int, help='Gemini requests per minute for enrichment')
+
     args = parser.parse_args()
-    
-    asyncio.run(generate_daily_data(args.start_date, args.end_date, args.days, args.city, args.batch_size))
+
+    asyncio.run(generate_daily_data(
+        args.start_date, args.end_date, args.days, args.city, args.batch_size,
+        enrich=not args.skip_enrichment, workers=args.workers, rpm=args.rpm,
+    ))
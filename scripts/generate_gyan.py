@@ -123,10 +123,6 @@ async def generate_gyan(start_date_str: str, days: int = 1):
         else:
             print(f"  ✗ Skipped {date_str}")
 
-        # Rate-limit courtesy pause every 5 records
-        if (i + 1) % 5 == 0:
-            await asyncio.sleep(2)
-
     print("\n✅ Daily Gyan generation complete!")
 
 
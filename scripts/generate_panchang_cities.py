@@ -0,0 +1,259 @@
+"""
+generate_panchang_cities.py — Panchang (and daily muhurats) for many cities over a date range.
+
+Cities come from data/indian_cities.json, the `locations` table, or --cities. Each
+(city, date chunk) is a shard computed in a ProcessPoolExecutor with the vectorized
+range engine; the parent writes finished shards with batched
+upsert(on_conflict="date,city") and records them in a checkpoint file, so an
+interrupted run resumes where it stopped. Dates already stored only get their
+calculated columns refreshed, so AI enrichment and merged festivals survive a re-run.
+
+Coordinates are resolved from CITIES_DB, then latitude/longitude on the `locations`
+row, then data/city_coordinates.json, then OpenStreetMap Nominatim (results are
+saved back to that file, so each city is geocoded once).
+
+Needs a unique constraint on panchang_daily (date, city) for the upsert.
+
+Usage:
+  python scripts/generate_panchang_cities.py --start_date 2026-01-01 --end_date 2026-12-31
+  python scripts/generate_panchang_cities.py --source locations --workers 8
+  python scripts/generate_panchang_cities.py --cities Delhi,Varanasi --days 30 --dry_run
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import httpx
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.panchang_engine import PanchangEngine, CITIES_DB
+from app.services.panchang_enrichment import fetch_stored_dates, split_stored
+
+load_dotenv()
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CITIES_FILE = os.path.join(ROOT_DIR, "data", "indian_cities.json")
+COORDINATES_FILE = os.path.join(ROOT_DIR, "data", "city_coordinates.json")
+DEFAULT_CHECKPOINT = os.path.join(ROOT_DIR, ".panchang_cities_checkpoint.json")
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_DELAY_SECONDS = 1.0  # Nominatim usage policy: at most one request per second
+
+MUHURAT_TYPES = ["Abhijit", "Brahma", "Godhuli"]
+
+
+# --- Cities and coordinates ---
+
+def load_cities(source, cities_arg):
+    """List of {"city", "state", optional "latitude"/"longitude"} to generate."""
+    if cities_arg:
+        return [{"city": name.strip(), "state": None} for name in cities_arg.split(",") if name.strip()]
+    if source == "locations":
+        from app.utils.supabase_client import supabase
+        res = supabase.table("locations").select("*").execute()
+        return res.data or []
+    with open(CITIES_FILE, "r") as f:
+        data = json.load(f)
+    return [{"city": city, "state": state} for state, cities in data.items() for city in cities]
+
+
+def load_coordinate_cache():
+    if os.path.exists(COORDINATES_FILE):
+        with open(COORDINATES_FILE, "r") as f:
+            return json.load(f)
+    return {}
+
+
+def save_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def geocode(city, state):
+    params = {"city": city, "country": "India", "format": "json", "limit": 1}
+    if state:
+        params["state"] = state
+    response = httpx.get(
+        NOMINATIM_URL, params=params, timeout=15,
+        headers={"User-Agent": "templeapp-backend panchang generator"}
+    )
+    response.raise_for_status()
+    results = response.json()
+    if not results:
+        return None
+    return {"lat": float(results[0]["lat"]), "lon": float(results[0]["lon"])}
+
+
+def resolve_coordinates(locations, allow_geocode=True):
+    """Attach lat/lon to each location; ones that cannot be resolved are dropped with a warning."""
+    cache = load_coordinate_cache()
+    resolved = []
+    for loc in locations:
+        city, state = loc["city"], loc.get("state")
+        cache_key = f"{city}|{state or ''}"
+        if city in CITIES_DB:
+            coords = {"lat": float(CITIES_DB[city]["lat"]), "lon": float(CITIES_DB[city]["lon"])}
+        elif loc.get("latitude") is not None and loc.get("longitude") is not None:
+            coords = {"lat": float(loc["latitude"]), "lon": float(loc["longitude"])}
+        elif cache_key in cache:
+            coords = cache[cache_key]
+        elif allow_geocode:
+            try:
+                coords = geocode(city, state)
+            except Exception as e:
+                print(f"  ! Geocoding failed for {city}: {e}")
+                coords = None
+            time.sleep(NOMINATIM_DELAY_SECONDS)
+            if coords:
+                cache[cache_key] = coords
+                save_json(COORDINATES_FILE, cache)
+        else:
+            coords = None
+
+        if coords:
+            resolved.append({"city": city, "state": state, **coords})
+        else:
+            print(f"  ! Skipping {city}: no coordinates")
+    return resolved
+
+
+# --- Shards ---
+
+def build_shards(locations, start_date, end_date, chunk_days, tz_name):
+    shards = []
+    for loc in locations:
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+            shards.append({
+                "key": f"{loc['city']}|{chunk_start}|{chunk_end}|{tz_name}",
+                "city": loc["city"],
+                "lat": loc["lat"],
+                "lon": loc["lon"],
+                "start": chunk_start.isoformat(),
+                "end": chunk_end.isoformat(),
+                "tz": tz_name,
+            })
+            chunk_start = chunk_end + timedelta(days=1)
+    return shards
+
+
+def compute_shard(shard, with_muhurats):
+    """Runs in a worker process: the CPU-bound ephem work for one city and date chunk."""
+    result = PanchangEngine().calculate_range(shard["start"], shard["end"], (shard["lat"], shard["lon"]), shard["tz"])
+    result.city = shard["city"]
+    rows = result.to_rows()
+    muhurats = result.muhurat_rows() if with_muhurats else []
+    return shard, rows, muhurats
+
+
+def load_checkpoint(path):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return set(json.load(f).get("done", []))
+    return set()
+
+
+# --- Writes ---
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def write_shard(supabase, shard, rows, muhurats, batch_size):
+    """
+    Round-trips per shard: one read of the stored dates, one upsert per batch of rows,
+    plus one delete and one insert per batch of muhurats.
+    """
+    # New and already stored dates go in separate batches: an upsert writes the columns its rows carry
+    stored = fetch_stored_dates(supabase, shard["city"], shard["start"], shard["end"])
+    for group in split_stored(rows, stored):
+        for batch in chunked(group, batch_size):
+            supabase.table("panchang_daily").upsert(batch, on_conflict="date,city").execute()
+
+    if muhurats:
+        # Replace the auto-generated muhurats for this city and date chunk in one go
+        supabase.table("muhurats").delete()\
+            .eq("city", shard["city"])\
+            .gte("date", shard["start"])\
+            .lte("date", shard["end"])\
+            .in_("type", MUHURAT_TYPES)\
+            .execute()
+        for batch in chunked(muhurats, batch_size):
+            supabase.table("muhurats").insert(batch).execute()
+
+
+def main(args):
+    start_date = datetime.strptime(args.start_date, "%Y-%m-%d").date() if args.start_date else datetime.now().date()
+    end_date = datetime.strptime(args.end_date, "%Y-%m-%d").date() if args.end_date else start_date + timedelta(days=args.days - 1)
+
+    locations = resolve_coordinates(load_cities(args.source, args.cities), allow_geocode=not args.no_geocode)
+    shards = build_shards(locations, start_date, end_date, args.chunk_days, args.tz)
+
+    done = set() if args.reset else load_checkpoint(args.checkpoint)
+    pending = [shard for shard in shards if shard["key"] not in done]
+    print(f"{len(locations)} cities, {start_date} to {end_date}: {len(shards)} shards, {len(shards) - len(pending)} already done")
+    if not pending:
+        return
+
+    supabase = None
+    if not args.dry_run:
+        from app.utils.supabase_client import supabase
+
+    started = time.perf_counter()
+    rows_written = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(compute_shard, shard, not args.no_muhurats) for shard in pending]
+        for completed, future in enumerate(as_completed(futures), 1):
+            try:
+                shard, rows, muhurats = future.result()
+                if supabase is not None:
+                    write_shard(supabase, shard, rows, muhurats, args.batch_size)
+            except Exception as e:
+                failed += 1
+                print(f"  ! Shard failed: {e}")
+                continue
+
+            rows_written += len(rows)
+            done.add(shard["key"])
+            if not args.dry_run:
+                save_json(args.checkpoint, {"done": sorted(done)})
+            if completed % 25 == 0 or completed == len(futures):
+                elapsed = time.perf_counter() - started
+                print(f"[{completed}/{len(futures)}] {rows_written} city-days in {elapsed:.1f}s ({rows_written / elapsed:.0f}/s)")
+
+    print(f"Generation completed: {rows_written} city-days, {failed} failed shard(s).")
+    if failed:
+        print("Re-run the same command to retry the failed shards.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Panchang for many cities")
+    parser.add_argument("--source", choices=["json", "locations"], default="json", help="Where the city list comes from")
+    parser.add_argument("--cities", type=str, help="Comma-separated city names (overrides --source)")
+    parser.add_argument("--start_date", type=str, help="Start date YYYY-MM-DD (default: today)")
+    parser.add_argument("--end_date", type=str, help="End date YYYY-MM-DD, inclusive (optional)")
+    parser.add_argument("--days", type=int, default=365, help="Number of days (ignored if end_date provided)")
+    parser.add_argument("--tz", type=str, default="Asia/Kolkata", help="IANA timezone for local times")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--chunk_days", type=int, default=92, help="Days per shard")
+    parser.add_argument("--batch_size", type=int, default=500, help="Rows per upsert/insert request")
+    parser.add_argument("--checkpoint", type=str, default=DEFAULT_CHECKPOINT, help="Checkpoint file")
+    parser.add_argument("--reset", action="store_true", help="Ignore the checkpoint and regenerate everything")
+    parser.add_argument("--no_muhurats", action="store_true", help="Skip muhurat generation")
+    parser.add_argument("--no_geocode", action="store_true", help="Skip cities without known coordinates instead of geocoding")
+    parser.add_argument("--dry_run", action="store_true", help="Compute only; no database writes or checkpoint")
+    args = parser.parse_args()
+
+    main(args)
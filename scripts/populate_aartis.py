@@ -108,6 +108,8 @@ async def main():
             logger.error(f" - Failed to process {title}: {e}")
             await asyncio.sleep(1) # Backoff slightly
             
+    if gemini.cache is not None:
+        logger.info(f"Prompt cache: {gemini.cache.stats()}")
     logger.info("Batch Population Completed")
 
 if __name__ == "__main__":
@@ -6,6 +6,12 @@ Usage:
   python scripts/seed_geeta.py --mode chapters    # Seed chapter metadata only
   python scripts/seed_geeta.py --mode shlokas --chapter 2   # Seed all shlokas for chapter 2
   python scripts/seed_geeta.py --mode all        # Seed everything (long!)
+
+With GEMINI_CACHE_BACKEND=sqlite, a re-run after a partial failure replays the
+batches Gemini already answered from the local cache instead of paying for them again.
+
+The API serves the Gita from a snapshot file; rebuild it afterwards with
+scripts/build_geeta_corpus.py.
 """
 
 import sys
@@ -130,8 +136,6 @@ Ensure Sanskrit text is authentic. Provide verses {batch_start} through {batch_e
                     supabase.table("geeta_shlokas").insert(s).execute()
                     print(f"  ✓ Inserted Shloka {shloka_id}")
 
-            await asyncio.sleep(1)  # Rate limit
-
         except Exception as e:
             print(f"  ✗ Error seeding Ch{chapter_number} v{batch_start}-{batch_end}: {e}")
 
@@ -140,7 +144,6 @@ async def seed_all(gemini: GeminiClient):
     await seed_chapter_metadata(gemini)
     for ch_num in range(1, 19):
         await seed_chapter_shlokas(ch_num, gemini)
-        await asyncio.sleep(2)
 
 
 if __name__ == "__main__":
@@ -162,4 +165,6 @@ if __name__ == "__main__":
     elif args.mode == "all":
         asyncio.run(seed_all(gemini))
 
+    if gemini.cache is not None:
+        print(f"Prompt cache: {gemini.cache.stats()}")
     print("\n✅ Done!")
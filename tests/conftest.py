@@ -0,0 +1,14 @@
+import os
+import pytest
+
+# Tests never reach real services: with these unset the app falls back to placeholders and in-memory caches
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "UPSTASH_REDIS_URL", "UPSTASH_REDIS_TOKEN", "GEMINI_API_KEY"):
+    os.environ[name] = ""
+
+from tests.stub_postgrest import StubPostgrest
+
+@pytest.fixture
+def postgrest():
+    stub = StubPostgrest({})
+    yield stub
+    stub.close()
@@ -0,0 +1,154 @@
+"""
+In-memory PostgREST for tests: serves GET on tables held in a dict, with the filter,
+`or`/`and`, order (including nullsfirst/nullslast), limit and offset syntax the app
+sends. Requests are recorded in `requests` so tests can check what was asked for.
+"""
+
+import json
+import threading
+from functools import cmp_to_key
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List
+from urllib.parse import parse_qsl, urlparse
+
+Row = Dict[str, Any]
+
+def split_top_level(text: str) -> List[str]:
+    """Split on commas outside parentheses and double-quoted values."""
+    parts, current, depth, quoted, escaped = [], "", 0, False, False
+    for ch in text:
+        if escaped:
+            escaped = False
+        elif quoted and ch == "\\":
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+        elif not quoted and ch in "()":
+            depth += 1 if ch == "(" else -1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append(current)
+            current = ""
+            continue
+        current += ch
+    parts.append(current)
+    return parts
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        out, escaped = "", False
+        for ch in value[1:-1]:
+            if ch == "\\" and not escaped:
+                escaped = True
+                continue
+            out += ch
+            escaped = False
+        return out
+    return value
+
+def _typed(literal: str, like: Any) -> Any:
+    """The filter literal converted to the type of the row value it is compared with."""
+    if isinstance(like, bool):
+        return literal == "true"
+    if isinstance(like, (int, float)):
+        return type(like)(literal)
+    return literal
+
+def predicate(column: str, op: str, literal: str) -> Callable[[Row], bool]:
+    if op == "is":
+        return lambda row: row.get(column) is None if literal == "null" else row.get(column) is (literal == "true")
+    if op == "in":
+        values = [unquote(v) for v in split_top_level(literal[1:-1])]
+        return lambda row: row.get(column) is not None and row[column] in [_typed(v, row[column]) for v in values]
+    literal = unquote(literal)
+    compare = {
+        "eq": lambda a, b: a == b, "neq": lambda a, b: a != b,
+        "lt": lambda a, b: a < b, "lte": lambda a, b: a <= b,
+        "gt": lambda a, b: a > b, "gte": lambda a, b: a >= b,
+    }[op]
+    return lambda row: row.get(column) is not None and compare(row[column], _typed(literal, row[column]))
+
+def condition(expr: str) -> Callable[[Row], bool]:
+    """One `or`/`and` operand: column.op.value, or a nested and(...)/or(...)."""
+    for group, combine in (("and(", all), ("or(", any)):
+        if expr.startswith(group):
+            parts = [condition(p) for p in split_top_level(expr[len(group):-1])]
+            return lambda row, parts=parts, combine=combine: combine(p(row) for p in parts)
+    column, op, literal = expr.split(".", 2)
+    return predicate(column, op, literal)
+
+def order_rows(rows: List[Row], spec: str) -> List[Row]:
+    keys = []
+    for part in spec.split(","):
+        column, *modifiers = part.split(".")
+        desc = "desc" in modifiers
+        # Postgres puts NULLs first in descending order unless told otherwise
+        nulls_first = "nullsfirst" in modifiers or (desc and "nullslast" not in modifiers)
+        keys.append((column, desc, nulls_first))
+
+    def compare(a: Row, b: Row) -> int:
+        for column, desc, nulls_first in keys:
+            x, y = a.get(column), b.get(column)
+            if x == y:
+                continue
+            if x is None or y is None:
+                return (-1 if nulls_first else 1) * (1 if x is None else -1)
+            result = (x > y) - (x < y)
+            return -result if desc else result
+        return 0
+
+    return sorted(rows, key=cmp_to_key(compare))
+
+def select_rows(tables: Dict[str, List[Row]], path: str) -> List[Row]:
+    url = urlparse(path)
+    rows = list(tables.get(url.path.rsplit("/", 1)[-1], []))
+    columns, order, offset, limit = None, None, 0, None
+    for key, value in parse_qsl(url.query):
+        if key == "select":
+            columns = [c.strip() for c in value.split(",")]
+        elif key == "order":
+            order = value
+        elif key == "offset":
+            offset = int(value)
+        elif key == "limit":
+            limit = int(value)
+        elif key in ("or", "and"):
+            rows = [row for row in rows if condition(f"{key}{value}")(row)]
+        else:
+            op, _, literal = value.partition(".")
+            rows = [row for row in rows if predicate(key, op, literal)(row)]
+    if order:
+        rows = order_rows(rows, order)
+    rows = rows[offset:offset + limit if limit is not None else None]
+    if columns and columns != ["*"]:
+        rows = [{c: row.get(c) for c in columns} for row in rows]
+    return rows
+
+class StubPostgrest:
+    def __init__(self, tables: Dict[str, List[Row]]):
+        self.tables = tables
+        self.requests: List[str] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests.append(self.path)
+                body = json.dumps(select_rows(stub.tables, self.path)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,59 @@
+import pytest
+from app.services.autocomplete import PrefixIndex
+
+TITLES = [
+    ("Vaishno Devi", 1.0),
+    ("Kailash Mansarovar", 1.0),
+    ("Mahakaleshwar Jyotirlinga", 2.0),
+    ("Jagannath Puri", 2.0),
+    ("Shri Ganapati Aarti", 3.0),
+    ("जय गणेश देवा", 3.0),
+    ("Hanuman Chalisa", 3.0),
+    ("Sankat Mochan Hanuman", 1.0),
+]
+
+@pytest.fixture
+def table():
+    entries = [{"text": text, "id": number} for number, (text, _) in enumerate(TITLES)]
+    return PrefixIndex(entries, [weight for _, weight in TITLES])
+
+def _texts(results):
+    return [entry["text"] for entry in results]
+
+@pytest.mark.parametrize("title", [text for text, _ in TITLES])
+def test_every_prefix_of_a_title_completes_it(table, title):
+    for end in range(1, len(title) + 1):
+        prefix = title[:end]
+        if prefix.strip():
+            assert title in _texts(table.complete(prefix, limit=len(TITLES))), prefix
+
+@pytest.mark.parametrize("prefix, title", [
+    ("vai", "Vaishno Devi"),
+    ("kai", "Kailash Mansarovar"),
+    ("mahak", "Mahakaleshwar Jyotirlinga"),
+    ("jagan", "Jagannath Puri"),
+    ("jagann", "Jagannath Puri"),
+    ("ganap", "Shri Ganapati Aarti"),
+    ("ganpa", "Shri Ganapati Aarti"),
+    ("shri ganap", "Shri Ganapati Aarti"),
+    ("गणप", "Shri Ganapati Aarti"),
+    ("jai ganes", "जय गणेश देवा"),
+    ("jaya", "जय गणेश देवा"),
+    ("hanumaan chal", "Hanuman Chalisa"),
+    ("हनुमान", "Hanuman Chalisa"),
+])
+def test_prefix_cut_mid_word(table, prefix, title):
+    assert title in _texts(table.complete(prefix))
+
+def test_later_words_complete_below_title_starts(table):
+    assert _texts(table.complete("hanuman")) == ["Hanuman Chalisa", "Sankat Mochan Hanuman"]
+
+def test_no_match_and_limits(table):
+    assert table.complete("wxq") == []
+    assert table.complete("") == []
+    assert table.complete("hanuman", limit=0) == []
+    assert len(table.complete("a", limit=1)) == 1
+
+def test_titles_are_not_repeated(table):
+    texts = _texts(table.complete("ma", limit=8))
+    assert len(texts) == len(set(texts))
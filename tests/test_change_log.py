@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from app.services import change_log
+from app.utils.db import build_db_client
+
+def _entry(id, entity, entity_id, op, changed_at="2024-01-01T00:00:00+00:00"):
+    return {"id": id, "entity": entity, "entity_id": entity_id, "op": op, "changed_at": changed_at}
+
+@pytest.fixture
+def changes(postgrest, monkeypatch):
+    """Runs change_log._changes for an entity against the stub database."""
+
+    def run(entity, log, limit=100):
+        async def go():
+            client = build_db_client(postgrest.url, "test")
+            monkeypatch.setattr(change_log, "db", client)
+            try:
+                return await change_log._changes(change_log.SOURCES[entity], {"log": log}, limit)
+            finally:
+                await client.aclose()
+
+        return asyncio.run(go())
+
+    return run
+
+def test_changes_collapse_per_row(postgrest, changes):
+    postgrest.tables["temples"] = [{"id": 1, "name": "Kashi"}, {"id": 3, "name": "Puri"}]
+    postgrest.tables["change_log"] = [
+        _entry(1, "temples", "1", "upsert"),
+        _entry(2, "temples", "2", "upsert"),
+        _entry(3, "temples", "1", "upsert"),
+        _entry(4, "temples", "2", "delete", "2024-01-02T00:00:00+00:00"),
+        _entry(5, "aartis", "9", "upsert"),
+        _entry(6, "temples", "3", "upsert"),
+    ]
+
+    result, state = changes("temples", 0)
+    assert result["snapshot"] is False
+    assert result["has_more"] is False
+    assert sorted(row["id"] for row in result["upserts"]) == [1, 3]
+    assert result["deletes"] == [{"id": "2", "deleted_at": "2024-01-02T00:00:00+00:00"}]
+    assert state == {"log": 6}
+
+def test_changes_after_watermark(postgrest, changes):
+    postgrest.tables["temples"] = [{"id": 1}, {"id": 2}]
+    postgrest.tables["change_log"] = [_entry(1, "temples", "1", "upsert"), _entry(2, "temples", "2", "upsert")]
+
+    result, state = changes("temples", 1)
+    assert [row["id"] for row in result["upserts"]] == [2]
+    assert state == {"log": 2}
+
+    result, state = changes("temples", 2)
+    assert result == {"snapshot": False, "upserts": [], "deletes": [], "has_more": False}
+    assert state == {"log": 2}
+
+def test_upsert_of_missing_row_is_a_tombstone(postgrest, changes):
+    # Deleted after the entry was written, before its own delete entry settled
+    postgrest.tables["temples"] = []
+    postgrest.tables["change_log"] = [_entry(1, "temples", "7", "upsert")]
+
+    result, _ = changes("temples", 0)
+    assert result["upserts"] == []
+    assert result["deletes"] == [{"id": "7", "deleted_at": "2024-01-01T00:00:00+00:00"}]
+
+def test_hidden_row_is_a_tombstone(postgrest, changes):
+    postgrest.tables["blogs"] = [{"id": 1, "status": "published"}, {"id": 2, "status": "draft"}]
+    postgrest.tables["change_log"] = [_entry(1, "blogs", "1", "upsert"), _entry(2, "blogs", "2", "upsert")]
+
+    result, _ = changes("blogs", 0)
+    assert [row["id"] for row in result["upserts"]] == [1]
+    assert [tombstone["id"] for tombstone in result["deletes"]] == ["2"]
+
+def test_unsettled_entries_wait(postgrest, changes):
+    now = datetime.now(timezone.utc).isoformat()
+    postgrest.tables["temples"] = [{"id": 1}, {"id": 2}]
+    postgrest.tables["change_log"] = [_entry(1, "temples", "1", "upsert"), _entry(2, "temples", "2", "upsert", now)]
+
+    result, state = changes("temples", 0)
+    assert [row["id"] for row in result["upserts"]] == [1]
+    assert state == {"log": 1}
+
+def test_limit_pages_the_log(postgrest, changes):
+    postgrest.tables["temples"] = [{"id": i} for i in range(1, 6)]
+    postgrest.tables["change_log"] = [_entry(i, "temples", str(i), "upsert") for i in range(1, 6)]
+
+    result, state = changes("temples", 0, limit=2)
+    assert result["has_more"] is True
+    assert [row["id"] for row in result["upserts"]] == [1, 2]
+    assert state == {"log": 2}
+
+    result, state = changes("temples", 4, limit=2)
+    assert result["has_more"] is False
+    assert [row["id"] for row in result["upserts"]] == [5]
+
+def test_changed_rows_are_read_in_chunks(postgrest, changes, monkeypatch):
+    monkeypatch.setattr(change_log, "FETCH_CHUNK_SIZE", 2)
+    postgrest.tables["temples"] = [{"id": i} for i in range(1, 6)]
+    postgrest.tables["change_log"] = [_entry(i, "temples", str(i), "upsert") for i in range(1, 6)]
+
+    result, _ = changes("temples", 0)
+    assert sorted(row["id"] for row in result["upserts"]) == [1, 2, 3, 4, 5]
+    assert sum(path.startswith("/rest/v1/temples") for path in postgrest.requests) == 3
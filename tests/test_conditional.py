@@ -0,0 +1,82 @@
+import pytest
+from app.utils.compression import negotiate, representation_etag
+from app.utils.conditional import content_etag, http_date, is_not_modified, request_validators
+
+@pytest.mark.parametrize("header, encoding", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0.1, gzip;q=0.5", "gzip"),
+    ("br;q=0, *", "gzip"),
+    ("GZIP", "gzip"),
+    ("gzip;q=bogus, br;q=0.2", "br"),
+])
+def test_negotiate(header, encoding):
+    assert negotiate(header) == encoding
+
+@pytest.fixture
+def validators():
+    """Sets the current request's (If-None-Match, If-Modified-Since)."""
+    tokens = []
+
+    def set_validators(if_none_match=None, if_modified_since=None):
+        tokens.append(request_validators.set((if_none_match, if_modified_since)))
+
+    yield set_validators
+    for token in reversed(tokens):
+        request_validators.reset(token)
+
+def test_no_validators_means_modified(validators):
+    validators()
+    assert not is_not_modified('"abc"', 1_700_000_000)
+
+@pytest.mark.parametrize("if_none_match", [
+    '"abc"',
+    'W/"abc"',
+    '"abc-gzip"',
+    '"abc-br"',
+    '"other", "abc-br"',
+    "*",
+])
+def test_matching_etag(validators, if_none_match):
+    validators(if_none_match)
+    assert is_not_modified('"abc"')
+    assert is_not_modified(representation_etag('"abc"', "gzip"))
+
+@pytest.mark.parametrize("if_none_match", ['"abd"', '"abc-zstd"', '"other"'])
+def test_different_etag(validators, if_none_match):
+    validators(if_none_match)
+    assert not is_not_modified('"abc"')
+
+def test_etag_wins_over_date(validators):
+    validators('"old"', http_date(1_700_000_000))
+    assert not is_not_modified('"new"', 1_600_000_000)
+
+def test_if_none_match_without_etag(validators):
+    validators('"abc"')
+    assert not is_not_modified(None, 1_600_000_000)
+
+@pytest.mark.parametrize("last_modified, expected", [
+    (1_700_000_000, True),
+    (1_700_000_000.9, True),  # HTTP dates have whole seconds
+    (1_699_999_000, True),
+    (1_700_000_001, False),
+])
+def test_if_modified_since(validators, last_modified, expected):
+    validators(None, http_date(1_700_000_000))
+    assert is_not_modified('"abc"', last_modified) is expected
+
+def test_unparseable_date(validators):
+    validators(None, "yesterday")
+    assert not is_not_modified('"abc"', 1_600_000_000)
+
+def test_content_etag_ignores_timestamp():
+    first = b'{"success":true,"data":[1,2],"timestamp":"2024-01-01T00:00:00"}'
+    second = b'{"timestamp":"2024-06-01T12:00:00","data":[1,2],"success":true}'
+    assert content_etag(first) == content_etag(second)
+    assert content_etag(first) != content_etag(b'{"success":true,"data":[1,3],"timestamp":"2024-01-01T00:00:00"}')
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from app.utils.db import build_db_client
+from app.utils.pagination import InvalidCursor, _quote, decode_cursor, encode_cursor, fetch_page
+
+def _expected(rows, column, desc):
+    """(column, id) order with NULLs last, as fetch_page asks for it."""
+    present = sorted((r for r in rows if r[column] is not None), key=lambda r: (r[column], r["id"]), reverse=desc)
+    missing = sorted((r for r in rows if r[column] is None), key=lambda r: r["id"], reverse=desc)
+    return present + missing
+
+def _walk(stub, column, desc, limit):
+    """Every page from the first, following cursors."""
+
+    async def run():
+        client = build_db_client(stub.url, "test")
+        try:
+            pages, cursor = [], None
+            # A cursor that fails to move forward would page forever
+            for _ in range(len(stub.tables["temples"]) + 1):
+                query = client.table("temples").select(f"id,{column}")
+                rows, cursor = await fetch_page(query, cursor, limit, sort_column=column, desc=desc)
+                pages.append(rows)
+                if cursor is None:
+                    return pages
+            raise AssertionError("paging did not end")
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+def test_cursor_round_trip():
+    values = {"created_at": "2024-05-01T10:00:00+00:00", "id": 42}
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, ("created_at", "id")) == values
+    assert decode_cursor(encode_cursor({"created_at": None, "id": 7}), ("created_at", "id")) == {"created_at": None, "id": 7}
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor(["a", 1]), encode_cursor({"created_at": "x"})])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, ("created_at", "id"))
+
+def test_quote_escapes_filter_syntax():
+    assert _quote('Om, (Shiva) "x"') == '"Om, (Shiva) \\"x\\""'
+    assert _quote("a\\b") == '"a\\\\b"'
+
+def test_pages_cover_ties_and_nulls_once(postgrest):
+    stamps = ["2024-01-03", "2024-01-02", "2024-01-02", "2024-01-02", None, "2024-01-01", None, "2024-01-02", "2024-01-01", None]
+    rows = [{"id": i + 1, "created_at": stamp} for i, stamp in enumerate(stamps)]
+    postgrest.tables["temples"] = rows
+
+    for limit in (1, 2, 3, 4, 10):
+        pages = _walk(postgrest, "created_at", True, limit)
+        assert [r["id"] for page in pages for r in page] == [r["id"] for r in _expected(rows, "created_at", True)]
+        assert all(len(page) == limit for page in pages[:-1])
+
+def test_pages_with_filter_syntax_in_sort_values(postgrest):
+    names = ['Om, Shiva', "Ram (Ayodhya)", 'Say "Jai"', "back\\slash", "Om, Shiva", None, "Ram (Ayodhya)", "and(x)"]
+    rows = [{"id": i + 1, "name": name} for i, name in enumerate(names)]
+    postgrest.tables["temples"] = rows
+
+    pages = _walk(postgrest, "name", False, 2)
+    assert [r["id"] for page in pages for r in page] == [r["id"] for r in _expected(rows, "name", False)]
+
+def test_offset_page_without_cursor(postgrest):
+    rows = [{"id": i, "created_at": f"2024-01-{i:02d}"} for i in range(1, 11)]
+    postgrest.tables["temples"] = rows
+
+    async def run():
+        client = build_db_client(postgrest.url, "test")
+        try:
+            return await fetch_page(client.table("temples").select("id,created_at"), None, 3, offset=3)
+        finally:
+            await client.aclose()
+
+    page, cursor = asyncio.run(run())
+    assert [r["id"] for r in page] == [7, 6, 5]
+    assert decode_cursor(cursor, ("created_at", "id")) == {"created_at": "2024-01-05", "id": 5}
@@ -0,0 +1,78 @@
+import math
+import pytest
+from app.services.search_engine import HIGHLIGHT_POST, HIGHLIGHT_PRE, PREFIX_WEIGHT, InvertedIndex, highlight
+
+BOOSTS = {"title": 3.0, "body": 1.0}
+
+def _index(docs, facet_fields=()):
+    index = InvertedIndex(facet_fields)
+    for key, (title, body, payload) in docs.items():
+        index.add(key, {"title": title, "body": body}, BOOSTS, {"id": key, **payload})
+    return index
+
+def _ids(result):
+    return [item["id"] for item in result["items"]]
+
+@pytest.fixture
+def index():
+    return _index({
+        "kashi": ("Kashi Vishwanath", "Shiva temple on the Ganga", {"deity": "Shiva"}),
+        "somnath": ("Somnath", "First jyotirlinga of Shiva by the sea", {"deity": "Shiva"}),
+        "hanuman": ("Hanuman Garhi", "Hanuman temple in Ayodhya", {"deity": "Hanuman"}),
+        "ram": ("Ram Janmabhoomi", "Temple of Ram in Ayodhya", {"deity": "Ram"}),
+        "sankat": ("Sankat Mochan", "Hanuman temple of Varanasi on the Ganga", {"deity": "Hanuman"}),
+    }, facet_fields=("deity",))
+
+def test_bm25_score_of_a_single_match():
+    index = _index({"a": ("", "hanuman", {}), "b": ("", "ram", {})})
+    docs, scores = index.score(["hanuman"])
+    # One term in a one-word document of average length: idf * tf * (k1 + 1) / (tf + k1)
+    idf = math.log(1 + (2 - 1 + 0.5) / (1 + 0.5))
+    assert list(docs) == [0]
+    assert scores[0] == pytest.approx(idf * (index.k1 + 1) / (1 + index.k1))
+
+def test_title_boost_ranks_first(index):
+    assert _ids(index.search("hanuman"))[0] == "hanuman"
+
+def test_all_words_before_any(index):
+    result = index.search("hanuman ayodhya")
+    assert _ids(result) == ["hanuman"]
+    # No document has both, so either word matches
+    assert set(_ids(index.search("somnath ayodhya"))) == {"somnath", "hanuman", "ram"}
+
+def test_spellings_and_scripts_match(index):
+    assert _ids(index.search("हनुमान"))[0] == "hanuman"
+    assert _ids(index.search("hanumaan garhi")) == ["hanuman"]
+
+def test_last_word_expands_as_prefix(index):
+    assert set(_ids(index.search("hanu"))) == {"hanuman", "sankat"}
+    assert _ids(index.search("ayodhya hanu")) == ["hanuman"]
+    # Only the last word is completed
+    assert index.search("hanu ayodhya")["total"] == 2
+
+def test_prefix_matches_score_below_exact():
+    index = _index({"exact": ("", "ram", {}), "longer": ("", "ramesh", {})})
+    items = index.search("ram")["items"]
+    assert [item["id"] for item in items] == ["exact", "longer"]
+    assert items[1]["score"] == pytest.approx(items[0]["score"] * PREFIX_WEIGHT, rel=1e-3)
+
+def test_filters_and_facets(index):
+    result = index.search("temple", facets=["deity"], filters={"deity": ["Hanuman"]})
+    assert set(_ids(result)) == {"hanuman", "sankat"}
+    assert result["facets"]["deity"] == {"Hanuman": 2, "Shiva": 1, "Ram": 1}
+
+def test_remove_and_readd(index):
+    index.remove("hanuman")
+    assert _ids(index.search("garhi")) == []
+    index.add("hanuman", {"title": "Hanuman Garhi"}, BOOSTS, {"id": "hanuman", "deity": "Hanuman"})
+    assert _ids(index.search("garhi")) == ["hanuman"]
+    assert len(index) == 5
+
+def test_paging(index):
+    everything = _ids(index.search("temple", limit=10))
+    assert _ids(index.search("temple", offset=1, limit=2)) == everything[1:3]
+
+def test_highlight_marks_matches():
+    text = "Jai Hanuman gyan gun sagar"
+    assert highlight(text, "hanumaan") == f"Jai {HIGHLIGHT_PRE}Hanuman{HIGHLIGHT_POST} gyan gun sagar"
+    assert highlight(text, "krishna") is None
@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from app.services import search_index as search_index_module
+from app.services.search_index import SearchIndexManager, refresh_document
+from app.utils.db import build_db_client
+
+TABLES = ("temples", "aartis", "bhajans", "puja_guides", "blogs")
+
+@pytest.fixture
+def manager(postgrest, monkeypatch):
+    """A fresh manager (no snapshot file) reading the stub database, and the client it uses."""
+    for table in TABLES:
+        postgrest.tables[table] = []
+    manager = SearchIndexManager(None, 3600)
+    monkeypatch.setattr(search_index_module, "search_index", manager)
+    return manager
+
+def _run(postgrest, monkeypatch, scenario):
+    async def go():
+        client = build_db_client(postgrest.url, "test")
+        monkeypatch.setattr(search_index_module, "db", client)
+        try:
+            return await scenario()
+        finally:
+            await client.aclose()
+
+    return asyncio.run(go())
+
+def _titles(index, query):
+    return [item["title"] for item in index.search(query)["items"]]
+
+def test_writes_during_first_build_reach_the_index(postgrest, monkeypatch, manager):
+    postgrest.tables["temples"] = [{"id": 1, "name": "Kashi Vishwanath"}, {"id": 3, "name": "Somnath"}]
+    read_tables = manager._fetch_all
+
+    async def fetch_all(source):
+        rows = await read_tables(source)
+        if source.table == "temples":
+            # Admin writes that commit after the table was read, before the build ends
+            postgrest.tables["temples"] = [{"id": 1, "name": "Kashi Vishwanath Dham"}, {"id": 2, "name": "Mahakaleshwar"}]
+            await refresh_document("temple", "1")
+            await refresh_document("temple", "2")
+            await refresh_document("temple", "3")
+        return rows
+
+    monkeypatch.setattr(manager, "_fetch_all", fetch_all)
+    index = _run(postgrest, monkeypatch, manager.get)
+    assert _titles(index, "mahakaleshwar") == ["Mahakaleshwar"]
+    assert _titles(index, "kashi") == ["Kashi Vishwanath Dham"]
+    assert _titles(index, "somnath") == []
+
+def test_refresh_before_any_build_reads_nothing(postgrest, monkeypatch, manager):
+    _run(postgrest, monkeypatch, lambda: refresh_document("temple", "1"))
+    assert postgrest.requests == []
+    assert manager.index is None
+
+def test_refresh_after_build(postgrest, monkeypatch, manager):
+    postgrest.tables["aartis"] = [{"id": 1, "title": "Om Jai Jagdish Hare", "deity": "Vishnu"}]
+
+    async def scenario():
+        index = await manager.get()
+        postgrest.tables["aartis"][0]["title"] = "Aarti Kunj Bihari Ki"
+        await refresh_document("aarti", "1")
+        return index
+
+    index = _run(postgrest, monkeypatch, scenario)
+    assert _titles(index, "kunj") == ["Aarti Kunj Bihari Ki"]
+    assert _titles(index, "jagdish") == []
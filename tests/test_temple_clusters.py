@@ -0,0 +1,78 @@
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers import temples
+from app.services import temple_index as temple_index_module
+from app.services.temple_clusters import ClusterPyramid, canonical_deity, lat_to_y, lng_to_x
+from app.services.temple_index import TempleSpatialIndex, temple_index
+from app.utils.auth import verify_api_key
+from app.utils.db import build_db_client
+
+# Around Varanasi, and one in Ujjain
+TEMPLES = [
+    {"id": "1", "name": "Kashi Vishwanath", "deity": "Shiva", "city": "Varanasi", "latitude": 25.3109, "longitude": 83.0107},
+    {"id": "2", "name": "Kaal Bhairav", "deity": "Shiva", "city": "Varanasi", "latitude": 25.3195, "longitude": 83.0134},
+    {"id": "3", "name": "Sankat Mochan", "deity": "Hanuman", "city": "Varanasi", "latitude": 25.2815, "longitude": 82.9996},
+    {"id": "4", "name": "Mahakaleshwar", "deity": "Shiva", "city": "Ujjain", "latitude": 23.1828, "longitude": 75.7681},
+]
+VARANASI = {"sw_lat": 25.2, "sw_lng": 82.9, "ne_lat": 25.4, "ne_lng": 83.1}
+
+@pytest.fixture
+def spatial_index():
+    index = TempleSpatialIndex(1.0)
+    for row in TEMPLES:
+        index.upsert(row["id"], row["latitude"], row["longitude"], row["deity"])
+    return index
+
+@pytest.fixture
+def api(postgrest, monkeypatch, spatial_index):
+    """The temples router over `spatial_index`, reading rows from the stub database."""
+    postgrest.tables["temples"] = TEMPLES
+    monkeypatch.setattr(temple_index, "index", spatial_index)
+    monkeypatch.setattr(temple_index, "loaded_at", time.time())
+    app = FastAPI()
+    app.include_router(temples.router)
+    app.dependency_overrides[verify_api_key] = lambda: "test"
+    with TestClient(app) as client:
+        monkeypatch.setattr(temple_index_module, "db", build_db_client(postgrest.url, "test"))
+        yield client
+
+def _viewport(api, **params):
+    res = api.get("/v1/temples/within-bounds", params={**VARANASI, **params})
+    return res.status_code, res.json().get("data")
+
+def test_canonical_deity(spatial_index):
+    assert canonical_deity(spatial_index, "Shiva") == "Shiva"
+    assert canonical_deity(spatial_index, " shiva ") == "Shiva"
+    assert canonical_deity(spatial_index, "HANUMAN") == "Hanuman"
+    assert canonical_deity(spatial_index, "Vishnu") is None
+
+@pytest.mark.parametrize("zoom", [None, 4, 10, 15])
+def test_deity_filter_ignores_case_at_every_zoom(api, zoom):
+    params = {"deity": "shiva", **({"zoom": zoom} if zoom is not None else {})}
+    status, data = _viewport(api, **params)
+    assert status == 200
+    assert data["total"] == 2
+
+def test_unknown_deity_matches_nothing(api):
+    for zoom in (4, 15):
+        status, data = _viewport(api, deity="vishnu", zoom=zoom)
+        assert status == 200
+        assert data["total"] == 0
+
+@pytest.mark.parametrize("zoom", [-1, 23])
+def test_zoom_out_of_range(api, zoom):
+    assert api.get("/v1/temples/within-bounds", params={**VARANASI, "zoom": zoom}).status_code == 422
+
+@pytest.mark.parametrize("cell_bits", [0, 1, 2, 3, 4])
+def test_every_temple_is_in_its_own_tile_at_every_zoom(spatial_index, cell_bits):
+    pyramid = ClusterPyramid(spatial_index, 12, cell_bits)
+    for z in range(13):
+        found = {}
+        for row in TEMPLES:
+            x, y = int(lng_to_x(row["longitude"]) * 2 ** z), int(lat_to_y(row["latitude"]) * 2 ** z)
+            if (x, y) not in found:
+                clusters, point_ids = pyramid.tile(z, x, y)
+                found[x, y] = sum(c["count"] for c in clusters) + len(point_ids)
+        assert sum(found.values()) == len(TEMPLES), z
@@ -0,0 +1,78 @@
+import pytest
+from app.utils.transliteration import devanagari_to_roman, drop_medial_a, phonetic_key, prefix_key
+
+@pytest.mark.parametrize("word, roman", [
+    ("राम", "raam"),
+    ("जगदीश", "jagdeesh"),
+    ("आरती", "aartee"),
+    ("गणपति", "ganpati"),
+    ("जय", "jay"),
+    ("ॐ", "om"),
+])
+def test_devanagari_to_roman(word, roman):
+    assert devanagari_to_roman(word) == roman
+
+@pytest.mark.parametrize("spellings", [
+    ["हनुमान", "hanuman", "hanumaan"],
+    ["कृष्ण", "krishna", "kṛṣṇa"],
+    ["गणपति", "ganapati", "ganpati"],
+    ["जय", "jai", "jay", "jaya"],
+    ["जगदीश", "jagadish", "jagdish", "jagdeesh"],
+    ["आरती", "aarti", "arati", "aarati"],
+    ["रामायण", "ramayan", "ramayana", "raamaayan"],
+    ["नारायण", "narayan", "narayana"],
+    ["शिव", "shiv", "shiva"],
+    ["शंभु", "shambhu", "shanbhu"],
+])
+def test_spellings_share_a_key(spellings):
+    assert len({phonetic_key(word) for word in spellings}) == 1
+
+@pytest.mark.parametrize("a, b", [
+    ("ram", "rim"),
+    ("shiv", "shav"),
+    ("durga", "ganga"),
+    ("jayanti", "janti"),
+])
+def test_different_words_keep_different_keys(a, b):
+    assert phonetic_key(a) != phonetic_key(b)
+
+def test_drop_medial_a_skips_the_next_after_a_drop():
+    # ganapati: the "a" after "p" follows a dropped "a", so it stays
+    assert drop_medial_a("ganapati") == "ganpati"
+    assert drop_medial_a("hanuman") == "hanuman"
+
+def test_devanagari_to_roman_keeping_schwa():
+    assert devanagari_to_roman("गणपति", drop_schwa=False) == "ganapati"
+    assert devanagari_to_roman("गणप", drop_schwa=False) == "ganap"
+    assert devanagari_to_roman("क", drop_schwa=False) == "k"
+
+WORDS = [
+    "ganapati", "vaishno", "kailash", "mahakaleshwar", "jagannath", "jagdeesh", "shambhu",
+    "kṛṣṇa", "chhatarpur", "omkareshwar", "jai", "dwarkadhish", "akshardham",
+    "गणपति", "वैष्णो", "कैलाश", "महाकालेश्वर", "जगन्नाथ", "कृष्ण", "लक्ष्मी", "ज़ेवर", "जय",
+]
+
+@pytest.mark.parametrize("word", WORDS)
+def test_prefix_key_of_every_prefix_is_a_prefix(word):
+    full = prefix_key(word)
+    for end in range(1, len(word) + 1):
+        assert full.startswith(prefix_key(word[:end])), word[:end]
+
+@pytest.mark.parametrize("partial, word", [
+    ("vai", "vaishno"),
+    ("kai", "kailash"),
+    ("mahak", "mahakaleshwar"),
+    ("jagan", "jagannath"),
+    ("jagann", "jagannath"),
+    ("ganap", "ganapati"),
+    ("ganap", "गणपति"),
+    ("गणप", "ganapati"),
+    ("jagde", "jagdeesh"),
+])
+def test_partial_words_meet_by_prefix_key(partial, word):
+    assert prefix_key(word).startswith(prefix_key(partial))
+
+@pytest.mark.parametrize("partial, word", [("vai", "vaishno"), ("mahak", "mahakaleshwar"), ("ganap", "ganapati")])
+def test_whole_word_key_is_not_prefix_stable(partial, word):
+    # Why partial words need prefix_key: phonetic_key looks at the letters that follow
+    assert not phonetic_key(word).startswith(phonetic_key(partial))